@@ -0,0 +1,349 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import groupby
+from math import ceil
+import json
+import threading
+
+from cl_contact import Contact, FIELDS
+from cl_index import EXACT, PREFIX, SUBSTRING, FUZZY
+from cl_metrics import METRICS
+from cl_ph_book import PhoneBook
+from cl_query import Query, Term, And, Or, Not
+from cl_storage import BaseStorage
+
+
+# Команды, которые только читают данные и могут
+# выполняться параллельно, и команды, которые их изменяют
+# (команда "stats" всегда выполняется в основном процессе)
+READ_OPS: Tuple[str, ...] = ('count', 'get', 'list', 'find', 'lookup', 'duplicates')
+WRITE_OPS: Tuple[str, ...] = ('add', 'update', 'remove', 'merge')
+
+# Режимы поиска по названию в команде find
+MODES: Dict[str, str] = {
+    'exact': EXACT, 'prefix': PREFIX, 'substring': SUBSTRING, 'fuzzy': FUZZY
+}
+
+# Наибольшее кол-во читающих команд, которые накапливаются
+# перед отправкой в пул (чтобы не держать весь поток в памяти)
+MAX_PENDING: int = 10000
+
+# Наибольшее кол-во изменений, которые накапливаются
+# в транзакции перед записью в хранилище
+MAX_UNSAVED: int = 1000
+
+# Справочник рабочего потока или процесса пула
+_local = threading.local()
+
+
+def read_commands(source: TextIO) -> Iterator[Tuple[int, Any]]:
+    '''
+    Ф-ция построчно читает команды в формате JSON Lines.
+    Возвращает пары "номер строки - команда", строки,
+    которые не удалось разобрать, возвращаются как None.
+    '''
+
+    for line_num, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except json.decoder.JSONDecodeError:
+            yield line_num, None
+
+
+def parse_query(command: Dict[str, Any]) -> Query:
+    '''
+    Ф-ция строит условие поиска из команды find:
+    {"op": "find", "join": "and" | "or", "criteria": [
+        {"field": "surname", "value": "Иванов", "mode": "exact", "not": false}, ...
+    ]}
+    '''
+
+    criteria: Any = command.get('criteria')
+    if not isinstance(criteria, list) or not criteria:
+        raise ValueError('не указаны условия поиска (criteria)')
+
+    terms: List[Query] = list()
+    for criterion in criteria:
+        if not isinstance(criterion, dict):
+            raise ValueError('условие поиска должно быть объектом')
+        if criterion.get('field') not in FIELDS:
+            raise ValueError(f'неизвестная характеристика: {criterion.get("field")}')
+        mode: Optional[str] = MODES.get(criterion.get('mode', 'exact'))
+        if mode is None:
+            raise ValueError(f'неизвестный режим поиска: {criterion.get("mode")}')
+        term: Query = Term(criterion['field'], str(criterion.get('value', '')), mode)
+        terms.append(Not(term) if criterion.get('not') else term)
+
+    join: str = command.get('join', 'and')
+    if join not in ('and', 'or'):
+        raise ValueError(f'неизвестный способ объединения условий: {join}')
+    if len(terms) == 1:
+        return terms[0]
+    return And(*terms) if join == 'and' else Or(*terms)
+
+
+def execute(ph_bk: PhoneBook, command: Any) -> Dict[str, Any]:
+    '''
+    Ф-ция выполняет одну команду над справочником.
+    Возвращает словарь результата:
+    - {"ok": true, "result": ...} - команда выполнена;
+    - {"ok": false, "error": "..."} - ошибка в команде.
+    Значение "ref" из команды (если есть) возвращается
+    в результате без изменений, чтобы сопоставлять ответы.
+    '''
+
+    if not isinstance(command, dict):
+        return {'ok': False, 'error': 'команда не является объектом JSON'}
+    response: Dict[str, Any] = {'ref': command['ref']} if 'ref' in command else dict()
+
+    try:
+        # Получение изменений других процессов, работающих
+        # с тем же хранилищем (например интерактивного меню)
+        ph_bk.refresh()
+        with METRICS.timer(f'command.{command.get("op")}'):
+            result: Any = _dispatch(ph_bk, command)
+        response.update(ok=True, result=result)
+    except KeyError as error:
+        response.update(ok=False, error=f'контакт не найден: {error.args[0]}')
+    except (TypeError, ValueError, OverflowError) as error:
+        response.update(ok=False, error=str(error))
+    return response
+
+
+def _dispatch(ph_bk: PhoneBook, command: Dict[str, Any]) -> Any:
+    '''
+    Ф-ция вызывает метод справочника, соответствующий команде.
+    '''
+
+    op: Any = command.get('op')
+
+    # Команды чтения
+    if op == 'count':
+        return ph_bk.count()
+    if op == 'stats':
+        return METRICS.snapshot()
+    if op == 'get':
+        contact: Optional[Contact] = ph_bk.get_contact(str(command.get('id')))
+        if contact is None:
+            raise KeyError(command.get('id'))
+        return _record(str(command.get('id')), contact)
+    if op == 'list':
+        offset: int = _integer(command, 'offset', 0)
+        limit: int = _integer(command, 'limit', 10)
+        return _records(ph_bk, ph_bk.list_contacts(offset, offset + limit), ph_bk.count())
+    if op == 'find':
+        return _records(ph_bk, ph_bk.search(parse_query(command)), limit=_integer(command, 'limit'))
+    if op == 'lookup':
+        return _records(
+            ph_bk, ph_bk.find_by_number(str(command.get('number', ''))), limit=_integer(command, 'limit')
+        )
+    if op == 'duplicates':
+        groups: List[List[str]] = ph_bk.find_duplicates()
+        limit = _integer(command, 'limit')
+        return {
+            'total': len(groups),
+            'groups': [
+                [_record(contact_id, ph_bk.get_contact(contact_id)) for contact_id in group]
+                for group in (groups if limit is None else groups[:limit])
+            ]
+        }
+
+    # Команды изменения
+    if op == 'add':
+        return {'id': ph_bk.add_record(command.get('contact'))}
+    if op == 'update':
+        fields: Any = command.get('fields')
+        if not isinstance(fields, dict) or not fields:
+            raise ValueError('не указаны изменяемые характеристики (fields)')
+        ph_bk.update_fields(str(command.get('id')), fields)
+        return {'id': command.get('id')}
+    if op == 'remove':
+        ph_bk.remove_record(str(command.get('id')))
+        return {'id': command.get('id')}
+    if op == 'merge':
+        ids: Any = command.get('ids')
+        if not isinstance(ids, list):
+            raise ValueError('не указаны объединяемые контакты (ids)')
+        return {'id': ph_bk.merge_group([str(elem) for elem in ids])}
+
+    raise ValueError(f'неизвестная команда: {op}')
+
+
+def _integer(command: Dict[str, Any], name: str, default: int = None) -> Optional[int]:
+    '''
+    Ф-ция возвращает неотрицательный целочисленный аргумент
+    команды (целое число или строка из цифр), default - если
+    аргумент не указан.
+    '''
+
+    value: Any = command.get(name)
+    if value is None:
+        return default
+    number: Optional[int] = None
+    if isinstance(value, int) and not isinstance(value, bool):
+        number = value
+    elif isinstance(value, str):
+        try:
+            number = int(value)
+        except ValueError:
+            pass
+
+    # Отрицательные значения в срезах отсчитывались бы с конца списка
+    if number is None or number < 0:
+        raise ValueError(f'некорректное значение {name}: {value}')
+    return number
+
+
+def _record(contact_id: str, contact: Contact) -> Dict[str, str]:
+    '''
+    Ф-ция переводит контакт в словарь для ответа.
+    '''
+
+    return {'id': contact_id, **contact.to_dict()}
+
+
+def _records(ph_bk: PhoneBook, ids: List[str], total: int = None, limit: int = None) -> Dict[str, Any]:
+    '''
+    Ф-ция формирует ответ со списком контактов:
+    общее кол-во найденных и данные первых limit контактов.
+    '''
+
+    shown: List[str] = ids if limit is None else ids[:limit]
+    return {
+        'total': len(ids) if total is None else total,
+        'contacts': [_record(contact_id, ph_bk.get_contact(contact_id)) for contact_id in shown]
+    }
+
+
+def _init_worker(storage_factory: Callable[[], BaseStorage]) -> None:
+    '''
+    Ф-ция инициализации рабочего потока или процесса пула:
+    каждый из них открывает собственный справочник.
+    '''
+
+    _local.ph_bk = PhoneBook(storage_factory())
+
+
+def _run_chunk(commands: List[Any]) -> List[Dict[str, Any]]:
+    '''
+    Ф-ция выполняет часть читающих команд в рабочем
+    потоке или процессе пула.
+    '''
+
+    return [execute(_local.ph_bk, command) for command in commands]
+
+
+def run(ph_bk: PhoneBook, source: TextIO, target: TextIO, workers: int = 1, pool: str = 'process',
+        storage_factory: Callable[[], BaseStorage] = None) -> Tuple[int, int]:
+    '''
+    Ф-ция пакетной обработки команд без интерактивного меню.
+    Читает команды JSON Lines из source, выполняет их над
+    справочником и пишет результаты JSON Lines в target
+    в том же порядке (к результату добавляется номер строки "line").
+
+    Если workers больше 1, подряд идущие читающие команды
+    делятся на части и выполняются в пуле потоков ("thread")
+    или процессов ("process"). Каждый рабочий поток или процесс
+    открывает собственный справочник через storage_factory.
+    Подряд идущие изменяющие команды выполняются в основном
+    справочнике одной транзакцией (изменения записываются
+    раз в MAX_UNSAVED изменений и после последней команды),
+    после них пул пересоздается, чтобы читающие команды
+    видели все предыдущие изменения.
+
+    Возвращает кол-во выполненных команд и кол-во ошибок.
+    '''
+
+    executor: Optional[Executor] = None
+    pending: List[Tuple[int, Any]] = list()
+    total: int = 0
+    errors: int = 0
+
+    def write(line_num: int, response: Dict[str, Any]) -> None:
+        nonlocal total, errors
+        total += 1
+        errors += not response['ok']
+        target.write(json.dumps({'line': line_num, **response}, ensure_ascii=False) + '\n')
+
+    def flush() -> None:
+        # Выполнение накопленных читающих команд
+        nonlocal executor
+        if not pending:
+            return
+        commands: List[Any] = [command for _, command in pending]
+        if executor is None:
+            executor = _create_executor(workers, pool, storage_factory)
+        size: int = ceil(len(commands) / (workers * 4))
+        results: Iterable[List[Dict[str, Any]]] = executor.map(
+            _run_chunk, [commands[pos:pos + size] for pos in range(0, len(commands), size)]
+        )
+        responses: Iterator[Dict[str, Any]] = (elem for chunk in results for elem in chunk)
+        for (line_num, _), response in zip(pending, responses):
+            write(line_num, response)
+        pending.clear()
+
+    try:
+        for writes, group in groupby(read_commands(source), key=lambda elem: _is_op(elem[1], WRITE_OPS)):
+
+            # Изменяющие команды: сначала выполняются накопленные
+            # читающие команды, затем изменения одной транзакцией,
+            # после изменений пул пересоздается
+            if writes:
+                flush()
+                with ph_bk.transaction(max_changes=MAX_UNSAVED):
+                    for line_num, command in group:
+                        write(line_num, execute(ph_bk, command))
+                if executor is not None:
+                    executor.shutdown()
+                    executor = None
+                continue
+
+            for line_num, command in group:
+
+                # Последовательная обработка в основном справочнике
+                if workers <= 1:
+                    write(line_num, execute(ph_bk, command))
+                    continue
+
+                # Читающие команды накапливаются для пула
+                if _is_op(command, READ_OPS):
+                    pending.append((line_num, command))
+                    if len(pending) >= MAX_PENDING:
+                        flush()
+                    continue
+
+                # Прочие команды выполняются в основном справочнике
+                # после накопленных читающих команд
+                flush()
+                write(line_num, execute(ph_bk, command))
+        flush()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    target.flush()
+    return total, errors
+
+
+def _is_op(command: Any, ops: Tuple[str, ...]) -> bool:
+    '''
+    Ф-ция проверяет, относится ли команда к переданным.
+    '''
+
+    return isinstance(command, dict) and command.get('op') in ops
+
+
+def _create_executor(workers: int, pool: str, storage_factory: Callable[[], BaseStorage]) -> Executor:
+    '''
+    Ф-ция создает пул потоков или процессов, рабочие
+    потоки (процессы) которого открывают свой справочник.
+    '''
+
+    if storage_factory is None:
+        raise ValueError('для параллельной обработки нужна ф-ция создания хранилища')
+    if pool == 'thread':
+        return ThreadPoolExecutor(workers, initializer=_init_worker, initargs=(storage_factory,))
+    if pool == 'process':
+        return ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(storage_factory,))
+    raise ValueError(f'неизвестный вид пула: {pool}')
@@ -0,0 +1,6 @@
+'''
+Пакет со вспомогательными скриптами для замеров
+производительности телефонного справочника.
+Скрипты запускаются из корня проекта как модули,
+например: python -m benchmarks.memory 200000
+'''
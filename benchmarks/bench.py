@@ -0,0 +1,250 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from random import Random
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate_contacts
+from cl_contact import Contact
+from cl_index import EXACT, PREFIX, SUBSTRING, FUZZY
+from cl_ph_book import PhoneBook
+from cl_query import Term, And, Or
+from cl_storage import BaseStorage, JSONStorage, SQLiteStorage
+
+
+def measure(results: List[Dict[str, Any]], storage: str, size: int, operation: str,
+            func: Callable[[Any], Any], items: Iterable[Any]) -> None:
+    '''
+    Ф-ция замеряет время выполнения func для каждого
+    элемента items и добавляет результат в results:
+    общее время, кол-во операций и время одной операции.
+    '''
+
+    items = list(items)
+    started: float = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed: float = time.perf_counter() - started
+    results.append({
+        'storage': storage,
+        'size': size,
+        'operation': operation,
+        'ops': len(items),
+        'total_s': round(elapsed, 6),
+        'per_op_us': round(elapsed / max(len(items), 1) * 1_000_000, 2)
+    })
+    print(
+        f'{storage:>6} {size:>8} {operation:<18} {results[-1]["per_op_us"]:>14.2f} мкс',
+        file=sys.stderr
+    )
+
+
+def prepare_data(directory: str, storage: str, size: int, seed: int,
+                 results: List[Dict[str, Any]]) -> str:
+    '''
+    Ф-ция создает файл хранилища с синтетическим справочником
+    переданного размера и возвращает путь к нему.
+    Для SQLite заполнение базы замеряется как импорт.
+    '''
+
+    if storage == 'json':
+        path: str = os.path.join(directory, 'contacts.json')
+        with open(path, 'w', encoding='utf-8') as contacts:
+            json.dump(dict(generate_contacts(size, seed)), contacts, indent=4, ensure_ascii=False)
+        return path
+
+    path = os.path.join(directory, 'contacts.db')
+    db: SQLiteStorage = SQLiteStorage(path)
+    contacts: List[Contact] = [Contact.from_dict(value) for _, value in generate_contacts(size, seed)]
+    measure(
+        results, storage, size, 'import', db.add_many,
+        [contacts[pos:pos + 1000] for pos in range(0, size, 1000)]
+    )
+    db.close()
+    return path
+
+
+def run_size(storage: str, size: int, ops: int, seed: int) -> List[Dict[str, Any]]:
+    '''
+    Ф-ция выполняет все замеры для одного хранилища
+    и одного размера справочника.
+    '''
+
+    results: List[Dict[str, Any]] = list()
+    rnd: Random = Random(seed)
+    directory: str = tempfile.mkdtemp(prefix='phonebook_bench_')
+    try:
+        path: str = prepare_data(directory, storage, size, seed, results)
+
+        # Загрузка (подключение к файлу и индекс имен)
+        # и построение индексов для поиска, поиск замеряется
+        # без кэша результатов, кроме замера search_cached
+        opened: List[BaseStorage] = list()
+        factory: Callable[[str], BaseStorage] = JSONStorage if storage == 'json' else SQLiteStorage
+        measure(results, storage, size, 'load', lambda _: opened.append(factory(path)), [None])
+        db: BaseStorage = opened[0]
+        ph_bk: PhoneBook = PhoneBook(db, cache_size=0)
+        measure(results, storage, size, 'build_index', lambda _: ph_bk.warm_up(), [None])
+
+        # Образцы значений для поиска из существующих контактов
+        sample: List[Contact] = [
+            ph_bk.get_contact(elem) for elem in ph_bk.list_contacts(0, size)[::max(size // ops, 1)]
+        ]
+        rnd.shuffle(sample)
+        sample = (sample * (ops // max(len(sample), 1) + 1))[:ops]
+
+        # Постраничный просмотр и поиск
+        measure(
+            results, storage, size, 'page', lambda offset: ph_bk.list_contacts(offset, offset + 10),
+            [rnd.randrange(size) for _ in range(ops)]
+        )
+        for operation, mode, cut in (
+            ('search_exact', EXACT, None), ('search_prefix', PREFIX, 3),
+            ('search_substring', SUBSTRING, 4), ('search_fuzzy', FUZZY, -1)
+        ):
+            measure(
+                results, storage, size, operation,
+                lambda value, mode=mode: ph_bk.search(Term('surname', value, mode)),
+                [contact['surname'][:cut] for contact in sample]
+            )
+        measure(
+            results, storage, size, 'search_and',
+            lambda contact: ph_bk.search(And(
+                Term('surname', contact['surname']), Term('organization', contact['organization']),
+                Term('name', contact['name'][:2], PREFIX)
+            )),
+            sample
+        )
+        measure(
+            results, storage, size, 'search_or',
+            lambda contact: ph_bk.search(Or(
+                Term('name', contact['name']), Term('surname', contact['surname'])
+            )),
+            sample[:max(ops // 10, 1)]
+        )
+        # Повторяющиеся запросы по организации с кэшем результатов
+        cached: PhoneBook = PhoneBook(db)
+        measure(
+            results, storage, size, 'search_cached',
+            lambda contact: cached.search(Term('organization', contact['organization'])), sample
+        )
+        measure(
+            results, storage, size, 'lookup_number',
+            lambda contact: ph_bk.find_by_number(contact['work_number'][-4:]), sample
+        )
+
+        # Изменение данных: добавление с выдачей идентификатора,
+        # изменение и удаление (с сохранением каждого изменения)
+        new_ids: List[str] = list()
+        measure(
+            results, storage, size, 'insert',
+            lambda record: new_ids.append(ph_bk.add_record(record)),
+            [value for _, value in generate_contacts(ops, seed + 1)]
+        )
+        measure(
+            results, storage, size, 'edit',
+            lambda contact_id: ph_bk.update_record(contact_id, 'organization', 'Бенчмарк'), new_ids
+        )
+        measure(results, storage, size, 'delete', ph_bk.remove_record, new_ids)
+        ph_bk.close()
+
+        # Полная запись файла (JSON-хранилище без журнала
+        # перезаписывает весь файл при каждом изменении)
+        if storage == 'json':
+            full: JSONStorage = JSONStorage(path, use_journal=False)
+            contact_id: str = full[0:1][0]
+            measure(
+                results, storage, size, 'persist_full',
+                lambda _: full.update(contact_id, 'organization', 'Бенчмарк'), range(3)
+            )
+
+            # Данные, разбитые на части: загрузка с параллельным
+            # чтением частей и изменение (перезаписывается одна часть)
+            full.split_into_shards()
+            full.close()
+            measure(results, storage, size, 'load_sharded', lambda _: opened.append(JSONStorage(path)), [None])
+            sharded: BaseStorage = opened[-1]
+            measure(
+                results, storage, size, 'persist_shard',
+                lambda _: sharded.update(contact_id, 'organization', 'Бенчмарк'), range(3)
+            )
+            sharded.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def compare(results: List[Dict[str, Any]], previous_path: str) -> None:
+    '''
+    Ф-ция сравнивает результаты с сохраненными ранее
+    и выводит отношение времени операций (больше 1 - медленнее).
+    '''
+
+    with open(previous_path, 'r', encoding='utf-8') as previous_file:
+        previous: Dict[Any, float] = {
+            (elem['storage'], elem['size'], elem['operation']): elem['per_op_us']
+            for elem in json.load(previous_file)['results']
+        }
+    for elem in results:
+        old: Optional[float] = previous.get((elem['storage'], elem['size'], elem['operation']))
+        if old:
+            print(
+                f'{elem["storage"]:>6} {elem["size"]:>8} {elem["operation"]:<18} '
+                f'{old:>12.2f} -> {elem["per_op_us"]:>12.2f} мкс  x{elem["per_op_us"] / old:.2f}',
+                file=sys.stderr
+            )
+
+
+def main() -> None:
+    '''
+    Главная ф-ция, замеры основных операций справочника
+    на синтетических справочниках разного размера.
+    Результаты выводятся в формате JSON (или в файл --output),
+    чтобы сравнивать их между версиями (--compare).
+    '''
+
+    parser = argparse.ArgumentParser(description='Замеры производительности справочника')
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10_000, 100_000],
+        help='размеры справочников (например 10000 100000 1000000)'
+    )
+    parser.add_argument(
+        '--storage', choices=('json', 'sqlite'), nargs='+', default=['json'], help='хранилища'
+    )
+    parser.add_argument('--ops', type=int, default=1000, help='кол-во операций в каждом замере')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора')
+    parser.add_argument('--output', default=None, help='файл для сохранения результатов JSON')
+    parser.add_argument('--compare', default=None, help='файл с предыдущими результатами для сравнения')
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = list()
+    for storage in args.storage:
+        for size in args.sizes:
+            results.extend(run_size(storage, size, args.ops, args.seed))
+
+    report: Dict[str, Any] = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'ops': args.ops,
+        'seed': args.seed,
+        'results': results
+    }
+    text: str = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text)
+    else:
+        print(text)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from typing import Dict, Iterator, List, Tuple
+from random import Random
+
+
+# Наборы значений для генерации правдоподобных контактов
+NAMES: List[str] = [
+    'Александр', 'Алексей', 'Анна', 'Андрей', 'Борис', 'Валентина', 'Василий',
+    'Виктор', 'Галина', 'Григорий', 'Дарья', 'Дмитрий', 'Екатерина', 'Елена',
+    'Иван', 'Ирина', 'Константин', 'Мария', 'Михаил', 'Наталья', 'Николай',
+    'Ольга', 'Павел', 'Сергей', 'Светлана', 'Татьяна', 'Юлия', 'Ярослав'
+]
+SURNAMES: List[str] = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+    'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов'
+]
+PATRONYMICS: List[str] = [
+    '', 'Александрович', 'Сергеевич', 'Иванович', 'Петрович', 'Николаевич',
+    'Андреевна', 'Викторовна', 'Михайловна', 'Дмитриевна'
+]
+ORGANIZATIONS: List[str] = [
+    '', 'Хогвартс', 'Тесла', 'Старк Индастриз', 'Рога и копыта', 'Газпром',
+    'Сбербанк', 'Яндекс', 'Почта России', 'РЖД', 'Аэрофлот', 'Ростелеком'
+]
+
+
+def generate_number(rnd: Random) -> str:
+    '''
+    Ф-ция генерирует номер телефона в одном из форматов,
+    которые встречаются в справочнике.
+    '''
+
+    digits: str = ''.join(rnd.choice('0123456789') for _ in range(7))
+    number: str = f'{digits[:3]}-{digits[3:5]}-{digits[5:]}'
+    style: int = rnd.randrange(3)
+    if style == 1:
+        return f'+7 ({rnd.randrange(900, 1000)}) {number}'
+    if style == 2:
+        return digits
+    return number
+
+
+def generate_contacts(count: int, seed: int = 0) -> Iterator[Tuple[str, Dict[str, str]]]:
+    '''
+    Ф-ция генерирует переданное кол-во синтетических контактов.
+    Возвращает пары "идентификатор - данные контакта".
+    '''
+
+    rnd: Random = Random(seed)
+    for pos in range(count):
+        yield str(1000 + pos), {
+            'name': rnd.choice(NAMES),
+            'surname': rnd.choice(SURNAMES),
+            'desperation': rnd.choice(PATRONYMICS),
+            'organization': rnd.choice(ORGANIZATIONS),
+            'work_number': generate_number(rnd),
+            'personal_number': generate_number(rnd) if rnd.random() < 0.5 else ''
+        }
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import random
+import time
+
+
+# Наибольшая длина строки ответа (страница образцов контактов)
+MAX_LINE: int = 16 * 1024 * 1024
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  command: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Ф-ция отправляет серверу одну команду и возвращает ответ.
+    '''
+
+    writer.write((json.dumps(command, ensure_ascii=False) + '\n').encode('utf-8'))
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def make_commands(contacts: List[Dict[str, str]], count: int, seed: int) -> List[Dict[str, Any]]:
+    '''
+    Ф-ция генерирует смесь читающих команд по образцам
+    контактов: определение владельца номера, поиск по фамилии
+    (по началу и с опечаткой), чтение контакта и страницы списка.
+    '''
+
+    rnd: random.Random = random.Random(seed)
+    commands: List[Dict[str, Any]] = list()
+    for _ in range(count):
+        contact: Dict[str, str] = rnd.choice(contacts)
+        kind: int = rnd.randrange(5)
+        if kind == 0 and contact['work_number']:
+            commands.append({'op': 'lookup', 'number': contact['work_number'][-4:], 'limit': 10})
+        elif kind == 1 and contact['surname']:
+            commands.append({'op': 'find', 'limit': 10, 'criteria': [
+                {'field': 'surname', 'value': contact['surname'][:3], 'mode': 'prefix'}
+            ]})
+        elif kind == 2 and len(contact['surname']) > 3:
+            commands.append({'op': 'find', 'limit': 10, 'criteria': [
+                {'field': 'surname', 'value': contact['surname'][:-1], 'mode': 'fuzzy'}
+            ]})
+        elif kind == 3:
+            commands.append({'op': 'get', 'id': contact['id']})
+        else:
+            commands.append({'op': 'list', 'offset': rnd.randrange(len(contacts)), 'limit': 10})
+    return commands
+
+
+async def worker(host: str, port: int, commands: List[Dict[str, Any]],
+                 latencies: List[float], errors: List[int]) -> None:
+    '''
+    Ф-ция одного клиента: по одному отправляет команды
+    и записывает время ожидания каждого ответа.
+    '''
+
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_LINE)
+    try:
+        for command in commands:
+            started: float = time.perf_counter()
+            response: Dict[str, Any] = await request(reader, writer, command)
+            latencies.append(time.perf_counter() - started)
+            if not response.get('ok'):
+                errors[0] += 1
+    finally:
+        writer.close()
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    '''
+    Ф-ция нагрузочного теста: получает образцы контактов,
+    запускает клиентов параллельно и считает результаты.
+    '''
+
+    # Образцы контактов для запросов
+    reader, writer = await asyncio.open_connection(args.host, args.port, limit=MAX_LINE)
+    sample: Dict[str, Any] = await request(reader, writer, {'op': 'list', 'offset': 0, 'limit': 1000})
+    writer.close()
+    contacts: List[Dict[str, str]] = sample['result']['contacts']
+    if not contacts:
+        raise SystemExit('В справочнике нет контактов для нагрузочного теста')
+
+    # Команды для каждого клиента
+    per_client: int = args.requests // args.connections
+    latencies: List[float] = list()
+    errors: List[int] = [0]
+
+    started: float = time.perf_counter()
+    await asyncio.gather(*(
+        worker(args.host, args.port, make_commands(contacts, per_client, seed), latencies, errors)
+        for seed in range(args.connections)
+    ))
+    elapsed: float = time.perf_counter() - started
+
+    # Итоги: пропускная способность и перцентили задержки
+    latencies.sort()
+
+    def percentile(share: float) -> float:
+        return round(latencies[min(int(len(latencies) * share), len(latencies) - 1)] * 1000, 2)
+
+    return {
+        'connections': args.connections,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+    }
+
+
+def main() -> None:
+    '''
+    Главная ф-ция, нагрузочный тест запущенного сервера
+    справочника (python main.py --serve).
+    '''
+
+    parser = argparse.ArgumentParser(description='Нагрузочный тест сервера справочника')
+    parser.add_argument('--host', default='127.0.0.1', help='адрес сервера')
+    parser.add_argument('--port', type=int, default=8765, help='порт сервера')
+    parser.add_argument('--connections', type=int, default=20, help='кол-во параллельных клиентов')
+    parser.add_argument('--requests', type=int, default=10_000, help='общее кол-во запросов')
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), ensure_ascii=False, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+from typing import Callable, Dict
+import argparse
+import json
+import tracemalloc
+
+from benchmarks.generator import generate_contacts
+from cl_contact import Contact
+
+
+def measure(text: str, convert: Callable[[Dict[str, str]], object]) -> int:
+    '''
+    Ф-ция загружает справочник из JSON-строки так же, как это
+    делает PhoneBook, приводит контакты к переданному представлению
+    и возвращает объем памяти, который занимают загруженные данные.
+    '''
+
+    tracemalloc.start()
+    data: Dict[str, object] = {
+        key: convert(value) for key, value in json.loads(text).items()
+    }
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return size
+
+
+def main() -> None:
+    '''
+    Главная ф-ция, сравнивает расход памяти на один контакт при
+    хранении словарями и объектами Contact на синтетическом справочнике.
+    '''
+
+    parser = argparse.ArgumentParser(description='Замер памяти на один контакт')
+    parser.add_argument('count', type=int, nargs='?', default=200_000, help='кол-во контактов')
+    args = parser.parse_args()
+
+    # Генерация справочника и его сериализация, как в data/contacts.json
+    text: str = json.dumps(dict(generate_contacts(args.count)), ensure_ascii=False)
+
+    # Замер обоих представлений
+    dict_size: int = measure(text, lambda value: value)
+    slots_size: int = measure(text, Contact.from_dict)
+    print(json.dumps({
+        'contacts': args.count,
+        'dict_bytes_per_contact': round(dict_size / args.count, 1),
+        'contact_bytes_per_contact': round(slots_size / args.count, 1),
+        'saved_percent': round(100 * (1 - slots_size / dict_size), 1)
+    }, ensure_ascii=False, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+from typing import Hashable, List, Optional, Tuple
+from collections import OrderedDict
+
+
+class QueryCache:
+    '''
+    Класс ограниченного кэша результатов поиска: хранит
+    недавно использованные результаты (LRU) по ключу
+    нормализованного условия (см. Query.key).
+
+    Вместе с результатом хранится версия данных хранилища
+    на момент поиска (см. BaseStorage.generation): если
+    версия изменилась, результат считается устаревшим
+    и удаляется, поэтому кэш никогда не возвращает
+    результат, не соответствующий текущим данным.
+
+    Размер кэша ограничен кол-вом результатов и общим
+    кол-вом идентификаторов в них, первыми вытесняются
+    давно не использованные результаты.
+    '''
+
+    def __init__(self, max_entries: int = 128, max_ids: int = 1_000_000) -> None:
+        # Результаты в порядке использования (последний - самый
+        # недавний), пороги размера и текущее кол-во идентификаторов
+        self.__entries: OrderedDict[Hashable, Tuple[int, Tuple[str, ...]]] = OrderedDict()
+        self.__max_entries: int = max_entries
+        self.__max_ids: int = max_ids
+        self.__ids: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable, generation: int) -> Optional[Tuple[str, ...]]:
+        '''
+        Метод возвращает сохраненный результат или None,
+        если его нет или он получен для другой версии данных.
+        '''
+
+        entry: Optional[Tuple[int, Tuple[str, ...]]] = self.__entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] != generation:
+            self.__discard(key)
+            return None
+        self.__entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, generation: int, ids: List[str]) -> None:
+        '''
+        Метод для сохранения результата поиска для версии
+        данных generation. Результат больше общего порога
+        не сохраняется, давно не использованные результаты
+        вытесняются.
+        '''
+
+        if len(ids) > self.__max_ids:
+            return
+        self.__discard(key)
+        self.__entries[key] = (generation, tuple(ids))
+        self.__ids += len(ids)
+
+        # Вытеснение давно не использованных результатов
+        while len(self.__entries) > self.__max_entries or self.__ids > self.__max_ids:
+            _, (_, evicted) = self.__entries.popitem(last=False)
+            self.__ids -= len(evicted)
+
+    def clear(self) -> None:
+        '''
+        Метод для очистки кэша.
+        '''
+
+        self.__entries.clear()
+        self.__ids = 0
+
+    def __discard(self, key: Hashable) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Удаляет результат (если он есть).
+        '''
+
+        entry: Optional[Tuple[int, Tuple[str, ...]]] = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__ids -= len(entry[1])
@@ -0,0 +1,101 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import sys
+
+
+# Характеристики контакта в порядке их хранения
+FIELDS: Tuple[str, ...] = (
+    'name', 'surname', 'desperation', 'organization', 'work_number', 'personal_number'
+)
+
+
+class Contact:
+    '''
+    Класс компактного представления данных контакта.
+    Вместо отдельного словаря на каждый контакт, в котором
+    повторяются одни и те же шесть ключей, значения хранятся
+    в слотах (__slots__), а сами строки интернируются, поэтому
+    одинаковые значения (например организация) хранятся
+    в памяти один раз на весь справочник.
+
+    Поддерживает обращение как к словарю (get, [], items),
+    поэтому методы PhoneBook работают с ним без изменений.
+    '''
+
+    __slots__ = FIELDS
+
+    def __init__(self, **values: str) -> None:
+        # Заполнение всех характеристик, отсутствующие - пустая строка
+        for field in FIELDS:
+            setattr(self, field, sys.intern(values.get(field, '')))
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, str]) -> 'Contact':
+        '''
+        Метод для создания контакта из словаря (например из JSON).
+        Ключи, не относящиеся к характеристикам, отбрасываются.
+        '''
+
+        return cls(**{field: record.get(field, '') for field in FIELDS})
+
+    @classmethod
+    def from_values(cls, values: Iterable[str]) -> 'Contact':
+        '''
+        Метод для создания контакта из значений характеристик
+        в порядке FIELDS (например из строк частей данных,
+        см. sharding). Значения записываются в слоты напрямую,
+        без промежуточного словаря, что заметно быстрее
+        при загрузке большого справочника.
+        '''
+
+        contact: Contact = cls.__new__(cls)
+        for setter, value in zip(_SETTERS, values):
+            setter(contact, sys.intern(value))
+        return contact
+
+    def to_dict(self) -> Dict[str, str]:
+        '''
+        Метод для преобразования контакта в словарь для записи в файл.
+        '''
+
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def get(self, field: str, default: str = None) -> str:
+        if field in FIELDS:
+            return getattr(self, field)
+        return default
+
+    def keys(self) -> Tuple[str, ...]:
+        return FIELDS
+
+    def items(self) -> List[Tuple[str, str]]:
+        return [(field, getattr(self, field)) for field in FIELDS]
+
+    def __getitem__(self, field: str) -> str:
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __setitem__(self, field: str, value: str) -> None:
+        if field not in FIELDS:
+            raise KeyError(field)
+        setattr(self, field, sys.intern(value))
+
+    def __contains__(self, field: str) -> bool:
+        return field in FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Contact):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def __repr__(self) -> str:
+        return f'Contact({self.to_dict()!r})'
+
+
+# Ф-ции записи слотов контакта в порядке FIELDS (см. Contact.from_values)
+_SETTERS: Tuple[Callable[[Any, str], None], ...] = tuple(
+    getattr(Contact, field).__set__ for field in FIELDS
+)
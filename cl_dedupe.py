@@ -0,0 +1,200 @@
+from typing import Dict, Iterable, List, Set, Tuple
+
+from cl_contact import Contact, FIELDS
+from cl_index import NUMBER_DIGITS, PHONE_FIELDS, canonical_number, number_tail
+
+
+# Минимальное кол-во цифр номера, по которому контакты
+# считаются возможными дубликатами (короткие номера
+# вроде "000" не отличают одного человека от другого)
+MIN_NUMBER: int = 5
+
+# Наибольшее кол-во контактов с одним ключом: ключ, который
+# есть у большего кол-ва контактов (например общий номер
+# организации или частое имя), не считается признаком дубликата
+MAX_BLOCK: int = 50
+
+
+class DisjointSets:
+    '''
+    Класс системы непересекающихся множеств (union-find).
+    Объединяет идентификаторы контактов в группы возможных
+    дубликатов: если два контакта связаны общим ключом,
+    их группы сливаются. Операции выполняются почти
+    за постоянное время (сжатие путей и объединение
+    по размеру), поэтому группировка всего справочника
+    занимает время, близкое к линейному.
+    '''
+
+    def __init__(self) -> None:
+        # Родитель каждого элемента и размер множества
+        # для корневых элементов
+        self.__parent: Dict[str, str] = dict()
+        self.__size: Dict[str, int] = dict()
+
+    def find(self, item: str) -> str:
+        '''
+        Метод возвращает корневой элемент множества,
+        в которое входит item (новый элемент образует
+        собственное множество).
+        '''
+
+        parent: Dict[str, str] = self.__parent
+        if item not in parent:
+            parent[item] = item
+            self.__size[item] = 1
+            return item
+
+        # Подъем к корню с сокращением пути вдвое
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: str, second: str) -> None:
+        '''
+        Метод для объединения множеств двух элементов,
+        меньшее множество присоединяется к большему.
+        '''
+
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return
+        if self.__size[first] < self.__size[second]:
+            first, second = second, first
+        self.__parent[second] = first
+        self.__size[first] += self.__size.pop(second)
+
+    def groups(self) -> List[List[str]]:
+        '''
+        Метод возвращает множества из двух и более элементов.
+        '''
+
+        groups: Dict[str, List[str]] = dict()
+        for item in self.__parent:
+            groups.setdefault(self.find(item), list()).append(item)
+        return [group for group in groups.values() if len(group) > 1]
+
+
+def number_key(value: str) -> str:
+    '''
+    Ф-ция приводит номер телефона к виду для сравнения:
+    последние NUMBER_DIGITS цифр номера, пустая строка,
+    если номер короче MIN_NUMBER цифр.
+    '''
+
+    return number_tail(value) if len(canonical_number(value)) >= MIN_NUMBER else ''
+
+
+def name_key(contact: Contact) -> str:
+    '''
+    Ф-ция возвращает ключ имени контакта: имя и фамилия
+    без учета регистра, "ё" и порядка (на случай, если
+    они были перепутаны при вводе). Если имя или фамилия
+    не заполнены, возвращается пустая строка - одно имя
+    (например "Аноним") не указывает на конкретного человека.
+    '''
+
+    parts: List[str] = [
+        ' '.join(contact.get(field, '').casefold().replace('ё', 'е').split())
+        for field in ('name', 'surname')
+    ]
+    if not all(parts):
+        return ''
+    return '\t'.join(sorted(parts))
+
+
+def blocking_keys(contact: Contact) -> Set[Tuple[str, str]]:
+    '''
+    Ф-ция возвращает ключи контакта, по которым он
+    попадает в одни блоки с возможными дубликатами:
+    номера телефонов и ключ имени.
+    '''
+
+    keys: Set[Tuple[str, str]] = set()
+    for field in PHONE_FIELDS:
+        number: str = number_key(contact.get(field, ''))
+        if number:
+            keys.add(('number', number))
+    name: str = name_key(contact)
+    if name:
+        keys.add(('name', name))
+    return keys
+
+
+def find_duplicates(items: Iterable[Tuple[str, Contact]], max_block: int = MAX_BLOCK) -> List[List[str]]:
+    '''
+    Ф-ция для поиска групп возможных дубликатов.
+    Вместо сравнения каждой пары контактов, контакты
+    за один проход раскладываются по блокам (словарь
+    "ключ - идентификаторы", см. blocking_keys), а контакты
+    одного блока объединяются в группу (DisjointSets).
+    Блоки больше max_block пропускаются.
+
+    Возвращает группы идентификаторов: в начале группы
+    контакт с наибольшим кол-вом заполненных характеристик,
+    группы упорядочены по убыванию размера.
+    '''
+
+    # Раскладывание контактов по блокам с запоминанием
+    # кол-ва заполненных характеристик
+    blocks: Dict[Tuple[str, str], List[str]] = dict()
+    filled: Dict[str, int] = dict()
+    for contact_id, contact in items:
+        keys: Set[Tuple[str, str]] = blocking_keys(contact)
+        if not keys:
+            continue
+        filled[contact_id] = sum(1 for field in FIELDS if contact.get(field, ''))
+        for key in keys:
+            blocks.setdefault(key, list()).append(contact_id)
+
+    # Объединение контактов каждого блока в одну группу
+    sets: DisjointSets = DisjointSets()
+    for ids in blocks.values():
+        if 1 < len(ids) <= max_block:
+            for contact_id in ids[1:]:
+                sets.union(ids[0], contact_id)
+
+    groups: List[List[str]] = [
+        sorted(group, key=lambda elem: (-filled[elem], len(elem), elem)) for group in sets.groups()
+    ]
+    groups.sort(key=lambda group: (-len(group), len(group[0]), group[0]))
+    return groups
+
+
+def merge_contacts(contacts: List[Contact]) -> Dict[str, str]:
+    '''
+    Ф-ция возвращает характеристики объединенного контакта.
+    Берутся характеристики первого контакта, пустые
+    заполняются значениями следующих. Номера телефонов
+    остальных контактов, которых нет у первого (с учетом
+    кода страны), записываются в пустые характеристики
+    номеров, в первую очередь - в ту же характеристику.
+    '''
+
+    merged: Dict[str, str] = {field: '' for field in FIELDS}
+    for contact in contacts:
+        for field in FIELDS:
+            if field not in PHONE_FIELDS and not merged[field]:
+                merged[field] = contact.get(field, '')
+
+    # Номера первого контакта остаются на своих местах
+    known: Set[str] = set()
+    for field in PHONE_FIELDS:
+        merged[field] = contacts[0].get(field, '')
+        if merged[field]:
+            known.add(number_key(merged[field]) or merged[field])
+
+    # Перенос новых номеров остальных контактов
+    for contact in contacts[1:]:
+        for field in PHONE_FIELDS:
+            value: str = contact.get(field, '')
+            key: str = number_key(value) or value
+            if not value or key in known:
+                continue
+            for empty in (field,) + PHONE_FIELDS:
+                if not merged[empty]:
+                    merged[empty] = value
+                    known.add(key)
+                    break
+    return merged
@@ -0,0 +1,169 @@
+from typing import BinaryIO, Callable, ContextManager, Iterator, Optional, TextIO, Tuple
+from contextlib import contextmanager
+import threading
+import os
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    '''
+    Класс рекомендательной (advisory) блокировки данных,
+    через которую согласуют работу несколько процессов
+    (и потоков одного процесса), открывших одно хранилище:
+    - shared - совместная блокировка для чтения данных,
+      читатели не мешают друг другу;
+    - exclusive - исключительная блокировка для изменения данных.
+
+    Блокируется отдельный файл "*.lock" рядом с данными
+    (fcntl.flock, в Windows - msvcrt.locking, где совместная
+    блокировка работает как исключительная). Блокировки
+    могут быть вложенными: внутри исключительной можно
+    взять совместную, но не наоборот.
+    '''
+
+    def __init__(self, path: str) -> None:
+        # Путь к файлу блокировки, открытый файл (открывается
+        # при первой блокировке), блокировка для потоков процесса,
+        # глубина вложенности и вид текущей блокировки
+        self.__path: str = path
+        self.__file: Optional[BinaryIO] = None
+        self.__thread_lock: threading.RLock = threading.RLock()
+        self.__depth: int = 0
+        self.__exclusive: bool = False
+
+    def shared(self) -> ContextManager[None]:
+        '''
+        Метод возвращает контекстный менеджер
+        совместной блокировки (для чтения данных).
+        '''
+
+        return self.__hold(False)
+
+    def exclusive(self) -> ContextManager[None]:
+        '''
+        Метод возвращает контекстный менеджер
+        исключительной блокировки (для изменения данных).
+        '''
+
+        return self.__hold(True)
+
+    def close(self) -> None:
+        '''
+        Метод для закрытия файла блокировки.
+        '''
+
+        with self.__thread_lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    @contextmanager
+    def __hold(self, exclusive: bool) -> Iterator[None]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Берет блокировку файла при входе в первый
+        (внешний) блок и снимает при выходе из него.
+        '''
+
+        with self.__thread_lock:
+            if self.__depth == 0:
+                self.__acquire(exclusive)
+            elif exclusive and not self.__exclusive:
+                raise RuntimeError('Исключительную блокировку нельзя взять внутри совместной')
+            self.__depth += 1
+            try:
+                yield
+            finally:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    self.__release()
+
+    def __acquire(self, exclusive: bool) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Открывает файл блокировки (если нужно) и ждет
+        получения блокировки.
+        '''
+
+        if self.__file is None:
+            directory: str = os.path.dirname(self.__path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.__file = open(self.__path, 'a+b')
+
+        if os.name == 'nt':
+            # LK_LOCK делает 10 попыток раз в секунду и
+            # выбрасывает ошибку, ожидание продолжается
+            self.__file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.__file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self.__exclusive = exclusive
+
+    def __release(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Снимает блокировку файла.
+        '''
+
+        if os.name == 'nt':
+            self.__file.seek(0)
+            msvcrt.locking(self.__file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+
+
+def file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    '''
+    Ф-ция возвращает отметку состояния файла (inode, время
+    изменения в наносекундах и размер) или None, если файла нет.
+    По изменению отметки процесс узнает, что файл
+    изменил или подменил другой процесс.
+    '''
+
+    try:
+        stat: os.stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def write_temp(path: str, write: Callable[[TextIO], None]) -> str:
+    '''
+    Ф-ция записывает данные через ф-цию write во временный
+    файл рядом с path (имя уникально для процесса и потока)
+    и сбрасывает его на диск. Возвращает путь к временному файлу,
+    которым затем атомарно подменяется основной (os.replace).
+    '''
+
+    temp_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as temp:
+            write(temp)
+            temp.flush()
+            os.fsync(temp.fileno())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def write_file(path: str, write: Callable[[TextIO], None]) -> None:
+    '''
+    Ф-ция для атомарной записи файла: данные пишутся
+    во временный файл, которым подменяется основной.
+    Другие процессы видят либо старый, либо новый файл
+    целиком, но не частично записанный.
+    '''
+
+    os.replace(write_temp(path, write), path)
@@ -0,0 +1,58 @@
+from typing import Callable, List
+
+
+class IdAllocator:
+    '''
+    Класс для выдачи уникальных идентификаторов контактов.
+    Идентификаторы - монотонно возрастающие числа, которые
+    резервируются блоками: хранилище один раз на блок сохраняет
+    вместе с данными границу выданных идентификаторов, а внутри
+    блока идентификаторы выдаются из памяти за константное время,
+    независимо от размера справочника.
+
+    Идентификаторы блока, не выданные до завершения программы,
+    пропускаются, поэтому повторно идентификаторы не выдаются.
+    '''
+
+    def __init__(self, reserve: Callable[[int], int], block_size: int = 1000) -> None:
+        # Ф-ция резервирования блока: принимает размер блока,
+        # сохраняет новую границу и возвращает начало блока
+        self.__reserve: Callable[[int], int] = reserve
+        self.__block_size: int = block_size
+
+        # Следующий свободный идентификатор и граница текущего блока
+        self.__next: int = 0
+        self.__limit: int = 0
+
+    def allocate(self, count: int = 1) -> List[str]:
+        '''
+        Метод для выдачи переданного кол-ва идентификаторов.
+        Для больших пачек (например при импорте) резервируется
+        блок, вмещающий всю пачку.
+        '''
+
+        result: List[str] = list()
+        while count > 0:
+
+            # Резервирование нового блока, если текущий исчерпан
+            if self.__next >= self.__limit:
+                size: int = max(self.__block_size, count)
+                self.__next = self.__reserve(size)
+                self.__limit = self.__next + size
+
+            # Выдача идентификаторов из текущего блока
+            taken: int = min(count, self.__limit - self.__next)
+            result.extend(str(elem) for elem in range(self.__next, self.__next + taken))
+            self.__next += taken
+            count -= taken
+        return result
+
+    def reset(self) -> None:
+        '''
+        Метод для сброса текущего блока, например если
+        резервирование блока отменено вместе с транзакцией.
+        Следующий идентификатор будет выдан из нового блока.
+        '''
+
+        self.__next = 0
+        self.__limit = 0
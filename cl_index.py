@@ -0,0 +1,779 @@
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, islice
+
+
+# Режимы поиска по характеристике
+EXACT: str = 'exact'
+PREFIX: str = 'prefix'
+SUBSTRING: str = 'substring'
+FUZZY: str = 'fuzzy'
+
+# Длина n-грамм в индексе для поиска по части значения
+GRAM_SIZE: int = 3
+
+# Характеристики, которые хранят номера телефонов, и минимальное
+# кол-во последних цифр номера для поиска владельца по окончанию номера
+PHONE_FIELDS: Tuple[str, ...] = ('work_number', 'personal_number')
+MIN_SUFFIX: int = 4
+
+# Кол-во последних цифр, по которым сравниваются номера
+# (код страны "8" или "+7" отбрасывается)
+NUMBER_DIGITS: int = 10
+
+# Характеристики, по которым доступен нечеткий поиск (с опечатками)
+FUZZY_FIELDS: Tuple[str, ...] = ('name', 'surname', 'organization')
+
+
+def canonical_number(value: str) -> str:
+    '''
+    Ф-ция приводит номер телефона к каноническому виду -
+    строке из одних цифр, например "111-11-11" -> "1111111".
+    '''
+
+    return ''.join(char for char in value if char.isdigit())
+
+
+def number_tail(value: str) -> str:
+    '''
+    Ф-ция приводит номер телефона к виду для сравнения:
+    последние NUMBER_DIGITS цифр, поэтому "8 495 123-45-67"
+    и "+7 495 1234567" считаются одним номером.
+    '''
+
+    return canonical_number(value)[-NUMBER_DIGITS:]
+
+
+def format_number(value: str) -> str:
+    '''
+    Ф-ция для вывода номера телефона в привычном виде,
+    последние 7 цифр группируются как "111-11-11",
+    остальные цифры (код) выводятся перед ними через пробел.
+    Короткие номера выводятся как есть.
+    '''
+
+    digits: str = canonical_number(value)
+    if len(digits) < 5:
+        return value
+    number: str = f'{digits[-7:-4]}-{digits[-4:-2]}-{digits[-2:]}'.lstrip('-')
+    return f'{digits[:-7]} {number}' if len(digits) > 7 else number
+
+
+def normalize(value: str, field: str = None) -> str:
+    '''
+    Ф-ция приводит значение характеристики к единому виду,
+    в котором оно хранится в индексах и сравнивается при поиске.
+    Номера телефонов приводятся к каноническому виду.
+    '''
+
+    if field in PHONE_FIELDS:
+        return canonical_number(value)
+    return value.casefold()
+
+
+def empty_number(field: str, key: str) -> bool:
+    '''
+    Ф-ция проверяет, что запрос по номеру телефона
+    не содержит цифр (например "abc"): в нормализованном
+    виде это пустая строка, с которой начинается любой
+    номер, поэтому такому запросу не подходит ни один контакт.
+    '''
+
+    return field in PHONE_FIELDS and not key
+
+
+def grams(value: str) -> Set[str]:
+    '''
+    Ф-ция возвращает множество n-грамм (подстрок длины GRAM_SIZE)
+    нормализованного значения.
+    '''
+
+    return {value[pos:pos + GRAM_SIZE] for pos in range(len(value) - GRAM_SIZE + 1)}
+
+
+def fuzzy_grams(value: str) -> Set[str]:
+    '''
+    Ф-ция возвращает множество n-грамм значения, дополненного
+    пробелами с обеих сторон, чтобы начало и конец значения
+    (а так же короткие значения) тоже давали n-граммы.
+    '''
+
+    padding: str = ' ' * (GRAM_SIZE - 1)
+    return grams(f'{padding}{value}{padding}')
+
+
+def fuzzy_limit(value: str) -> int:
+    '''
+    Ф-ция возвращает допустимое кол-во опечаток
+    для нормализованного значения нечеткого поиска:
+    для коротких значений опечатки не допускаются.
+    '''
+
+    if len(value) <= 2:
+        return 0
+    if len(value) <= 5:
+        return 1
+    return 2
+
+
+def fuzzy_threshold(value: str) -> int:
+    '''
+    Ф-ция возвращает минимальное кол-во общих n-грамм
+    (fuzzy_grams) у значения и запроса, которые отличаются
+    не более чем на fuzzy_limit опечаток: одна опечатка
+    затрагивает не более GRAM_SIZE n-грамм.
+    '''
+
+    return len(fuzzy_grams(value)) - fuzzy_limit(value) * GRAM_SIZE
+
+
+def edit_distance(first: str, second: str, limit: int) -> int:
+    '''
+    Ф-ция возвращает расстояние Левенштейна между строками
+    (кол-во вставок, удалений и замен символов). Если оно
+    больше limit, подсчет прерывается и возвращается limit + 1.
+    '''
+
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+
+    # Построчный подсчет, хранится только предыдущая строка таблицы
+    previous: List[int] = list(range(len(second) + 1))
+    for row, char in enumerate(first, start=1):
+        current: List[int] = [row]
+        for col, other in enumerate(second, start=1):
+            current.append(min(
+                previous[col] + 1, current[col - 1] + 1, previous[col - 1] + (char != other)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class ContactIndex:
+    '''
+    Класс инвертированных индексов по характеристикам контактов.
+    Для каждой характеристики хранится словарь вида
+    "нормализованное значение -> множество идентификаторов",
+    поэтому поиск по точному совпадению не требует
+    перебора всех контактов.
+
+    Для поиска по началу значения по каждой характеристике
+    хранится отсортированный список различных значений,
+    разбитый на блоки (SortedList), поэтому новое значение
+    добавляется за O(log n), а диапазон подходящих значений
+    находится бинарным поиском.
+    Для поиска по части значения хранится индекс n-грамм
+    вида "n-грамма -> множество значений", кандидаты
+    находятся пересечением множеств для всех n-грамм запроса.
+
+    Для определения владельца номера хранится обратный индекс
+    "канонический номер -> множество идентификаторов" по обоим
+    телефонным характеристикам, а так же индекс по окончаниям
+    номеров (от MIN_SUFFIX последних цифр), поэтому оба вида
+    поиска выполняются за константное время.
+
+    Для нечеткого поиска по FUZZY_FIELDS хранится индекс
+    дополненных n-грамм (fuzzy_grams) вида "n-грамма -> множество
+    значений": расстояние Левенштейна считается только для
+    значений, у которых достаточно общих с запросом n-грамм.
+
+    Индексы строятся один раз при загрузке данных и далее
+    обновляются при добавлении, изменении и удалении контактов.
+    '''
+
+    def __init__(self, fields: List[str]) -> None:
+        # Создание пустых индексов для каждой характеристики
+        self.__postings: Dict[str, Dict[str, Set[str]]] = {
+            field: dict() for field in fields
+        }
+        self.__sorted_values: Dict[str, SortedList] = {
+            field: SortedList() for field in fields
+        }
+        self.__grams: Dict[str, Dict[str, Set[str]]] = {
+            field: dict() for field in fields
+        }
+        self.__fuzzy: Dict[str, Dict[str, Set[str]]] = {
+            field: dict() for field in fields if field in FUZZY_FIELDS
+        }
+        # В обратных индексах номеров для каждого идентификатора хранится
+        # кол-во его номеров с таким значением (окончанием), т.к. оба
+        # телефона контакта могут совпадать или иметь общее окончание
+        self.__numbers: Dict[str, Dict[str, int]] = dict()
+        self.__suffixes: Dict[str, Dict[str, int]] = dict()
+
+        # Кол-во проиндексированных контактов для оценки
+        # размера результата поиска (см. estimate)
+        self.__count: int = 0
+
+    def build(self, items: Iterable[Tuple[str, Dict[str, str]]]) -> None:
+        '''
+        Метод для построения индексов с нуля.
+        На вход принимает пары "идентификатор - данные контакта".
+        '''
+
+        # Очистка индексов
+        for field in self.__postings:
+            self.__postings[field].clear()
+            self.__grams[field].clear()
+        for index in self.__fuzzy.values():
+            index.clear()
+        self.__numbers.clear()
+        self.__suffixes.clear()
+        self.__count = 0
+
+        # Добавление всех контактов без поддержания порядка
+        # значений, списки сортируются один раз в конце
+        for contact_id, record in items:
+            self.__count += 1
+            for field in self.__postings:
+                self.__insert(field, record.get(field, ''), contact_id, keep_sorted=False)
+        for field, postings in self.__postings.items():
+            self.__sorted_values[field] = SortedList(postings)
+
+    def add(self, contact_id: str, record: Dict[str, str]) -> None:
+        '''
+        Метод для добавления контакта во все индексы.
+        '''
+
+        self.__count += 1
+        for field in self.__postings:
+            self.__insert(field, record.get(field, ''), contact_id)
+
+    def remove(self, contact_id: str, record: Dict[str, str]) -> None:
+        '''
+        Метод для удаления контакта из всех индексов.
+        На вход принимает данные контакта в том виде,
+        в котором они были добавлены в индекс.
+        '''
+
+        self.__count -= 1
+        for field in self.__postings:
+            self.__discard(field, record.get(field, ''), contact_id)
+
+    def update(self, contact_id: str, field: str, old_value: str, new_value: str) -> None:
+        '''
+        Метод для обновления индекса одной характеристики
+        при изменении ее значения у контакта.
+        '''
+
+        self.__discard(field, old_value, contact_id)
+        self.__insert(field, new_value, contact_id)
+
+    def find(self, field: str, value: str, mode: str = EXACT) -> Set[str]:
+        '''
+        Метод для поиска контактов по значению характеристики
+        без учета регистра. Режимы поиска:
+        - EXACT - значение совпадает с переданным;
+        - PREFIX - значение начинается с переданного;
+        - SUBSTRING - значение содержит переданное;
+        - FUZZY - значение отличается от переданного не более
+          чем на fuzzy_limit опечаток (только для FUZZY_FIELDS).
+        Возвращает множество идентификаторов.
+        '''
+
+        key: str = normalize(value, field)
+        postings: Dict[str, Set[str]] = self.__postings[field]
+        if empty_number(field, key):
+            return set()
+
+        # Точное совпадение - одно обращение к словарю
+        if mode == EXACT:
+            return set(postings.get(key, ()))
+
+        # Нечеткий поиск - объединение множеств для похожих значений
+        if mode == FUZZY:
+            result: Set[str] = set()
+            for matched, _ in self.similar(field, value):
+                result.update(postings[matched])
+            return result
+
+        # Объединение множеств идентификаторов для всех подходящих значений
+        result = set()
+        for matched in self.__match_values(field, key, mode):
+            result.update(postings[matched])
+        return result
+
+    def estimate(self, field: str, value: str, mode: str = EXACT) -> int:
+        '''
+        Метод для оценки кол-ва контактов, которые найдет
+        поиск с такими параметрами, без выполнения поиска.
+        Для точного совпадения оценка точная, для остальных
+        режимов - кол-во подходящих различных значений (или
+        верхняя граница по самой редкой n-грамме), умноженное
+        на среднее кол-во контактов на одно значение.
+        '''
+
+        key: str = normalize(value, field)
+        postings: Dict[str, Set[str]] = self.__postings[field]
+        if empty_number(field, key):
+            return 0
+        if mode == EXACT:
+            return len(postings.get(key, ()))
+
+        # Похожих значений немного, поэтому оценка - точный размер
+        if mode == FUZZY:
+            return sum(len(postings[matched]) for matched, _ in self.similar(field, value))
+
+        # Кол-во подходящих различных значений
+        if mode == PREFIX:
+            values: SortedList = self.__sorted_values[field]
+            matched: int = values.bisect_left(key + '\U0010ffff') - values.bisect_left(key)
+        elif mode == SUBSTRING:
+            if len(key) < GRAM_SIZE:
+                return self.__count
+            index: Dict[str, Set[str]] = self.__grams[field]
+            matched = min(len(index.get(gram, ())) for gram in grams(key))
+        else:
+            raise ValueError(f'Неизвестный режим поиска: {mode}')
+
+        # Перевод кол-ва значений в кол-во контактов
+        if not matched:
+            return 0
+        return max(1, matched * self.__count // len(postings))
+
+    def similar(self, field: str, value: str) -> List[Tuple[str, int]]:
+        '''
+        Метод для нечеткого поиска различных значений
+        характеристики из FUZZY_FIELDS. Кандидаты - значения,
+        у которых не меньше fuzzy_threshold общих с запросом
+        n-грамм, для них считается расстояние Левенштейна.
+        Возвращает пары "нормализованное значение - кол-во
+        опечаток", отсортированные по кол-ву опечаток.
+        '''
+
+        if field not in self.__fuzzy:
+            raise ValueError(f'Нечеткий поиск по характеристике {field} недоступен')
+        key: str = normalize(value, field)
+        limit: int = fuzzy_limit(key)
+        threshold: int = fuzzy_threshold(key)
+
+        # Подсчет общих n-грамм у значений, если порог не задан
+        # (запрос из повторяющихся символов), проверяются все значения
+        if threshold > 0:
+            index: Dict[str, Set[str]] = self.__fuzzy[field]
+            counts: Dict[str, int] = dict()
+            for gram in fuzzy_grams(key):
+                for candidate in index.get(gram, ()):
+                    counts[candidate] = counts.get(candidate, 0) + 1
+            candidates: Iterable[str] = [
+                candidate for candidate, count in counts.items() if count >= threshold
+            ]
+        else:
+            candidates = self.__postings[field]
+
+        # Проверка кандидатов по расстоянию Левенштейна
+        result: List[Tuple[str, int]] = list()
+        for candidate in candidates:
+            distance: int = edit_distance(key, candidate, limit)
+            if distance <= limit:
+                result.append((candidate, distance))
+        result.sort(key=lambda elem: (elem[1], elem[0]))
+        return result
+
+    def __match_values(self, field: str, key: str, mode: str) -> Iterable[str]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает различные значения характеристики,
+        подходящие под запрос в режиме PREFIX или SUBSTRING.
+        '''
+
+        if mode == PREFIX:
+
+            # Значения с общим началом идут в отсортированном
+            # списке подряд, начиная с позиции бинарного поиска
+            values: SortedList = self.__sorted_values[field]
+            matched: List[str] = list()
+            for elem in values.irange(values.bisect_left(key)):
+                if not elem.startswith(key):
+                    break
+                matched.append(elem)
+            return matched
+
+        if mode == SUBSTRING:
+
+            # Для запросов короче n-граммы индекс не применим,
+            # перебираются только различные значения характеристики
+            if len(key) < GRAM_SIZE:
+                return [elem for elem in self.__postings[field] if key in elem]
+
+            # Пересечение множеств значений для всех n-грамм запроса,
+            # начиная с самого маленького, и проверка кандидатов
+            index: Dict[str, Set[str]] = self.__grams[field]
+            sets: List[Set[str]] = sorted(
+                (index.get(gram, set()) for gram in grams(key)), key=len
+            )
+            candidates: Set[str] = set(sets[0])
+            for elem in sets[1:]:
+                if not candidates:
+                    break
+                candidates &= elem
+            return [elem for elem in candidates if key in elem]
+
+        raise ValueError(f'Неизвестный режим поиска: {mode}')
+
+    def lookup_number(self, number: str) -> Set[str]:
+        '''
+        Метод для определения владельцев номера телефона.
+        Ищет номер в обеих телефонных характеристиках,
+        номер может быть передан в любом формате. Кроме полного
+        совпадения находит номера, которые оканчиваются на
+        переданные цифры (например без кода города). Номера
+        сравниваются по последним NUMBER_DIGITS цифрам (см.
+        number_tail), как при поиске дубликатов, поэтому код
+        страны ("8" или "+7") не учитывается.
+        Возвращает множество идентификаторов.
+        '''
+
+        digits: str = number_tail(number)
+        if not digits:
+            return set()
+        return set(self.__numbers.get(digits, ())) | set(self.__suffixes.get(digits, ()))
+
+    def __insert(self, field: str, value: str, contact_id: str, keep_sorted: bool = True) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Добавляет идентификатор в индекс характеристики,
+        новое значение так же попадает в отсортированный
+        массив значений и индекс n-грамм.
+        '''
+
+        key: str = normalize(value, field)
+        ids: Set[str] = self.__postings[field].get(key)
+
+        # Регистрация номера телефона в обратных индексах
+        if field in PHONE_FIELDS and key:
+            self.__count_number(self.__numbers, key, contact_id, 1)
+            for pos in range(1, len(key) - MIN_SUFFIX + 1):
+                self.__count_number(self.__suffixes, key[pos:], contact_id, 1)
+
+        # Если значение уже встречалось, достаточно добавить идентификатор
+        if ids is not None:
+            ids.add(contact_id)
+            return
+
+        # Регистрация нового значения во всех индексах характеристики
+        self.__postings[field][key] = {contact_id}
+        if keep_sorted:
+            self.__sorted_values[field].add(key)
+        for gram in grams(key):
+            self.__grams[field].setdefault(gram, set()).add(key)
+        if field in self.__fuzzy:
+            for gram in fuzzy_grams(key):
+                self.__fuzzy[field].setdefault(gram, set()).add(key)
+
+    def __discard(self, field: str, value: str, contact_id: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Удаляет идентификатор из индекса характеристики,
+        пустые записи индексов удаляются целиком.
+        '''
+
+        key: str = normalize(value, field)
+        ids: Set[str] = self.__postings[field].get(key)
+        if ids is None:
+            return
+        ids.discard(contact_id)
+
+        # Удаление номера телефона из обратных индексов
+        if field in PHONE_FIELDS and key:
+            self.__count_number(self.__numbers, key, contact_id, -1)
+            for pos in range(1, len(key) - MIN_SUFFIX + 1):
+                self.__count_number(self.__suffixes, key[pos:], contact_id, -1)
+
+        # Если значение больше не встречается ни у одного
+        # контакта, оно удаляется из всех индексов характеристики
+        if not ids:
+            del self.__postings[field][key]
+            self.__sorted_values[field].remove(key)
+            for gram in grams(key):
+                gram_values: Set[str] = self.__grams[field][gram]
+                gram_values.discard(key)
+                if not gram_values:
+                    del self.__grams[field][gram]
+            if field in self.__fuzzy:
+                for gram in fuzzy_grams(key):
+                    gram_values = self.__fuzzy[field][gram]
+                    gram_values.discard(key)
+                    if not gram_values:
+                        del self.__fuzzy[field][gram]
+
+    @staticmethod
+    def __count_number(index: Dict[str, Dict[str, int]], key: str, contact_id: str, delta: int) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Изменяет кол-во номеров контакта в обратном индексе,
+        обнулившиеся записи удаляются.
+        '''
+
+        ids: Dict[str, int] = index.setdefault(key, dict())
+        count: int = ids.get(contact_id, 0) + delta
+        if count > 0:
+            ids[contact_id] = count
+        else:
+            ids.pop(contact_id, None)
+            if not ids:
+                del index[key]
+
+
+class SortedList:
+    '''
+    Класс отсортированного списка, разбитого на блоки.
+    Значения хранятся в нескольких отсортированных блоках
+    ограниченного размера и списке максимальных значений блоков,
+    поэтому вставка и удаление стоят O(log n) на поиск блока
+    и сдвиг элементов внутри одного небольшого блока, а не
+    пересортировку или сдвиг всего списка.
+
+    Для доступа по позиции хранятся смещения начала блоков,
+    которые пересчитываются только при первом обращении
+    после изменения списка.
+    '''
+
+    # Размер блока, при превышении которого вдвое блок делится пополам
+    __load: int = 1000
+
+    def __init__(self, values: Iterable = ()) -> None:
+        # Разбиение отсортированных значений на блоки
+        values = sorted(values)
+        self.__lists: List[List] = [
+            values[pos:pos + self.__load] for pos in range(0, len(values), self.__load)
+        ]
+        self.__maxes: List = [elem[-1] for elem in self.__lists]
+        self.__len: int = len(values)
+        self.__offsets: List[int] = None
+
+    def __len__(self) -> int:
+        return self.__len
+
+    def __iter__(self) -> Iterator:
+        for elem in self.__lists:
+            yield from elem
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[object, List]:
+        '''
+        Доступ к значению по позиции или к срезу значений,
+        срез стоит O(log n) на поиск начала и размер среза.
+        '''
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.__len)
+            if step != 1:
+                return list(self)[index]
+            return list(islice(self.irange(start), stop - start))
+
+        if index < 0:
+            index += self.__len
+        if not 0 <= index < self.__len:
+            raise IndexError('Индекс вне диапазона списка')
+        block, pos = self.__locate(index)
+        return self.__lists[block][pos]
+
+    def add(self, value) -> None:
+        '''
+        Метод для вставки значения с сохранением порядка.
+        '''
+
+        self.__len += 1
+        self.__offsets = None
+
+        # Первое значение образует первый блок
+        if not self.__maxes:
+            self.__lists.append([value])
+            self.__maxes.append(value)
+            return
+
+        # Поиск блока, значение больше всех - в последний блок
+        block: int = bisect_left(self.__maxes, value)
+        if block == len(self.__maxes):
+            block -= 1
+            self.__lists[block].append(value)
+            self.__maxes[block] = value
+        else:
+            insort(self.__lists[block], value)
+
+        # Деление разросшегося блока пополам
+        if len(self.__lists[block]) > 2 * self.__load:
+            half: List = self.__lists[block][self.__load:]
+            del self.__lists[block][self.__load:]
+            self.__maxes[block] = self.__lists[block][-1]
+            self.__lists.insert(block + 1, half)
+            self.__maxes.insert(block + 1, half[-1])
+
+    def remove(self, value) -> None:
+        '''
+        Метод для удаления значения, если значения
+        нет в списке, вызывается ValueError.
+        '''
+
+        block: int = bisect_left(self.__maxes, value)
+        if block == len(self.__maxes):
+            raise ValueError('Значение отсутствует в списке')
+        values: List = self.__lists[block]
+        pos: int = bisect_left(values, value)
+        if values[pos] != value:
+            raise ValueError('Значение отсутствует в списке')
+
+        self.__len -= 1
+        self.__offsets = None
+
+        # Удаление значения, опустевший блок удаляется целиком
+        del values[pos]
+        if values:
+            self.__maxes[block] = values[-1]
+        else:
+            del self.__lists[block]
+            del self.__maxes[block]
+
+    def bisect_left(self, value) -> int:
+        '''
+        Метод возвращает позицию, на которую
+        было бы вставлено переданное значение.
+        '''
+
+        block: int = bisect_left(self.__maxes, value)
+        if block == len(self.__maxes):
+            return self.__len
+        return self.__block_offsets()[block] + bisect_left(self.__lists[block], value)
+
+    def irange(self, start: int = 0) -> Iterator:
+        '''
+        Метод возвращает итератор по значениям,
+        начиная с переданной позиции.
+        '''
+
+        if start >= self.__len:
+            return
+        block, pos = self.__locate(max(start, 0))
+        yield from islice(self.__lists[block], pos, None)
+        for values in islice(self.__lists, block + 1, None):
+            yield from values
+
+    def __locate(self, index: int) -> Tuple[int, int]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Переводит позицию в списке в номер блока
+        и позицию внутри блока.
+        '''
+
+        offsets: List[int] = self.__block_offsets()
+        block: int = bisect_right(offsets, index) - 1
+        return block, index - offsets[block]
+
+    def __block_offsets(self) -> List[int]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает смещения начала блоков, при необходимости
+        пересчитывает их после изменения списка.
+        '''
+
+        if self.__offsets is None:
+            self.__offsets = list(accumulate((len(elem) for elem in self.__lists), initial=0))
+        return self.__offsets
+
+
+class SortedIndex:
+    '''
+    Класс индекса для упорядочивания контактов по имени.
+    Для каждого контакта один раз вычисляется ключ сортировки
+    (имя без учета регистра), а в отсортированном списке
+    хранятся пары "ключ - идентификатор", поэтому изменение
+    одного контакта стоит O(log n), а обход контактов по
+    порядку и упорядочивание результатов поиска не требуют
+    пересортировки всех данных.
+    '''
+
+    def __init__(self) -> None:
+        # Ключи сортировки контактов и отсортированный список пар
+        self.__keys: Dict[str, str] = dict()
+        self.__list: SortedList = SortedList()
+
+    def build(self, items: Iterable[Tuple[str, str]]) -> None:
+        '''
+        Метод для построения индекса с нуля.
+        На вход принимает пары "идентификатор - имя".
+        '''
+
+        self.__keys = {contact_id: normalize(name) for contact_id, name in items}
+        self.__list = SortedList(
+            (key, contact_id) for contact_id, key in self.__keys.items()
+        )
+
+    def add(self, contact_id: str, name: str) -> None:
+        '''
+        Метод для добавления контакта в индекс.
+        '''
+
+        self.__keys[contact_id] = normalize(name)
+        self.__list.add((self.__keys[contact_id], contact_id))
+
+    def remove(self, contact_id: str) -> None:
+        '''
+        Метод для удаления контакта из индекса.
+        '''
+
+        self.__list.remove((self.__keys.pop(contact_id), contact_id))
+
+    def update(self, contact_id: str, name: str) -> None:
+        '''
+        Метод для обновления индекса при изменении имени контакта.
+        '''
+
+        self.remove(contact_id)
+        self.add(contact_id, name)
+
+    def __len__(self) -> int:
+        return len(self.__list)
+
+    def __iter__(self) -> Iterator[str]:
+        return (contact_id for _, contact_id in self.__list)
+
+    def __getitem__(self, index: slice) -> List[str]:
+        '''
+        Срез идентификаторов по позициям в порядке имен,
+        стоит O(log n) на поиск начала и размер среза.
+        '''
+
+        return [contact_id for _, contact_id in self.__list[index]]
+
+    def position(self, prefix: str, ids: List[str] = None) -> int:
+        '''
+        Метод возвращает позицию первого контакта, имя которого
+        начинается с переданной строки (например с буквы),
+        или -1, если таких контактов нет.
+        Если передан упорядоченный по имени список идентификаторов
+        (например результаты поиска), позиция ищется в нем.
+        '''
+
+        key: str = normalize(prefix)
+
+        # Бинарный поиск по индексу или по переданному списку
+        if ids is None:
+            pos: int = self.__list.bisect_left((key, ''))
+            found: str = self.__list[pos][1] if pos < len(self.__list) else None
+        else:
+            pos: int = bisect_left(ids, (key, ''), key=lambda elem: (self.__keys[elem], elem))
+            found: str = ids[pos] if pos < len(ids) else None
+
+        # Проверка что найденный контакт действительно подходит
+        if found is None or not self.__keys[found].startswith(key):
+            return -1
+        return pos
+
+    def order(self, ids: Set[str]) -> List[str]:
+        '''
+        Метод для упорядочивания переданных идентификаторов по имени.
+        Небольшие множества сортируются по заранее вычисленным
+        ключам, а если выбрана значительная часть контактов,
+        то идентификаторы отбираются при обходе индекса по порядку.
+        '''
+
+        if len(ids) * 8 > len(self.__list):
+            return [contact_id for contact_id in self if contact_id in ids]
+
+        # Две устойчивые сортировки без вызова ф-ции Python на каждый
+        # элемент: по идентификатору, затем по ключу сортировки
+        result: List[str] = sorted(ids)
+        result.sort(key=self.__keys.__getitem__)
+        return result
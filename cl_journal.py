@@ -0,0 +1,341 @@
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+from threading import Thread
+import os
+import json
+
+from cl_file_lock import FileLock, file_stamp, write_temp
+from cl_metrics import METRICS, SIZE_BUCKETS
+
+
+class ChangeJournal:
+    '''
+    Класс журнала изменений телефонного справочника.
+    Вместо полной перезаписи файла с контактами при каждом
+    изменении, в журнал дописывается короткая запись
+    с актуальным состоянием измененного контакта:
+    - {"id": "1234", "data": {...}} - контакт добавлен или изменен;
+    - {"id": "1234", "data": null} - контакт удален.
+
+    Журнал хранится рядом со снимком данных (JSON-файлом),
+    проигрывается при подключении к файлу и сворачивается
+    в новый снимок в фоновом потоке, как только его размер
+    превышает заданный порог.
+    После записи нового снимка вызывается on_snapshot
+    (если передан) с данными снимка, например для
+    перестроения производных файлов.
+
+    С одними данными могут работать несколько процессов:
+    изменения дописываются под исключительной блокировкой
+    (FileLock), а каждый процесс помнит, до какого места
+    прочитал журнал, и методом tail дочитывает только
+    новые записи других процессов. Если другой процесс
+    за это время свернул журнал, tail сообщает, что данные
+    нужно загрузить заново.
+    '''
+
+    def __init__(
+        self, snapshot_path: str, max_size: int = 1024 * 1024,
+        on_snapshot: Optional[Callable[[Dict[str, Dict[str, str]]], None]] = None,
+        lock: Optional[FileLock] = None
+    ) -> None:
+        # Пути к снимку данных, текущему журналу и журналу,
+        # который в данный момент сворачивается в снимок
+        self.__snapshot_path: str = snapshot_path
+        self.__journal_path: str = os.path.splitext(snapshot_path)[0] + '.journal'
+        self.__rotated_path: str = self.__journal_path + '.1'
+
+        # Пороговый размер журнала в байтах и размер прочитанной
+        # (или записанной этим процессом) части текущего журнала
+        self.__max_size: int = max_size
+        self.__size: int = 0
+
+        # Открытый на дозапись файл журнала и поток сворачивания
+        self.__file: Optional[BinaryIO] = None
+        self.__compaction: Optional[Thread] = None
+        self.__on_snapshot: Optional[Callable[[Dict[str, Dict[str, str]]], None]] = on_snapshot
+
+        # Блокировка данных, общая с хранилищем
+        self.__lock: FileLock = lock if lock is not None else FileLock(
+            os.path.splitext(snapshot_path)[0] + '.lock'
+        )
+
+        # Отметки состояния снимка и свернутого журнала на момент
+        # чтения и inode прочитанного журнала, по которым
+        # tail определяет, что журнал свернул другой процесс
+        self.__snapshot_stamp: Optional[Tuple[int, int, int]] = None
+        self.__rotated_stamp: Optional[Tuple[int, int, int]] = None
+        self.__journal_id: Optional[int] = None
+
+    def replay(self, data: Dict[str, Any], factory: Callable[[Dict[str, str]], Any] = dict) -> None:
+        '''
+        Метод для проигрывания журнала поверх загруженного снимка.
+        Сначала применяется журнал, сворачивание которого
+        могло не завершиться, затем текущий журнал.
+        Данные контактов из журнала передаются в factory,
+        чтобы привести их к представлению, в котором они хранятся.
+        Вызывается под блокировкой сразу после загрузки снимка.
+        '''
+
+        # Запоминание состояния снимка и свернутого журнала
+        self.__snapshot_stamp = file_stamp(self.__snapshot_path)
+        self.__rotated_stamp = file_stamp(self.__rotated_path)
+        self.__journal_id = None
+        self.__size = 0
+
+        for path in (self.__rotated_path, self.__journal_path):
+
+            # Попытка открыть файл журнала, если его нет - пропуск
+            try:
+                with open(path, 'rb') as journal:
+                    changes, size = self.__read(journal)
+                    if path == self.__journal_path:
+                        self.__journal_id = os.fstat(journal.fileno()).st_ino
+                        self.__size = size
+            except FileNotFoundError:
+                continue
+
+            # Применение записей к данным
+            for contact_id, record in changes:
+                if record is None:
+                    data.pop(contact_id, None)
+                else:
+                    data[contact_id] = factory(record)
+
+    def tail(self, factory: Callable[[Dict[str, str]], Any] = dict) -> Optional[List[Tuple[str, Any]]]:
+        '''
+        Метод для чтения изменений, которые другие процессы
+        дописали в журнал после последнего чтения.
+        Возвращает пары "идентификатор - данные контакта"
+        (None для удаленного контакта) или None, если другой
+        процесс свернул журнал и данные нужно загрузить заново.
+        Вызывается под блокировкой.
+        '''
+
+        # Снимок или свернутый журнал изменились -
+        # новые записи не продолжают прочитанные
+        if (file_stamp(self.__snapshot_path) != self.__snapshot_stamp
+                or file_stamp(self.__rotated_path) != self.__rotated_stamp):
+            return None
+
+        # Проверка журнала без его открытия: тот же файл
+        # того же размера - новых изменений нет
+        try:
+            stat: os.stat_result = os.stat(self.__journal_path)
+        except FileNotFoundError:
+            return [] if self.__journal_id is None else None
+        if self.__journal_id is not None and stat.st_ino != self.__journal_id:
+            return None
+        if stat.st_size == self.__size:
+            return []
+
+        # Чтение новых записей с места, где закончилось предыдущее чтение
+        with open(self.__journal_path, 'rb') as journal:
+            journal.seek(self.__size)
+            changes, size = self.__read(journal)
+        self.__journal_id = stat.st_ino
+        self.__size += size
+        return [
+            (contact_id, None if record is None else factory(record))
+            for contact_id, record in changes
+        ]
+
+    def append(self, contact_id: str, record: Optional[Dict[str, str]]) -> None:
+        '''
+        Метод для дозаписи изменения одного контакта в журнал.
+        Если контакт удален, в качестве данных передается None.
+        '''
+
+        self.append_many([(contact_id, record)])
+
+    def append_many(self, changes: Iterable[Tuple[str, Optional[Dict[str, str]]]]) -> int:
+        '''
+        Метод для дозаписи изменений нескольких контактов
+        в журнал одной записью в файл.
+        На вход принимает пары "идентификатор - данные контакта".
+        Вызывается под исключительной блокировкой после tail,
+        чтобы журнал был прочитан до конца.
+        Возвращает кол-во записанных байт.
+        '''
+
+        # Открытие файла журнала на дозапись, если другой процесс
+        # переименовал журнал при сворачивании - открытие нового файла
+        try:
+            current_id: Optional[int] = os.stat(self.__journal_path).st_ino
+        except FileNotFoundError:
+            current_id = None
+        if self.__file is not None and os.fstat(self.__file.fileno()).st_ino != current_id:
+            self.__file.close()
+            self.__file = None
+        if self.__file is None:
+            self.__file = open(self.__journal_path, 'ab')
+
+        # Формирование строк журнала, если другой процесс аварийно
+        # завершился, не дописав строку, она завершается переводом
+        # строки, чтобы не склеить с ней новую запись
+        file_size: int = os.fstat(self.__file.fileno()).st_size
+        with METRICS.timer('journal.encode'):
+            lines: bytes = (b'\n' if file_size > self.__size else b'') + ''.join(
+                json.dumps({'id': contact_id, 'data': record}, ensure_ascii=False) + '\n'
+                for contact_id, record in changes
+            ).encode('utf-8')
+
+        # Запись строк и запоминание прочитанной части журнала
+        with METRICS.timer('journal.write'):
+            self.__file.write(lines)
+            self.__file.flush()
+        self.__journal_id = os.fstat(self.__file.fileno()).st_ino
+        self.__size = file_size + len(lines)
+        return len(lines)
+
+    def needs_compaction(self) -> bool:
+        '''
+        Метод проверяет, превысил ли журнал пороговый размер.
+        Пока идет предыдущее сворачивание, новое не начинается.
+        '''
+
+        return self.__size >= self.__max_size and (
+            self.__compaction is None or not self.__compaction.is_alive()
+        )
+
+    def compact(self, data: Dict[str, Dict[str, str]], wait: bool = False) -> None:
+        '''
+        Метод для сворачивания журнала в новый снимок данных.
+        Текущий журнал переименовывается, новые изменения
+        пишутся уже в чистый журнал, а снимок записывается
+        в фоновом потоке. На вход принимает копию данных,
+        которая не будет изменяться во время записи.
+        Вызывается под исключительной блокировкой, когда
+        needs_compaction разрешает сворачивание (с wait=True -
+        без блокировки, т.к. запись снимка ждет ее снятия).
+        '''
+
+        # Ожидание завершения предыдущего сворачивания
+        self.wait()
+
+        with self.__lock.exclusive():
+
+            # Закрытие текущего журнала
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+            # Переименование текущего журнала, если предыдущее сворачивание
+            # не завершилось (с ошибкой или в другом процессе),
+            # журнал дописывается к уже переименованному
+            if os.path.exists(self.__journal_path):
+                if os.path.exists(self.__rotated_path):
+                    with open(self.__journal_path, 'rb') as journal, \
+                            open(self.__rotated_path, 'ab') as rotated:
+                        rotated.write(journal.read())
+                    os.remove(self.__journal_path)
+                else:
+                    os.replace(self.__journal_path, self.__rotated_path)
+            self.__rotated_stamp = file_stamp(self.__rotated_path)
+            self.__journal_id = None
+            self.__size = 0
+
+            # Запуск записи снимка в отдельном потоке
+            self.__compaction = Thread(target=self.__write_snapshot, args=(data, self.__rotated_stamp))
+            self.__compaction.start()
+        if wait:
+            self.wait()
+
+    def wait(self) -> None:
+        '''
+        Метод для ожидания завершения фонового сворачивания журнала.
+        '''
+
+        if self.__compaction is not None:
+            self.__compaction.join()
+            self.__compaction = None
+
+    def close(self) -> None:
+        '''
+        Метод для закрытия журнала, дожидается
+        завершения фонового сворачивания.
+        '''
+
+        self.wait()
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def remove(self) -> None:
+        '''
+        Метод для удаления файлов журнала, когда
+        данные перенесены в другой формат (например
+        разбиты на части, см. sharding). Вызывается
+        под исключительной блокировкой.
+        '''
+
+        self.close()
+        for path in (self.__journal_path, self.__rotated_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __write_snapshot(self, data: Dict[str, Dict[str, str]],
+                         rotated_stamp: Optional[Tuple[int, int, int]]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает снимок данных во временный файл, после чего
+        под блокировкой атомарно подменяет им основной файл
+        и удаляет свернутый журнал. Если за время записи другой
+        процесс дописал к свернутому журналу свой, снимок
+        неполон и отбрасывается: новый снимок запишет тот процесс.
+        '''
+
+        # Запись во временный файл
+        with METRICS.timer('journal.compaction'):
+            temp_path: str = write_temp(
+                self.__snapshot_path,
+                lambda contacts: json.dump(data, contacts, indent=4, ensure_ascii=False)
+            )
+        METRICS.count('journal.compactions')
+        METRICS.observe('journal.compaction_bytes', os.path.getsize(temp_path), SIZE_BUCKETS)
+
+        with self.__lock.exclusive():
+            if file_stamp(self.__rotated_path) != rotated_stamp:
+                os.remove(temp_path)
+                return
+
+            # Подмена основного файла, свернутый журнал больше не нужен
+            os.replace(temp_path, self.__snapshot_path)
+            if os.path.exists(self.__rotated_path):
+                os.remove(self.__rotated_path)
+
+            # Данные процесса соответствуют новому снимку, если
+            # с момента сворачивания они не загружались заново
+            if self.__rotated_stamp == rotated_stamp:
+                self.__snapshot_stamp = file_stamp(self.__snapshot_path)
+                self.__rotated_stamp = None
+
+        if self.__on_snapshot is not None:
+            self.__on_snapshot(data)
+
+    @staticmethod
+    def __read(journal: BinaryIO) -> Tuple[List[Tuple[str, Optional[Dict[str, str]]]], int]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Читает записи журнала с текущей позиции файла.
+        Возвращает пары "идентификатор - данные контакта"
+        и размер прочитанных строк в байтах.
+        '''
+
+        changes: List[Tuple[str, Optional[Dict[str, str]]]] = list()
+        size: int = 0
+        for line in journal:
+
+            # Последняя строка могла быть записана не полностью
+            # (например при аварийном завершении), такая строка
+            # не учитывается и будет прочитана снова, если ее допишут
+            if not line.endswith(b'\n'):
+                break
+            size += len(line)
+
+            # Строка, которую не удалось разобрать, пропускается
+            try:
+                record: Dict = json.loads(line)
+            except json.decoder.JSONDecodeError:
+                continue
+            changes.append((record['id'], record['data']))
+        return changes, size
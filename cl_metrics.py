@@ -0,0 +1,252 @@
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+from contextlib import nullcontext
+from bisect import bisect_left
+import threading
+import time
+
+
+# Границы корзин гистограмм: время в миллисекундах
+# и размеры (кол-во записей или байт)
+TIME_BUCKETS: Tuple[float, ...] = (
+    0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, float('inf')
+)
+SIZE_BUCKETS: Tuple[float, ...] = (
+    0, 1, 10, 100, 1000, 10_000, 100_000, 1_000_000, 10_000_000, float('inf')
+)
+
+# Пустой контекстный менеджер, который возвращается,
+# когда сбор метрик выключен
+_NOTHING: ContextManager[None] = nullcontext()
+
+
+class Histogram:
+    '''
+    Класс гистограммы значений с фиксированными границами
+    корзин: хранит кол-во, сумму, минимум, максимум
+    и кол-во значений в каждой корзине.
+    '''
+
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'low', 'high')
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds: Tuple[float, ...] = bounds
+        self.buckets: List[int] = [0] * len(bounds)
+        self.count: int = 0
+        self.total: float = 0
+        self.low: float = float('inf')
+        self.high: float = 0
+
+    def add(self, value: float) -> None:
+        '''
+        Метод для добавления значения в гистограмму.
+        '''
+
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    def percentile(self, share: float) -> float:
+        '''
+        Метод возвращает оценку перцентиля: верхнюю границу
+        корзины, в которую он попадает (для последней
+        корзины - наибольшее значение).
+        '''
+
+        target: float = self.count * share
+        seen: int = 0
+        for bound, amount in zip(self.bounds, self.buckets):
+            seen += amount
+            if seen >= target and amount:
+                return min(bound, self.high)
+        return self.high
+
+    def to_dict(self) -> Dict[str, Any]:
+        '''
+        Метод возвращает гистограмму в виде словаря для вывода.
+        '''
+
+        return {
+            'count': self.count,
+            'sum': round(self.total, 3),
+            'min': round(self.low, 3) if self.count else 0,
+            'max': round(self.high, 3),
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'p50': round(self.percentile(0.5), 3),
+            'p95': round(self.percentile(0.95), 3),
+            'p99': round(self.percentile(0.99), 3),
+            'buckets': {
+                str(bound): amount for bound, amount in zip(self.bounds, self.buckets) if amount
+            }
+        }
+
+
+class Metrics:
+    '''
+    Класс сбора метрик работы справочника: счетчики
+    (например записанные байты) и гистограммы (время
+    выполнения этапов в миллисекундах, кол-во просмотренных
+    при поиске записей).
+
+    По умолчанию сбор выключен: timer и scan возвращают
+    пустой контекстный менеджер, а count и observe сразу
+    выходят, поэтому замеры почти ничего не стоят.
+    Включается аргументом --stats (см. main.py), метрики
+    выводятся при завершении или командой "stats" пакетного
+    режима и сервера.
+    '''
+
+    def __init__(self) -> None:
+        # Флаг сбора, блокировка для потоков (например потока
+        # сворачивания журнала), счетчики и гистограммы
+        self.enabled: bool = False
+        self.__lock: threading.Lock = threading.Lock()
+        self.__counters: Dict[str, float] = dict()
+        self.__histograms: Dict[str, Histogram] = dict()
+        self.__started: float = time.monotonic()
+
+        # Счетчик просмотренных записей текущего поиска
+        # (свой у каждого потока, см. scan)
+        self.__local: threading.local = threading.local()
+
+    def enable(self, enabled: bool = True) -> None:
+        '''
+        Метод для включения (или выключения) сбора метрик.
+        '''
+
+        self.enabled = enabled
+        self.__started = time.monotonic()
+
+    def count(self, name: str, value: float = 1) -> None:
+        '''
+        Метод увеличивает счетчик на переданное значение.
+        '''
+
+        if not self.enabled:
+            return
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float, bounds: Tuple[float, ...] = TIME_BUCKETS) -> None:
+        '''
+        Метод добавляет значение в гистограмму
+        (создается при первом значении с переданными границами).
+        '''
+
+        if not self.enabled:
+            return
+        with self.__lock:
+            histogram: Optional[Histogram] = self.__histograms.get(name)
+            if histogram is None:
+                histogram = self.__histograms[name] = Histogram(bounds)
+            histogram.add(value)
+
+    def timer(self, name: str) -> ContextManager[None]:
+        '''
+        Метод возвращает контекстный менеджер, который
+        добавляет время выполнения блока (в миллисекундах)
+        в гистограмму name.
+        '''
+
+        if not self.enabled:
+            return _NOTHING
+        return _Timer(self, name)
+
+    def scan(self, name: str) -> ContextManager[None]:
+        '''
+        Метод возвращает контекстный менеджер, который
+        добавляет в гистограмму name кол-во записей,
+        просмотренных внутри блока (см. scanned).
+        '''
+
+        if not self.enabled:
+            return _NOTHING
+        return _Scan(self, name)
+
+    def scanned(self, amount: int) -> None:
+        '''
+        Метод отмечает просмотр переданного кол-ва записей
+        (идентификаторов из индекса или проверенных контактов).
+        '''
+
+        if self.enabled:
+            self.__local.scanned = getattr(self.__local, 'scanned', 0) + amount
+
+    def take_scanned(self) -> int:
+        '''
+        Метод возвращает кол-во просмотренных записей
+        с предыдущего вызова и обнуляет счетчик.
+        '''
+
+        amount: int = getattr(self.__local, 'scanned', 0)
+        self.__local.scanned = 0
+        return amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        '''
+        Метод возвращает текущие значения метрик
+        в виде словаря (например для вывода в JSON).
+        '''
+
+        with self.__lock:
+            return {
+                'enabled': self.enabled,
+                'uptime_s': round(time.monotonic() - self.__started, 3),
+                'counters': dict(sorted(self.__counters.items())),
+                'histograms': {
+                    name: histogram.to_dict() for name, histogram in sorted(self.__histograms.items())
+                }
+            }
+
+    def reset(self) -> None:
+        '''
+        Метод для сброса собранных метрик.
+        '''
+
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+            self.__started = time.monotonic()
+
+
+class _Timer:
+    '''
+    Контекстный менеджер замера времени выполнения блока.
+    '''
+
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics: Metrics, name: str) -> None:
+        self.metrics: Metrics = metrics
+        self.name: str = name
+        self.started: float = 0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.metrics.observe(self.name, (time.perf_counter() - self.started) * 1000)
+
+
+class _Scan:
+    '''
+    Контекстный менеджер подсчета записей,
+    просмотренных внутри блока.
+    '''
+
+    __slots__ = ('metrics', 'name')
+
+    def __init__(self, metrics: Metrics, name: str) -> None:
+        self.metrics: Metrics = metrics
+        self.name: str = name
+
+    def __enter__(self) -> None:
+        self.metrics.take_scanned()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.metrics.observe(self.name, self.metrics.take_scanned(), SIZE_BUCKETS)
+
+
+# Метрики процесса, общие для всех модулей
+METRICS: Metrics = Metrics()
@@ -1,8 +1,15 @@
-from typing import Dict, List, Union
+from typing import ContextManager, Dict, Hashable, List, Optional, Set, Tuple, Union
 from math import ceil
-from random import randint
-import os
-import json
+from cl_cache import QueryCache
+from cl_contact import Contact, FIELDS
+from cl_dedupe import find_duplicates, merge_contacts
+from cl_index import EXACT, PREFIX, SUBSTRING, FUZZY, FUZZY_FIELDS, normalize
+from cl_metrics import METRICS, SIZE_BUCKETS
+from cl_storage import BaseStorage, JSONStorage
+from cl_query import Query, Term, And, Or, Not
+from cl_render import SCREEN, ContactRenderer
+import transfer
+import time
 
 
 class PhoneBook:
@@ -13,10 +20,14 @@ class PhoneBook:
     - добавление контакта;
     - удаление контакта;
     - редактирование характеристик контакта;
-    - поиск по одной или более характеристикам.
+    - поиск по одной или более характеристикам;
+    - определение владельца номера телефона;
+    - импорт и экспорт контактов в файлы CSV и JSON Lines.
     
-    Для хранения данных контактов, создается JSON-файл
-    по относительному пути "data/contacts.json".
+    Данные контактов хранятся в хранилище (наследнике
+    BaseStorage), по умолчанию это JSON-файл по относительному
+    пути "data/contacts.json" (см. JSONStorage), так же
+    доступна база данных SQLite (см. SQLiteStorage).
     '''
 
     # Создание словаря имитирующего "кнопки"
@@ -29,43 +40,71 @@ class PhoneBook:
         '6': ['personal_number', 'личного телефона']
     }
 
-    def __init__(self) -> None:
-        # Инициализация переменной для данных контактов и 
-        # попытка подключения к существующему файлу с контактами
-        self.__data_for_work: Dict[str, Dict[str, str]] = dict()
-        self.__connect_to_file()
+    # Создание словаря "кнопок" для режимов поиска
+    __search_mode_dict: Dict[str, str] = {
+        '1': EXACT,
+        '2': PREFIX,
+        '3': SUBSTRING,
+        '4': FUZZY
+    }
+
+    # Пороги досрочного сохранения изменений при редактировании
+    # контакта: кол-во измененных характеристик и секунды
+    # с первого несохраненного изменения
+    __edit_max_changes: int = len(FIELDS)
+    __edit_max_delay: float = 60.0
+
+    def __init__(self, storage: BaseStorage = None, page_size: int = 3, cache_size: int = 128) -> None:
+        # Инициализация хранилища контактов (если не передано,
+        # подключение к JSON-файлу) и кол-ва контактов на странице
+        self.__storage: BaseStorage = storage if storage is not None else JSONStorage()
+        self.__page_size: int = page_size
+
+        # Кэш результатов поиска на cache_size запросов
+        # (повторные запросы операторов), 0 - без кэша
+        self.__cache: QueryCache = QueryCache(cache_size)
 
-    def show_contacts(self, temp_data: Dict[str, Dict[str, str]] = None) -> None:
+        # Форматированные блоки контактов для вывода в терминал,
+        # хранятся до изменения контакта
+        self.__renderer: ContactRenderer = ContactRenderer(self.__storage)
+
+    def show_contacts(self, temp_data: List[str] = None, ranked: bool = False) -> None:
         '''
         Метод для отображения контактов постранично.
-        Базовый вывод 3 контакта на страницу.
+        Базовый вывод 3 контакта на страницу, кол-во
+        можно изменить прямо во время просмотра.
         По умолчанию выводит основной список контактов,
-        если же передать в аргументы отсортированный словарь
-        (например после поиска), то выведет уже контакты из
-        переданного словаря.
+        если же передать в аргументы упорядоченный список
+        идентификаторов (например после поиска), то выведет
+        уже контакты из переданного списка.
+        Так же позволяет перейти к странице по номеру или
+        к первому контакту, имя которого начинается с буквы.
+        Флаг ranked означает, что список упорядочен не по имени
+        (например по кол-ву опечаток после нечеткого поиска).
         '''
 
         # Проверка есть ли контакты, если нету выход
         if self.__empty_contacts():
             return
         
-        # Проверка был ли получен в аргументах отсортированный словарь,
-        # если нет, установка для работы основного словаря с данными
-        if not temp_data:
-            temp_data: Dict[str, Dict[str, str]] = self.__data_for_work
+        # Проверка был ли получен в аргументах упорядоченный список,
+        # если нет, установка для работы хранилища, которое
+        # позволяет получить срез страницы без копирования всех ключей
+        if temp_data is None:
+            temp_data: BaseStorage = self.__storage
 
         # Установка базового значения текущей страницы, 
-        # базового сдвига и определение максимально возможного 
+        # сдвига и определение максимально возможного
         # кол-ва страниц с учетом сдвига
         page: int = 1
-        shift: int = 3
+        shift: int = self.__page_size
         max_page_count: int = ceil(len(temp_data) / shift)
 
         # Запуск цикла для имитации постраничной работы с контактами
         while True:
 
             # Вывод информации
-            print(
+            SCREEN.print(
                 f'\tКонтакты, страница {page} из {max_page_count}\n'
                 f'{"-" * 41}'
             )
@@ -73,21 +112,24 @@ class PhoneBook:
             # Определение того, какие контакты должны быть выведенны
             # в соответсвии с текущей страницей и сдвигом, и проход
             # по ним циклом
-            for elem_id in list(temp_data)[shift * (page - 1):shift * page]:
+            for elem_id in temp_data[shift * (page - 1):shift * page]:
 
                 # Вывод информации о контакте в терминал
                 self.__output_contact_info(elem_id)
-                print('-' * 41)
+                SCREEN.print('-' * 41)
 
             # Вывод меню для перелистывания "страниц" или выхода в меню
-            answer: str = input(
+            answer: str = SCREEN.input(
             'Выберите необходимое действие:\n' \
             '1 - Следующая страница\n' \
             '2 - Предыдущая страница\n' \
+            '3 - Перейти к странице\n' \
+            '4 - Перейти к букве\n' \
+            '5 - Изменить кол-во контактов на странице\n' \
             '0 - Вернуться в меню\n' \
             '-> '
             )
-            os.system('cls' if os.name == 'nt' else 'clear')
+            SCREEN.clear()
 
             # Проверка ответа
             if answer == '0':
@@ -101,13 +143,63 @@ class PhoneBook:
                 page -= 1
             elif answer in ('1', '2'):
                 # Вывод сообщения что достигнут предел страниц
-                print(
+                SCREEN.print(
                     '  Запрашиваемой страницы не существует.\n'
                     f'{"-" * 41}'
                 )
+            elif answer == '3':
+
+                # Запрос номера страницы и переход к ней
+                page_answer: str = SCREEN.input(f'Введите номер страницы (1-{max_page_count}): ')
+                SCREEN.clear()
+                if page_answer.isdigit() and 1 <= int(page_answer) <= max_page_count:
+                    page = int(page_answer)
+                else:
+                    SCREEN.print(
+                        '  Запрашиваемой страницы не существует.\n'
+                        f'{"-" * 41}'
+                    )
+            elif answer == '4':
+
+                # Запрос буквы и переход к странице с первым контактом,
+                # имя которого начинается с нее, позиция контакта
+                # находится бинарным поиском по индексу имен, а в списке,
+                # упорядоченном не по имени, - проходом по списку
+                letter: str = SCREEN.input('Введите букву или начало имени: ')
+                SCREEN.clear()
+                if ranked:
+                    position: int = self.__name_position(letter, temp_data)
+                else:
+                    position = self.__storage.position(
+                        letter, None if temp_data is self.__storage else temp_data
+                    )
+                if letter and position >= 0:
+                    page = position // shift + 1
+                else:
+                    SCREEN.print(
+                        '  Контакты на эту букву не найдены.\n'
+                        f'{"-" * 41}'
+                    )
+            elif answer == '5':
+
+                # Запрос нового кол-ва контактов на странице, текущая
+                # страница пересчитывается так, чтобы на ней остался
+                # первый контакт, который был виден до изменения
+                size_answer: str = SCREEN.input('Введите кол-во контактов на странице: ')
+                SCREEN.clear()
+                if size_answer.isdigit() and int(size_answer) > 0:
+                    first: int = shift * (page - 1)
+                    shift = self.__page_size = int(size_answer)
+                    max_page_count = ceil(len(temp_data) / shift)
+                    page = first // shift + 1
+                else:
+                    SCREEN.print(
+                        '\tВведено неверное значение!\n'
+                        f'{"-" * 41}'
+                    )
             else:
                 # Вывод сообщения что введенная команда не верна
-                print(
+                SCREEN.print(
                     '\tВведена неверная команда!\n'
                     '\tПопробуйте еще раз.\n'
                     f'{"-" * 41}'
@@ -116,45 +208,34 @@ class PhoneBook:
     def add_contact(self) -> None:
         '''
         Метод для добавления контактов.
-        Поочередно запрашивает характеристики контакта,
-        присваивает случайный 4-х значный номер, заносит
-        информацию в переменную и записывает данные в файл.
+        Поочередно запрашивает характеристики контакта
+        и передает их в хранилище, которое присваивает
+        контакту идентификатор и сохраняет данные.
         '''
 
         # Вывод информационного сообщения и запрос информации о контакте
-        print(
+        SCREEN.print(
             '\tДобавление нового контакта\n'
             f'{"-" * 42}'
         )
-        added_name: str = input('Введите имя: ')
-        added_surname: str = input('Введите фамилию: ')
-        added_desperation: str = input('Введите отчество: ')
-        added_organization: str = input('Введите организацию: ')
-        added_work_number: str = input('Введите рабочий телефон: ')
-        added_personal_number: str = input('Введите личный телефон: ')
-        os.system('cls' if os.name == 'nt' else 'clear')
-
-        # Запуск цикла, для присвоения контакту при записи уникального идентификатора
-        while True:
-
-            # Генерация ключа
-            gen_key: str = str(randint(1000, 9999))
-
-            # Проверка нету ли аналогичного ключа, если нет, запись информации в переменную
-            if not gen_key in self.__data_for_work:
-                self.__data_for_work[gen_key] = {
-                    self.__char_dict['1'][0]: added_name,
-                    self.__char_dict['2'][0]: added_surname,
-                    self.__char_dict['3'][0]: added_desperation,
-                    self.__char_dict['4'][0]: added_organization,
-                    self.__char_dict['5'][0]: added_work_number,
-                    self.__char_dict['6'][0]: added_personal_number
-                }
-                break
-
-        # Запись данных в файл и вывод информационного сообщения
-        self.__write_data()
-        print(
+        added_name: str = SCREEN.input('Введите имя: ')
+        added_surname: str = SCREEN.input('Введите фамилию: ')
+        added_desperation: str = SCREEN.input('Введите отчество: ')
+        added_organization: str = SCREEN.input('Введите организацию: ')
+        added_work_number: str = SCREEN.input('Введите рабочий телефон: ')
+        added_personal_number: str = SCREEN.input('Введите личный телефон: ')
+        SCREEN.clear()
+
+        # Запись контакта в хранилище и вывод информационного сообщения
+        self.__storage.add(Contact.from_dict({
+            self.__char_dict['1'][0]: added_name,
+            self.__char_dict['2'][0]: added_surname,
+            self.__char_dict['3'][0]: added_desperation,
+            self.__char_dict['4'][0]: added_organization,
+            self.__char_dict['5'][0]: added_work_number,
+            self.__char_dict['6'][0]: added_personal_number
+        }))
+        SCREEN.print(
             '\tКонтакт успешно добавлен!\n'
             f'{"-" * 41}'
         )
@@ -174,48 +255,52 @@ class PhoneBook:
         while True:
 
             # Вывод информации
-            print(
+            SCREEN.print(
                 '\tУдаление контакта\n'
                 f'{"-" * 33}'
             )
 
             # Запрос идентификатора
-            contact_id: str = input(
+            contact_id: str = SCREEN.input(
                 'Введите ID контакта, или\n'
                 'введите 0 для возврата в меню\n'
                 '-> '
             )
-            os.system('cls' if os.name == 'nt' else 'clear')
+            SCREEN.clear()
 
             # Проверка ответа
             if contact_id == '0':
                 # Выход в меню
                 break
-            if self.__data_for_work.get(contact_id):
+            if self.__storage.get(contact_id):
 
                 # Если идентификатор существующий, запуск вторичного цикла для удаления
                 while True:
 
                     # Вывод информации об удаляемом контакте
-                    print('-' * 41)
+                    SCREEN.print('-' * 41)
                     self.__output_contact_info(contact_id)
-                    print('-' * 41)
+                    SCREEN.print('-' * 41)
 
                     # Запрос подтверждения удаления контакта
-                    answer: str = input(
+                    answer: str = SCREEN.input(
                         'Вы точно хотите удалить данный контакт?\n'
                         '1 - да | 2 - нет\n'
                         '-> '
                     )
-                    os.system('cls' if os.name == 'nt' else 'clear')
+                    SCREEN.clear()
 
                     # Проверка ответа
                     if answer == '1':
 
-                        # Удаление контакта, запись изменений в файл и вывод информационного сообщения
-                        self.__data_for_work.__delitem__(contact_id)
-                        self.__write_data()
-                        print(
+                        # Удаление контакта из хранилища и вывод информационного сообщения,
+                        # контакт мог быть уже удален другим процессом
+                        try:
+                            self.__storage.remove(contact_id)
+                        except KeyError:
+                            self.__print_missing_contact()
+                            return
+                        SCREEN.print(
                             '\t Контакт удален!\n'
                             f'{"-" * 33}'
                         )
@@ -227,13 +312,13 @@ class PhoneBook:
                     
                     else:
                         # Вывод информационного сообщения об ошибке
-                        print(
+                        SCREEN.print(
                             '\tВведена неверная команда!\n'
                             '\tПопробуйте еще раз.'
                         )
             else:
                 # Вывод информационного сообщения об ошибке
-                print(
+                SCREEN.print(
                     'Такого контакта не существует!\n'
                     'Попробуйте еще раз.\n'
                     f'{"-" * 33}'
@@ -244,6 +329,11 @@ class PhoneBook:
         Метод для редактирования данных контакта.
         Запрашивает идентификатор, запрашивает тип данных
         для изменнений, записывает изменения в файл.
+        Изменения контакта накапливаются и записываются
+        одной транзакцией при выходе из редактирования
+        контакта, либо досрочно, если изменены все
+        характеристики или с первого несохраненного
+        изменения прошло __edit_max_delay секунд.
         '''
 
         # Проверка есть ли контакты, если нету выход
@@ -254,84 +344,141 @@ class PhoneBook:
         while True:
 
             # Вывод информации
-            print(
+            SCREEN.print(
                 '\tРедактирование контакта\n'
                 f'{"-" * 39}'
             )
 
             # Запрос идентификатора
-            contact_id: str = input(
+            contact_id: str = SCREEN.input(
                 'Введите ID контакта, или\n'
                 'введите 0 для возврата в меню\n'
                 '-> '
             )
-            os.system('cls' if os.name == 'nt' else 'clear')
+            SCREEN.clear()
 
             # Проверка ответа
             if contact_id == '0':
                 # Выход в меню
                 break
 
-            if self.__data_for_work.get(contact_id):
+            if self.__storage.get(contact_id):
 
-                # Если идентификатор существующий, запуск вторичного цикла для редактирования
-                while True:
+                # Если идентификатор существующий, запуск вторичного цикла для редактирования,
+                # несохраненные изменения записываются при любом выходе из цикла
+                changes: Dict[str, str] = dict()
+                try:
+                    self.__edit_loop(contact_id, changes)
+                finally:
+                    self.__save_changes(contact_id, changes)
+                return
+            else:
+                # Вывод информационного сообщения об ошибке
+                SCREEN.print(
+                    'Такого контакта не существует!\n'
+                    'Попробуйте еще раз.\n'
+                    f'{"-" * 39}'
+                )
 
-                    # Вывод информации о редактируемом контакте
-                    print('-' * 39)
-                    self.__output_contact_info(contact_id)
-                    print('-' * 39)
-
-                    # Запрос какие именно данные необходимо отредактировать
-                    answer: str = input(
-                        'Выберите, что именно необходимо изменить:\n'
-                        '1 - Имя\n'
-                        '2 - Фамилия\n'
-                        '3 - Отчество\n'
-                        '4 - Организация\n'
-                        '5 - Рабочий телефон\n'
-                        '6 - Личный телефон\n'
-                        '0 - Вернуться в меню\n'
-                        '-> '
-                    )
-                    os.system('cls' if os.name == 'nt' else 'clear')
+    def __edit_loop(self, contact_id: str, changes: Dict[str, str]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Цикл редактирования выбранного контакта, изменения
+        накапливаются в changes (характеристика - новое значение).
+        '''
 
-                    # Проверка ответа
-                    if answer == '0':
-                        # Выход в меню
-                        return
-                    
-                    if answer in self.__char_dict:
+        # Время первого несохраненного изменения
+        first_change: float = 0
 
-                        # Изменение данных для выбранной характеристики
-                        self.__data_for_work[contact_id][self.__char_dict[answer][0]] = input(
-                            'Введите новые данные: '
-                        )
-                        os.system('cls' if os.name == 'nt' else 'clear')
+        while True:
 
-                        # Запись данных и вывод информационного собщения
-                        self.__write_data()
-                        print('Данные успешно изменены!')
+            # Вывод информации о редактируемом контакте с учетом несохраненных изменений
+            SCREEN.print('-' * 39)
+            self.__output_contact_info(contact_id, changes)
+            SCREEN.print('-' * 39)
+
+            # Запрос какие именно данные необходимо отредактировать
+            answer: str = SCREEN.input(
+                'Выберите, что именно необходимо изменить:\n'
+                '1 - Имя\n'
+                '2 - Фамилия\n'
+                '3 - Отчество\n'
+                '4 - Организация\n'
+                '5 - Рабочий телефон\n'
+                '6 - Личный телефон\n'
+                '0 - Вернуться в меню\n'
+                '-> '
+            )
+            SCREEN.clear()
+
+            # Проверка ответа
+            if answer == '0':
+                # Выход в меню, изменения сохраняются в edit_contact
+                return
+
+            if answer in self.__char_dict:
+
+                # Изменение данных для выбранной характеристики
+                new_value: str = SCREEN.input('Введите новые данные: ')
+                SCREEN.clear()
+
+                # Изменение откладывается до сохранения
+                if not changes:
+                    first_change = time.monotonic()
+                changes[self.__char_dict[answer][0]] = new_value
+
+                # Досрочное сохранение, если изменены все характеристики
+                # или изменения долго не сохранялись,
+                # контакт мог быть уже удален другим процессом
+                # (о сохранении сообщает __save_changes после записи)
+                if (len(changes) >= self.__edit_max_changes
+                        or time.monotonic() - first_change >= self.__edit_max_delay):
+                    if not self.__save_changes(contact_id, changes):
+                        return
+                else:
+                    SCREEN.print('Изменение принято, оно будет сохранено при возврате в меню.')
 
-                    else:
-                        # Вывод информационного сообщения об ошибке
-                        print(
-                            '\tВведена неверная команда!\n'
-                            '\tПопробуйте еще раз.'
-                        )
             else:
                 # Вывод информационного сообщения об ошибке
-                print(
-                    'Такого контакта не существует!\n'
-                    'Попробуйте еще раз.\n'
-                    f'{"-" * 39}'
+                SCREEN.print(
+                    '\tВведена неверная команда!\n'
+                    '\tПопробуйте еще раз.'
                 )
 
+    def __save_changes(self, contact_id: str, changes: Dict[str, str]) -> bool:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает накопленные изменения контакта
+        одной транзакцией, очищает их и сообщает
+        об успешной записи.
+        Возвращает False, если контакт был удален
+        другим процессом.
+        '''
+
+        if not changes:
+            return True
+        try:
+            with self.__storage.transaction():
+                for field, value in changes.items():
+                    self.__storage.update(contact_id, field, value)
+        except KeyError:
+            self.__print_missing_contact()
+            return False
+        finally:
+            changes.clear()
+        SCREEN.print('Данные успешно сохранены!')
+        return True
+
     def find_contact(self) -> None:
         '''
         Метод для поиска данных контакта.
         Запрашивает одну или более характеристику для поиска,
-        если были найдены результаты, выводит их в постраничном режиме.
+        режим поиска (точное совпадение, по началу или по части
+        значения) и, если характеристик несколько, способ
+        объединения условий (все условия или любое из них).
+        Значение, начинающееся с "!", исключает контакты
+        с таким значением. Если были найдены результаты,
+        выводит их в постраничном режиме.
         '''
 
         # Проверка есть ли контакты, если нету выход
@@ -342,14 +489,14 @@ class PhoneBook:
         while True:
 
             # Вывод информации
-            print(
+            SCREEN.print(
                 '\tПоиск контактов\n'
                 f'{"-" * 30}'
             )
 
             # Запрос одной или нескольких характеристик
             # по которым будет производится поиск
-            answer: str = input(
+            answer: str = SCREEN.input(
                 'По какой характеристике ищем?\n'
                 'Введите одну или более характеристик,\n'
                 'через запятую.\n'
@@ -362,7 +509,7 @@ class PhoneBook:
                 '0 - Вернуться в меню\n'
                 '-> '
             )
-            os.system('cls' if os.name == 'nt' else 'clear')
+            SCREEN.clear()
 
             # Проверка ответа
             if answer == '0':
@@ -375,135 +522,586 @@ class PhoneBook:
             # Проверка есть ли данные характеристики среди стандартных
             if all(map(lambda elem: elem in self.__char_dict, answer_list)):
 
-                # Создание словаря для временных данных
-                temp_dict: Dict[str, Dict[str, str]] = dict()
+                # Запрос режима поиска
+                mode_answer: str = SCREEN.input(
+                    'Выберите режим поиска:\n'
+                    '1 - Точное совпадение\n'
+                    '2 - По началу значения\n'
+                    '3 - По части значения\n'
+                    '4 - С опечатками (имя, фамилия, организация)\n'
+                    '-> '
+                )
+                SCREEN.clear()
+
+                # Проверка ответа
+                if mode_answer not in self.__search_mode_dict:
+                    SCREEN.print(
+                        '  Введена неверная команда!\n'
+                        '  Попробуйте еще раз.\n'
+                        f'{"-" * 30}'
+                    )
+                    continue
+                search_mode: str = self.__search_mode_dict[mode_answer]
+
+                # Нечеткий поиск доступен не для всех характеристик
+                if search_mode == FUZZY and not all(
+                    self.__char_dict[elem][0] in FUZZY_FIELDS for elem in answer_list
+                ):
+                    SCREEN.print(
+                        '  Поиск с опечатками доступен только\n'
+                        '  по имени, фамилии и организации.\n'
+                        f'{"-" * 30}'
+                    )
+                    continue
+
+                # Запрос способа объединения условий, если их несколько
+                join_answer: str = '1'
+                if len(answer_list) > 1:
+                    join_answer = SCREEN.input(
+                        'Как объединить условия?\n'
+                        '1 - Все условия (И)\n'
+                        '2 - Любое из условий (ИЛИ)\n'
+                        '-> '
+                    )
+                    SCREEN.clear()
+
+                    # Проверка ответа
+                    if join_answer not in ('1', '2'):
+                        SCREEN.print(
+                            '  Введена неверная команда!\n'
+                            '  Попробуйте еще раз.\n'
+                            f'{"-" * 30}'
+                        )
+                        continue
+
+                # Создание списка условий поиска
+                terms: List[Query] = list()
 
                 # Итерации по переданным характеристикам
                 for char_elem in answer_list:
 
                     # Запрос значения для поиска относительно конкретной характеристики
-                    obj_for_search: str = input(
-                        f'Введите значение для {self.__char_dict[char_elem][1]}: '
-                    ).lower()
-                    os.system('cls' if os.name == 'nt' else 'clear')
+                    obj_for_search: str = SCREEN.input(
+                        f'Введите значение для {self.__char_dict[char_elem][1]}\n'
+                        '(начните с "!", чтобы исключить): '
+                    )
+                    SCREEN.clear()
 
-                    # Поиск совпадение среди существующих контактов
-                    for key, value in self.__data_for_work.items():
+                    # Условие по характеристике, "!" в начале - отрицание
+                    if obj_for_search.startswith('!'):
+                        terms.append(Not(Term(
+                            self.__char_dict[char_elem][0], obj_for_search[1:], search_mode
+                        )))
+                    else:
+                        terms.append(Term(
+                            self.__char_dict[char_elem][0], obj_for_search, search_mode
+                        ))
 
-                        if value[self.__char_dict[char_elem][0]].lower() == obj_for_search:
-                            # Если совпадение найдено, запись во временный словарь
-                            temp_dict[key] = value
+                # Поиск по индексам хранилища
+                query: Query = And(*terms) if join_answer == '1' else Or(*terms)
+                found_ids: List[str] = self.search(query)
 
                 # Проверка были ли найдены контакты подходящие условиям поиска
-                if temp_dict:
-
-                    # Сортировка по имени
-                    temp_dict: Dict[str, Dict[str, str]] = dict(
-                        sorted(
-                        temp_dict.items(), key=lambda elem: elem[1].get('name', '').lower()
-                        )
-                    )
+                if found_ids:
 
                     # Вызов метода для вывода в терминал в страничном режиме
-                    self.show_contacts(temp_data=temp_dict)
+                    self.show_contacts(temp_data=found_ids, ranked=query.fuzzy)
                     break
 
                 else:
                     # Вывод информационного сообщения об ошибке
-                    print(
+                    SCREEN.print(
                         '     Контакты не найдены\n'
                         f'{"-" * 30}'
                     )
 
             else:
                 # Вывод информационного сообщения об ошибке
-                print(
+                SCREEN.print(
                     '  Введена неверная команда!\n'
                     '  Попробуйте еще раз.\n'
                     f'{"-" * 30}'
                 )
 
-    def __connect_to_file(self) -> None:
+    def count(self) -> int:
         '''
-        Скрытый метод для работы внутри класса.
-        Создает директорию для хранения данных,
-        если необходимо. Так же пытается подключится
-        к существующему файлу с данными.
+        Метод возвращает кол-во контактов в справочнике.
         '''
 
-        # Проверка существует ли директория для
-        # хранения данных, если нет, то создать
-        if not os.path.exists('data'):
-            os.mkdir('data')
+        return len(self.__storage)
 
-        # Попытка подключения к существующему файлу с данными
-        try:
-            with open('data/contacts.json', 'r', encoding='utf-8') as contacts:
-                self.__data_for_work: Dict[str, Dict[str, str]] = json.load(contacts)
-        except (FileNotFoundError, json.decoder.JSONDecodeError):
-            pass
+    def list_contacts(self, start: int = 0, stop: int = None) -> List[str]:
+        '''
+        Метод возвращает идентификаторы контактов
+        в порядке имен с позиции start до stop.
+        '''
+
+        return self.__storage[start:len(self.__storage) if stop is None else stop]
 
-    def __write_data(self) -> None:
+    def get_contact(self, contact_id: str) -> Optional[Contact]:
         '''
-        Скрытый метод для работы внутри класса.
-        Сортирует и записывает данные в файл
+        Метод возвращает данные контакта по идентификатору
+        или None, если такого контакта нет.
+        '''
+
+        return self.__storage.get(contact_id)
+
+    def add_record(self, record: Dict[str, str]) -> str:
+        '''
+        Метод для добавления контакта без диалога с пользователем.
+        Данные проверяются так же, как при импорте из файла.
+        Возвращает идентификатор нового контакта.
+        '''
+
+        contact, error = transfer.validate(record)
+        if error:
+            raise ValueError(error)
+        return self.__storage.add(contact)
+
+    def update_record(self, contact_id: str, field: str, value: str) -> None:
+        '''
+        Метод для изменения характеристики контакта
+        без диалога с пользователем. Контакт с новым
+        значением проверяется так же, как при импорте из файла.
+        '''
+
+        self.update_fields(contact_id, {field: value})
+
+    def update_fields(self, contact_id: str, fields: Dict[str, str]) -> None:
+        '''
+        Метод для изменения нескольких характеристик контакта
+        без диалога с пользователем. Контакт проверяется один
+        раз со всеми новыми значениями, изменения записываются
+        одной транзакцией.
+        '''
+
+        contact: Optional[Contact] = self.__storage.get(contact_id)
+        if contact is None:
+            raise KeyError(contact_id)
+        for field in fields:
+            if field not in FIELDS:
+                raise ValueError(f'неизвестная характеристика {field}')
+        checked, error = transfer.validate({**contact.to_dict(), **fields})
+        if error:
+            raise ValueError(error)
+        with self.__storage.transaction():
+            for field in fields:
+                self.__storage.update(contact_id, field, checked[field])
+
+    def transaction(self, max_changes: Optional[int] = None,
+                    max_delay: Optional[float] = None) -> ContextManager[None]:
+        '''
+        Метод возвращает контекстный менеджер транзакции
+        хранилища: изменения внутри блока накапливаются
+        и записываются один раз при выходе из него, при ошибке
+        отменяются. Если заданы max_changes (кол-во изменений)
+        или max_delay (секунды с первого несохраненного
+        изменения), накопленные изменения записываются досрочно.
+        '''
+
+        return self.__storage.transaction(max_changes, max_delay)
+
+    def remove_record(self, contact_id: str) -> None:
+        '''
+        Метод для удаления контакта без диалога с пользователем.
+        '''
+
+        if self.__storage.get(contact_id) is None:
+            raise KeyError(contact_id)
+        self.__storage.remove(contact_id)
+
+    def search(self, query: Query) -> List[str]:
+        '''
+        Метод для поиска контактов по составному условию
+        (см. cl_query). Условия вычисляются по индексам
+        хранилища, начиная с самого избирательного.
+        Возвращает отсортированный по имени список идентификаторов,
+        при нечетком поиске - сначала по кол-ву опечаток.
+        Результаты кэшируются (см. cl_cache).
+        '''
+
+        # Повторный запрос возвращается из кэша, если с момента
+        # поиска не менялись характеристики, по которым проверяются
+        # и упорядочиваются (по имени) контакты
+        key: Hashable = query.key()
+        generation: int = self.__storage.generation(query.fields() | {'name'})
+        cached: Optional[Tuple[str, ...]] = self.__cache.get(key, generation)
+        if cached is not None:
+            METRICS.count('search.cache_hits')
+            return list(cached)
+        METRICS.count('search.cache_misses')
+
+        # Вычисление условия по индексам с подсчетом просмотренных записей
+        with METRICS.timer('search.evaluate'), METRICS.scan('search.scanned'):
+            ids: Set[str] = query.evaluate(self.__storage)
+        METRICS.observe('search.found', len(ids), SIZE_BUCKETS)
+
+        # Сортировка по имени и ранжирование по кол-ву опечаток
+        with METRICS.timer('search.order'):
+            found_ids: List[str] = self.__storage.order(ids)
+        if query.fuzzy:
+            with METRICS.timer('search.rank'):
+                found_ids.sort(key=lambda elem: query.distance(self.__storage.get(elem)))
+        self.__cache.put(key, generation, found_ids)
+        return found_ids
+
+    def find_by_number(self, number: str) -> List[str]:
+        '''
+        Метод для определения владельцев номера телефона.
+        Номер может быть передан в любом формате, поиск идет
+        по обеим телефонным характеристикам, в том числе
+        по последним цифрам номера.
+        Возвращает отсортированный по имени список идентификаторов.
+        '''
+
+        # Поиск по номеру занимает микросекунды, поэтому без сбора
+        # метрик он выполняется без обращений к замерам
+        if not METRICS.enabled:
+            return self.__storage.order(self.__storage.lookup_number(number))
+
+        with METRICS.timer('search.lookup_number'):
+            ids: Set[str] = self.__storage.lookup_number(number)
+        METRICS.observe('search.found', len(ids), SIZE_BUCKETS)
+        with METRICS.timer('search.order'):
+            return self.__storage.order(ids)
+
+    def caller_id(self) -> None:
         '''
+        Метод для определения владельца номера телефона.
+        Запрашивает номер (полностью или последние цифры),
+        если были найдены контакты, выводит их в постраничном режиме.
+        '''
+
+        # Проверка есть ли контакты, если нету выход
+        if self.__empty_contacts():
+            return
+
+        # Запуск основного цикла для работы с номером
+        while True:
+
+            # Вывод информации
+            SCREEN.print(
+                '\tОпределение владельца номера\n'
+                f'{"-" * 36}'
+            )
+
+            # Запрос номера
+            number: str = SCREEN.input(
+                'Введите номер телефона или его\n'
+                'последние цифры, или введите 0\n'
+                'для возврата в меню\n'
+                '-> '
+            )
+            SCREEN.clear()
 
-        # Сортировка данных контактов по имени
-        self.__data_for_work: Dict[str, Dict[str, str]] = dict(
-            sorted(
-            self.__data_for_work.items(), key=lambda elem: elem[1].get('name', '').lower()
+            # Проверка ответа
+            if number == '0':
+                # Выход в меню
+                break
+
+            # Поиск владельцев номера
+            found_ids: List[str] = self.find_by_number(number)
+            if found_ids:
+                # Вызов метода для вывода в терминал в страничном режиме
+                self.show_contacts(temp_data=found_ids)
+                break
+
+            # Вывод информационного сообщения об ошибке
+            SCREEN.print(
+                '\tНомер не найден\n'
+                f'{"-" * 36}'
             )
+
+    def import_file(self, path: str, batch_size: int = 1000) -> Tuple[int, List[str]]:
+        '''
+        Метод для импорта контактов из файла CSV или JSON Lines.
+        Файл читается построчно, каждая строка проверяется,
+        корректные контакты добавляются в хранилище пачками
+        по batch_size, изменения сохраняются один раз на пачку.
+        Возвращает кол-во добавленных контактов и список ошибок.
+        '''
+
+        added: int = 0
+        errors: List[str] = list()
+        batch: List[Contact] = list()
+
+        # Построчное чтение и проверка файла
+        for line_num, row in transfer.read_rows(path):
+            contact, error = transfer.validate(row)
+            if error:
+                errors.append(f'строка {line_num}: {error}')
+                continue
+            batch.append(contact)
+
+            # Запись накопившейся пачки в хранилище
+            if len(batch) >= batch_size:
+                added += len(self.__storage.add_many(batch))
+                batch = list()
+
+        # Запись последней неполной пачки
+        if batch:
+            added += len(self.__storage.add_many(batch))
+        return added, errors
+
+    def export_file(self, path: str) -> int:
+        '''
+        Метод для экспорта контактов в файл CSV или JSON Lines.
+        Контакты читаются из хранилища и записываются в файл
+        по одному в порядке имен.
+        Возвращает кол-во выгруженных контактов.
+        '''
+
+        return transfer.write_rows(path, self.__storage.items())
+
+    def import_contacts(self) -> None:
+        '''
+        Метод для импорта контактов.
+        Запрашивает путь к файлу CSV или JSON Lines, выводит
+        кол-во добавленных контактов и ошибки в строках файла.
+        '''
+
+        # Вывод информации и запрос пути к файлу
+        SCREEN.print(
+            '\tИмпорт контактов\n'
+            f'{"-" * 41}'
+        )
+        path: str = SCREEN.input(
+            'Введите путь к файлу (.csv или .jsonl),\n'
+            'или введите 0 для возврата в меню\n'
+            '-> '
         )
+        SCREEN.clear()
 
-        # Запись в файл
-        with open('data/contacts.json', 'w', encoding='utf-8') as contacts:
-            json.dump(self.__data_for_work, contacts, indent=4, ensure_ascii=False)
+        # Проверка ответа
+        if path == '0':
+            return
 
-    def __output_contact_info(self, elem_id: str) -> None:
+        # Импорт и вывод результатов, первые ошибки выводятся полностью
+        try:
+            added, errors = self.import_file(path)
+        except (OSError, ValueError) as error:
+            SCREEN.print(
+                f'Не удалось импортировать файл: {error}\n'
+                f'{"-" * 41}'
+            )
+            return
+        SCREEN.print(f'Добавлено контактов: {added}')
+        if errors:
+            SCREEN.print(f'Пропущено строк с ошибками: {len(errors)}')
+            for error in errors[:10]:
+                SCREEN.print(f'  {error}')
+        SCREEN.print('-' * 41)
+
+    def export_contacts(self) -> None:
         '''
-        Скрытый метод для работы внутри класса.
-        Выводит информацию о контакте в терминал.
-        На вход принимает идентивикатор контакта.
+        Метод для экспорта контактов.
+        Запрашивает путь к файлу CSV или JSON Lines
+        и выгружает в него все контакты.
         '''
 
-        # Запись данных контакта в переменную по его идентификатору
-        elem: Dict[str, str] = self.__data_for_work.get(elem_id)
+        # Проверка есть ли контакты, если нету выход
+        if self.__empty_contacts():
+            return
+
+        # Вывод информации и запрос пути к файлу
+        SCREEN.print(
+            '\tЭкспорт контактов\n'
+            f'{"-" * 41}'
+        )
+        path: str = SCREEN.input(
+            'Введите путь к файлу (.csv или .jsonl),\n'
+            'или введите 0 для возврата в меню\n'
+            '-> '
+        )
+        SCREEN.clear()
 
-        # Если по идентификатору хранятся данные, запуск вывода
-        if elem:
+        # Проверка ответа
+        if path == '0':
+            return
 
-            # Вывод информации о контакте
-            print(
-                'ID: {el_id}'.format(
-                el_id=elem_id
-                )
+        # Экспорт и вывод результатов
+        try:
+            count: int = self.export_file(path)
+        except (OSError, ValueError) as error:
+            SCREEN.print(
+                f'Не удалось экспортировать контакты: {error}\n'
+                f'{"-" * 41}'
             )
-            print(
-                'ФИО: {nm} {srnm} {dspr}'.format(
-                nm=elem.get('name', ''),
-                srnm=elem.get('surname', ''),
-                dspr=elem.get('desperation', '')
-                )
+            return
+        SCREEN.print(
+            f'Выгружено контактов: {count}\n'
+            f'{"-" * 41}'
+        )
+
+    def find_duplicates(self) -> List[List[str]]:
+        '''
+        Метод для поиска групп возможных дубликатов
+        (совпадают номера телефонов или имя и фамилия,
+        см. cl_dedupe). Возвращает группы идентификаторов,
+        первым в группе идет контакт, который останется
+        после объединения.
+        '''
+
+        with METRICS.timer('dedupe.find'):
+            return find_duplicates(self.__storage.items())
+
+    def merge_group(self, ids: List[str]) -> str:
+        '''
+        Метод для объединения дубликатов без диалога
+        с пользователем: первый контакт дополняется
+        характеристиками остальных (см. cl_dedupe.merge_contacts),
+        остальные удаляются. Изменения записываются одной
+        транзакцией. Возвращает идентификатор оставшегося контакта.
+        '''
+
+        # Проверка всех контактов до изменений
+        if len(ids) < 2 or len(set(ids)) != len(ids):
+            raise ValueError('для объединения нужно не менее двух разных контактов')
+        contacts: List[Optional[Contact]] = [self.__storage.get(contact_id) for contact_id in ids]
+        for contact_id, contact in zip(ids, contacts):
+            if contact is None:
+                raise KeyError(contact_id)
+
+        # Изменение первого контакта и удаление остальных
+        merged: Dict[str, str] = merge_contacts(contacts)
+        with self.__storage.transaction():
+            for field, value in merged.items():
+                if contacts[0][field] != value:
+                    self.__storage.update(ids[0], field, value)
+            for contact_id in ids[1:]:
+                self.__storage.remove(contact_id)
+        return ids[0]
+
+    def merge_duplicates(self) -> None:
+        '''
+        Метод для поиска и объединения дубликатов.
+        Выводит по очереди группы возможных дубликатов
+        и результат их объединения, запрашивает, объединять
+        ли группу. Выбранные группы объединяются после
+        просмотра одной транзакцией (одна запись в хранилище).
+        '''
+
+        # Проверка есть ли контакты, если нету выход
+        if self.__empty_contacts():
+            return
+
+        # Поиск групп дубликатов
+        groups: List[List[str]] = self.find_duplicates()
+        if not groups:
+            SCREEN.print(
+                '\tДубликаты не найдены\n'
+                f'{"-" * 41}'
             )
-            print(
-                'Организация: {org}'.format(
-                org=elem.get('organization', '')
-                )
+            return
+
+        # Просмотр групп и выбор групп для объединения
+        chosen: List[List[str]] = list()
+        for num, group in enumerate(groups, start=1):
+
+            # Вывод контактов группы и результата объединения
+            SCREEN.print(
+                f'\tГруппа {num} из {len(groups)}\n'
+                f'{"-" * 41}'
             )
-            print(
-                'Рабочий телефон: {wrk_num}'.format(
-                wrk_num=elem.get('work_number', '')
-                )
+            for contact_id in group:
+                self.__output_contact_info(contact_id)
+                SCREEN.print('-' * 41)
+            SCREEN.print('После объединения:')
+            self.__output_contact_info(
+                group[0], merge_contacts([self.__storage.get(contact_id) for contact_id in group])
             )
-            print(
-                'Личный телефон: {prs_num}'.format(
-                prs_num=elem.get('personal_number', '')
+            SCREEN.print('-' * 41)
+
+            # Запрос действия, пока не будет введена верная команда
+            while True:
+                answer: str = SCREEN.input(
+                    '1 - Объединить\n'
+                    '2 - Пропустить\n'
+                    '0 - Закончить просмотр\n'
+                    '-> '
                 )
-            )
-        else:
-            # Вывод сообщения о проблеме с данными контакта
-            print(f'Запись с ID - {elem_id} записана некорректно, проверьте файл.')
+                if answer in ('0', '1', '2'):
+                    break
+                SCREEN.print(
+                    '\tВведена неверная команда!\n'
+                    '\tПопробуйте еще раз.'
+                )
+            SCREEN.clear()
+
+            if answer == '1':
+                chosen.append(group)
+            elif answer == '0':
+                break
+
+        # Объединение выбранных групп одной транзакцией, контакты
+        # могли быть изменены другими процессами за время просмотра,
+        # группы с удаленными контактами пропускаются
+        self.refresh()
+        merged: int = 0
+        removed: int = 0
+        with self.__storage.transaction():
+            for group in chosen:
+                try:
+                    self.merge_group(group)
+                except KeyError:
+                    continue
+                merged += 1
+                removed += len(group) - 1
+        SCREEN.print(
+            f'Объединено групп: {merged}, удалено контактов: {removed}\n'
+            f'{"-" * 41}'
+        )
+
+    def refresh(self) -> None:
+        '''
+        Метод для получения изменений, которые сделали
+        другие процессы, работающие с тем же хранилищем
+        (например другой оператор справочника).
+        '''
+
+        self.__storage.refresh()
+
+    def warm_up(self) -> None:
+        '''
+        Метод для заблаговременной подготовки индексов хранилища,
+        чтобы первые запросы не ждали их построения.
+        '''
+
+        self.__storage.warm_up()
+
+    def close(self) -> None:
+        '''
+        Метод для завершения работы со справочником,
+        дожидается сохранения всех изменений.
+        '''
+
+        self.__storage.close()
+
+    def __output_contact_info(self, elem_id: str, changes: Optional[Dict[str, str]] = None) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Выводит информацию о контакте в терминал.
+        На вход принимает идентивикатор контакта
+        и несохраненные изменения его характеристик.
+        '''
+
+        # Вывод готового блока (из кэша или отформатированного заново)
+        SCREEN.print(self.__renderer.render(elem_id, changes))
+
+    def __name_position(self, prefix: str, ids: List[str]) -> int:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает позицию первого контакта списка, имя
+        которого начинается с переданной строки, или -1.
+        Список может быть упорядочен не по имени.
+        '''
+
+        key: str = normalize(prefix)
+        for pos, contact_id in enumerate(ids):
+            contact: Optional[Contact] = self.__storage.get(contact_id)
+            if contact is not None and normalize(contact.get('name', '')).startswith(key):
+                return pos
+        return -1
 
     def __empty_contacts(self) -> Union[None, bool]:
         '''
@@ -513,9 +1111,21 @@ class PhoneBook:
 
         # Если контакты не найдены выводит
         # сообщение и возвращает флаг True
-        if not self.__data_for_work:
-            print(
+        if not len(self.__storage):
+            SCREEN.print(
                 '\tКонтакты отсутствуют!\n'
                 f'{"-" * 37}'
             )
             return True
+
+    def __print_missing_contact(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Сообщает, что контакт удален, пока с ним
+        работали (например в другом окне справочника).
+        '''
+
+        SCREEN.print(
+            '\tКонтакт уже удален другим пользователем!\n'
+            f'{"-" * 41}'
+        )
@@ -0,0 +1,302 @@
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+from cl_index import EXACT, PREFIX, SUBSTRING, FUZZY, normalize, empty_number, fuzzy_limit, edit_distance
+from cl_metrics import METRICS
+from cl_storage import BaseStorage
+
+
+class Query:
+    '''
+    Базовый класс условия поиска контактов.
+    Условия объединяются в дерево из Term, And, Or и Not
+    и вычисляются по индексам хранилища (BaseStorage):
+    - evaluate - множество идентификаторов подходящих контактов;
+    - estimate - оценка размера этого множества, по которой
+      выбирается порядок вычисления условий;
+    - matches - проверка одного контакта, которая дешевле
+      обращения к индексу, когда кандидатов уже немного;
+    - distance - кол-во опечаток в контакте относительно
+      условий нечеткого поиска, для ранжирования результата;
+    - key - ключ условия для кэша результатов: одинаковые
+      условия (в том числе в другом порядке или регистре)
+      имеют одинаковый ключ;
+    - fields - характеристики, от которых зависит результат.
+    '''
+
+    # Есть ли в условии нечеткий поиск (результат нужно ранжировать)
+    fuzzy: bool = False
+
+    def evaluate(self, storage: BaseStorage) -> Set[str]:
+        '''
+        Метод возвращает идентификаторы контактов,
+        подходящих под условие.
+        '''
+
+        raise NotImplementedError
+
+    def estimate(self, storage: BaseStorage) -> int:
+        '''
+        Метод возвращает оценку кол-ва контактов,
+        подходящих под условие.
+        '''
+
+        raise NotImplementedError
+
+    def matches(self, contact: Mapping[str, str]) -> bool:
+        '''
+        Метод проверяет, подходит ли контакт под условие.
+        '''
+
+        raise NotImplementedError
+
+    def distance(self, contact: Mapping[str, str]) -> int:
+        '''
+        Метод возвращает кол-во опечаток в контакте
+        относительно условий нечеткого поиска.
+        '''
+
+        return 0
+
+    def key(self) -> Hashable:
+        '''
+        Метод возвращает нормализованный ключ условия.
+        '''
+
+        raise NotImplementedError
+
+    def fields(self) -> Set[str]:
+        '''
+        Метод возвращает характеристики, по которым
+        проверяются контакты.
+        '''
+
+        raise NotImplementedError
+
+    @staticmethod
+    def filter(storage: BaseStorage, ids: Iterable[str], query: 'Query', keep: bool = True) -> Set[str]:
+        '''
+        Метод для проверки кандидатов по одному без обращения
+        к индексу: оставляет контакты, которые подходят
+        под условие (или не подходят, если keep=False).
+        '''
+
+        return {
+            contact_id for contact_id in ids
+            if query.matches(storage.get(contact_id)) == keep
+        }
+
+
+class Term(Query):
+    '''
+    Класс условия по одной характеристике контакта
+    в одном из режимов поиска EXACT, PREFIX, SUBSTRING или FUZZY.
+    '''
+
+    def __init__(self, field: str, value: str, mode: str = EXACT) -> None:
+        self.field: str = field
+        self.value: str = value
+        self.mode: str = mode
+        self.fuzzy: bool = mode == FUZZY
+
+        # Запрос в нормализованном виде и кол-во опечаток
+        # для значений характеристики (значения часто повторяются,
+        # поэтому расстояние для каждого считается один раз)
+        self.__key: str = normalize(value, field)
+        self.__distances: Dict[str, int] = dict()
+
+    def evaluate(self, storage: BaseStorage) -> Set[str]:
+        result: Set[str] = storage.find(self.field, self.value, self.mode)
+        METRICS.scanned(len(result))
+        return result
+
+    def estimate(self, storage: BaseStorage) -> int:
+        return storage.estimate(self.field, self.value, self.mode)
+
+    def matches(self, contact: Mapping[str, str]) -> bool:
+        # Сравнение в том же нормализованном виде, что и в индексах,
+        # запросу по номеру без цифр не подходит ни один контакт
+        if empty_number(self.field, self.__key):
+            return False
+        if self.mode == FUZZY:
+            return self.distance(contact) <= fuzzy_limit(self.__key)
+        value: str = normalize(contact.get(self.field, ''), self.field)
+        if self.mode == EXACT:
+            return value == self.__key
+        if self.mode == PREFIX:
+            return value.startswith(self.__key)
+        if self.mode == SUBSTRING:
+            return self.__key in value
+        raise ValueError(f'Неизвестный режим поиска: {self.mode}')
+
+    def distance(self, contact: Mapping[str, str]) -> int:
+        if not self.fuzzy:
+            return 0
+        value: str = contact.get(self.field, '')
+        distance: Optional[int] = self.__distances.get(value)
+        if distance is None:
+            distance = edit_distance(
+                self.__key, normalize(value, self.field), fuzzy_limit(self.__key)
+            )
+            self.__distances[value] = distance
+        return distance
+
+    def key(self) -> Hashable:
+        return 'term', self.field, self.__key, self.mode
+
+    def fields(self) -> Set[str]:
+        return {self.field}
+
+    def __repr__(self) -> str:
+        return f'Term({self.field!r}, {self.value!r}, {self.mode!r})'
+
+
+class Not(Query):
+    '''
+    Класс отрицания условия. Внутри And вычисляется как
+    исключение контактов из уже найденных кандидатов,
+    отдельно - как дополнение до всех контактов.
+    '''
+
+    def __init__(self, query: Query) -> None:
+        self.query: Query = query
+
+    def evaluate(self, storage: BaseStorage) -> Set[str]:
+        METRICS.scanned(len(storage))
+        return set(storage) - self.query.evaluate(storage)
+
+    def estimate(self, storage: BaseStorage) -> int:
+        return max(len(storage) - self.query.estimate(storage), 0)
+
+    def matches(self, contact: Mapping[str, str]) -> bool:
+        return not self.query.matches(contact)
+
+    def key(self) -> Hashable:
+        return 'not', self.query.key()
+
+    def fields(self) -> Set[str]:
+        return self.query.fields()
+
+    def __repr__(self) -> str:
+        return f'Not({self.query!r})'
+
+
+class And(Query):
+    '''
+    Класс пересечения условий.
+    Первым по индексу вычисляется самое избирательное
+    (с наименьшей оценкой) условие, остальные условия
+    применяются к кандидатам по возрастанию оценки: если
+    кандидатов заметно меньше, чем найдет условие, они
+    проверяются по одному (matches), иначе пересекаются
+    с результатом условия. Поэтому стоимость запроса
+    определяется размером самого короткого списка,
+    а не числом условий.
+    '''
+
+    # Во сколько раз проверка одного кандидата дороже
+    # добавления идентификатора в результат по индексу
+    __filter_ratio: int = 8
+
+    def __init__(self, *queries: Query) -> None:
+        self.queries: Tuple[Query, ...] = queries
+        self.fuzzy: bool = any(query.fuzzy for query in queries)
+
+    def evaluate(self, storage: BaseStorage) -> Set[str]:
+        # Разделение условий на обычные и отрицания
+        # с оценкой размера каждого из них
+        positive: List[Tuple[int, Query]] = sorted(
+            ((query.estimate(storage), query) for query in self.queries
+             if not isinstance(query, Not)),
+            key=lambda elem: elem[0]
+        )
+        negative: List[Tuple[int, Query]] = sorted(
+            ((query.query.estimate(storage), query.query) for query in self.queries
+             if isinstance(query, Not)),
+            key=lambda elem: elem[0]
+        )
+
+        # Начальные кандидаты - самое избирательное условие
+        # (если есть только отрицания - все контакты)
+        if positive:
+            candidates: Set[str] = positive.pop(0)[1].evaluate(storage)
+        else:
+            METRICS.scanned(len(storage))
+            candidates = set(storage)
+
+        # Применение остальных условий к кандидатам
+        for keep, conditions in ((True, positive), (False, negative)):
+            for size, query in conditions:
+                if not candidates:
+                    return candidates
+                if len(candidates) * self.__filter_ratio <= size:
+                    METRICS.scanned(len(candidates))
+                    candidates = self.filter(storage, candidates, query, keep)
+                elif keep:
+                    candidates &= query.evaluate(storage)
+                else:
+                    candidates -= query.evaluate(storage)
+        return candidates
+
+    def estimate(self, storage: BaseStorage) -> int:
+        sizes: List[int] = [
+            query.estimate(storage) for query in self.queries if not isinstance(query, Not)
+        ]
+        return min(sizes) if sizes else len(storage)
+
+    def matches(self, contact: Mapping[str, str]) -> bool:
+        return all(query.matches(contact) for query in self.queries)
+
+    def distance(self, contact: Mapping[str, str]) -> int:
+        return sum(query.distance(contact) for query in self.queries)
+
+    def key(self) -> Hashable:
+        return 'and', _sorted_keys(self.queries)
+
+    def fields(self) -> Set[str]:
+        return set().union(*(query.fields() for query in self.queries))
+
+    def __repr__(self) -> str:
+        return f'And({", ".join(map(repr, self.queries))})'
+
+
+class Or(Query):
+    '''
+    Класс объединения условий.
+    '''
+
+    def __init__(self, *queries: Query) -> None:
+        self.queries: Tuple[Query, ...] = queries
+        self.fuzzy: bool = any(query.fuzzy for query in queries)
+
+    def evaluate(self, storage: BaseStorage) -> Set[str]:
+        result: Set[str] = set()
+        for query in self.queries:
+            result |= query.evaluate(storage)
+        return result
+
+    def estimate(self, storage: BaseStorage) -> int:
+        return min(sum(query.estimate(storage) for query in self.queries), len(storage))
+
+    def matches(self, contact: Mapping[str, str]) -> bool:
+        return any(query.matches(contact) for query in self.queries)
+
+    def distance(self, contact: Mapping[str, str]) -> int:
+        return sum(query.distance(contact) for query in self.queries)
+
+    def key(self) -> Hashable:
+        return 'or', _sorted_keys(self.queries)
+
+    def fields(self) -> Set[str]:
+        return set().union(*(query.fields() for query in self.queries))
+
+    def __repr__(self) -> str:
+        return f'Or({", ".join(map(repr, self.queries))})'
+
+
+def _sorted_keys(queries: Iterable[Query]) -> Tuple[Hashable, ...]:
+    '''
+    Ф-ция возвращает ключи условий в едином порядке,
+    т.к. порядок условий в And и Or не влияет на результат.
+    '''
+
+    return tuple(sorted((query.key() for query in queries), key=repr))
@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional, TextIO
+from collections import OrderedDict
+import sys
+import os
+
+from cl_contact import Contact
+from cl_index import format_number
+from cl_storage import BaseStorage
+
+
+# Управляющие последовательности терминала: очистка экрана,
+# истории прокрутки и перевод курсора в начало
+CLEAR: str = '\033[2J\033[3J\033[H'
+
+
+class Screen:
+    '''
+    Класс буфера экрана терминала. Вместо отдельной записи
+    в терминал на каждый print и запуска процесса "clear"
+    ("cls") для очистки, текст экрана накапливается в буфере
+    и выводится одной записью перед запросом ввода (см. input)
+    или при явном вызове flush.
+
+    Экран очищается управляющей последовательностью
+    (в Windows поддержка последовательностей включается
+    один раз при первой очистке). Если вывод направлен
+    не в терминал (например в файл), очистка не выводится.
+    '''
+
+    def __init__(self, stream: TextIO = None) -> None:
+        # Поток вывода (по умолчанию текущий sys.stdout),
+        # части текста экрана и флаг очистки перед выводом
+        self.__stream: Optional[TextIO] = stream
+        self.__parts: List[str] = list()
+        self.__clear: bool = False
+        self.__ansi_enabled: bool = os.name != 'nt'
+
+    def print(self, *values: Any, sep: str = ' ', end: str = '\n') -> None:
+        '''
+        Метод добавляет текст в буфер экрана,
+        аргументы такие же, как у print.
+        '''
+
+        self.__parts.append(sep.join(map(str, values)) + end)
+
+    def clear(self) -> None:
+        '''
+        Метод для очистки экрана: накопленный текст
+        отбрасывается, а при следующем выводе экран
+        сначала очищается.
+        '''
+
+        self.__parts.clear()
+        self.__clear = True
+
+    def input(self, prompt: str = '') -> str:
+        '''
+        Метод выводит накопленный текст экрана вместе
+        с приглашением одной записью и запрашивает ввод.
+        '''
+
+        self.__parts.append(prompt)
+        self.flush()
+        return input()
+
+    def flush(self) -> None:
+        '''
+        Метод выводит накопленный текст экрана одной записью.
+        '''
+
+        stream: TextIO = self.__stream or sys.stdout
+        if self.__clear and stream.isatty():
+            self.__enable_ansi()
+            self.__parts.insert(0, CLEAR)
+        self.__clear = False
+        if self.__parts:
+            stream.write(''.join(self.__parts))
+            self.__parts.clear()
+        stream.flush()
+
+    def __enable_ansi(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        В консоли Windows включает обработку управляющих
+        последовательностей (пустая команда переводит
+        консоль в этот режим), вызывается один раз.
+        '''
+
+        if not self.__ansi_enabled:
+            os.system('')
+            self.__ansi_enabled = True
+
+
+class ContactRenderer:
+    '''
+    Класс вывода контакта в виде текстового блока.
+    Отформатированные блоки кэшируются (не более max_entries,
+    давно не выводившиеся вытесняются) до изменения контакта:
+    хранилище сообщает об изменениях через subscribe.
+    '''
+
+    def __init__(self, storage: BaseStorage, max_entries: int = 1024) -> None:
+        # Хранилище, блоки контактов в порядке вывода
+        # (последний - самый недавний) и их наибольшее кол-во
+        self.__storage: BaseStorage = storage
+        self.__blocks: OrderedDict[str, str] = OrderedDict()
+        self.__max_entries: int = max_entries
+        storage.subscribe(self.__invalidate)
+
+    def render(self, contact_id: str, changes: Optional[Dict[str, str]] = None) -> str:
+        '''
+        Метод возвращает текстовый блок контакта
+        (без перевода строки в конце). Блок с несохраненными
+        изменениями (changes) не кэшируется.
+        '''
+
+        # Готовый блок из кэша
+        if not changes:
+            block: Optional[str] = self.__blocks.get(contact_id)
+            if block is not None:
+                self.__blocks.move_to_end(contact_id)
+                return block
+
+        # Запись данных контакта в переменную с учетом несохраненных изменений
+        elem: Optional[Contact] = self.__storage.get(contact_id)
+        if elem is None:
+            return f'Запись с ID - {contact_id} записана некорректно, проверьте файл.'
+        if changes:
+            return self.format(contact_id, Contact.from_dict({**elem.to_dict(), **changes}))
+
+        # Форматирование и сохранение блока, вытеснение давно не выводившихся
+        block = self.__blocks[contact_id] = self.format(contact_id, elem)
+        if len(self.__blocks) > self.__max_entries:
+            self.__blocks.popitem(last=False)
+        return block
+
+    @staticmethod
+    def format(contact_id: str, elem: Contact) -> str:
+        '''
+        Метод форматирует данные контакта в текстовый блок.
+        '''
+
+        return (
+            f'ID: {contact_id}\n'
+            f'ФИО: {elem.get("name", "")} {elem.get("surname", "")} {elem.get("desperation", "")}\n'
+            f'Организация: {elem.get("organization", "")}\n'
+            f'Рабочий телефон: {format_number(elem.get("work_number", ""))}\n'
+            f'Личный телефон: {format_number(elem.get("personal_number", ""))}'
+        )
+
+    def __invalidate(self, contact_id: Optional[str]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Удаляет блок измененного контакта
+        (None - все блоки, например после загрузки данных заново).
+        '''
+
+        if contact_id is None:
+            self.__blocks.clear()
+        else:
+            self.__blocks.pop(contact_id, None)
+
+
+# Экран интерактивного меню, общий для всех модулей
+SCREEN: Screen = Screen()
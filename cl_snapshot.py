@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from collections.abc import MutableMapping
+from array import array
+from itertools import accumulate
+import mmap
+import os
+import struct
+import sys
+import threading
+
+from cl_contact import Contact, FIELDS
+
+
+# Сигнатура файла снимка и формат заголовка:
+# сигнатура, порядок байт, размер и время изменения JSON-файла,
+# из которого построен снимок, кол-во контактов и смещение индекса
+MAGIC: bytes = b'PBSNAP01'
+HEADER = struct.Struct('<8scQqQQ')
+
+# Формат начала записи контакта - длины характеристик в байтах
+RECORD = struct.Struct(f'<{len(FIELDS)}I')
+
+# Порядок байт, в котором записываются массивы индекса
+BYTE_ORDER: bytes = b'L' if sys.byteorder == 'little' else b'B'
+
+
+def snapshot_path(source_path: str) -> str:
+    '''
+    Ф-ция возвращает путь к бинарному снимку для JSON-файла.
+    '''
+
+    return os.path.splitext(source_path)[0] + '.snapshot'
+
+
+def write_snapshot(path: str, source_path: str, records: Iterable[Tuple[str, Mapping[str, str]]]) -> None:
+    '''
+    Ф-ция записывает бинарный снимок контактов.
+    На вход принимает пары "идентификатор - контакт",
+    порядок записей в снимке сохраняется. В заголовок
+    записываются размер и время изменения JSON-файла,
+    по которым при запуске проверяется, не устарел ли снимок.
+
+    Структура файла:
+    - заголовок;
+    - записи контактов: длины характеристик и сами
+      характеристики в UTF-8;
+    - индекс: смещения записей, идентификаторы и имена
+      (для упорядочивания без чтения записей).
+    '''
+
+    source_stat: os.stat_result = os.stat(source_path)
+    offsets: array = array('Q')
+    ids: List[str] = list()
+    names: List[str] = list()
+
+    # Временный файл уникален для процесса и потока, т.к. снимок
+    # могут одновременно перестраивать несколько процессов
+    temp_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temp_path, 'wb') as snapshot:
+
+        # Место под заголовок, он записывается после индекса
+        snapshot.write(b'\0' * HEADER.size)
+
+        # Запись контактов, запоминаются смещения записей
+        position: int = HEADER.size
+        for contact_id, contact in records:
+            values: List[bytes] = [contact.get(field, '').encode('utf-8') for field in FIELDS]
+            chunk: bytes = RECORD.pack(*map(len, values)) + b''.join(values)
+            snapshot.write(chunk)
+            offsets.append(position)
+            ids.append(contact_id)
+            names.append(contact.get('name', ''))
+            position += len(chunk)
+
+        # Запись индекса: смещения, затем идентификаторы и имена
+        # в виде длин строк и общего блока строк
+        index_offset: int = position
+        snapshot.write(offsets.tobytes())
+        for strings in (ids, names):
+            blob: bytes = ''.join(strings).encode('utf-8')
+            snapshot.write(array('I', map(len, strings)).tobytes())
+            snapshot.write(struct.pack('<Q', len(blob)))
+            snapshot.write(blob)
+
+        # Запись заголовка
+        snapshot.seek(0)
+        snapshot.write(HEADER.pack(
+            MAGIC, BYTE_ORDER, source_stat.st_size, source_stat.st_mtime_ns,
+            len(offsets), index_offset
+        ))
+    os.replace(temp_path, path)
+
+
+def open_snapshot(path: str, source_path: str) -> Optional['SnapshotContacts']:
+    '''
+    Ф-ция открывает бинарный снимок контактов.
+    Возвращает None, если снимка нет, он поврежден
+    или не соответствует текущему JSON-файлу.
+    '''
+
+    try:
+        source_stat: os.stat_result = os.stat(source_path)
+        with open(path, 'rb') as snapshot:
+            header: bytes = snapshot.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return None
+            magic, byte_order, size, mtime_ns, count, index_offset = HEADER.unpack(header)
+            if (magic, byte_order, size, mtime_ns) != (
+                MAGIC, BYTE_ORDER, source_stat.st_size, source_stat.st_mtime_ns
+            ):
+                return None
+            return SnapshotContacts(
+                mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ), count, index_offset
+            )
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class SnapshotContacts(MutableMapping):
+    '''
+    Класс словаря контактов поверх отображенного в память
+    бинарного снимка. При создании читается только индекс
+    (идентификаторы, имена и смещения записей), а контакт
+    декодируется при первом обращении к нему и дальше
+    хранится в памяти.
+
+    Добавленные, измененные и удаленные контакты хранятся
+    в памяти, сам снимок не изменяется.
+    '''
+
+    def __init__(self, buffer: mmap.mmap, count: int, index_offset: int) -> None:
+        self.__buffer: mmap.mmap = buffer
+
+        # Чтение смещений записей
+        position: int = index_offset
+        offsets: array = array('Q')
+        offsets.frombytes(buffer[position:position + offsets.itemsize * count])
+        position += offsets.itemsize * count
+
+        # Чтение идентификаторов и имен
+        ids, position = self.__read_strings(position, count)
+        names, position = self.__read_strings(position, count)
+
+        # Смещения записей по идентификатору (-1 - контакта нет в снимке),
+        # имена из индекса и уже декодированные контакты
+        self.__offsets: Dict[str, int] = dict(zip(ids, offsets))
+        self.__names: Dict[str, str] = dict(zip(ids, names))
+        self.__loaded: Dict[str, Contact] = dict()
+
+    def __getitem__(self, contact_id: str) -> Contact:
+        contact: Optional[Contact] = self.__loaded.get(contact_id)
+        if contact is None:
+            contact = self.__decode(self.__offsets[contact_id])
+            self.__loaded[contact_id] = contact
+        return contact
+
+    def __setitem__(self, contact_id: str, contact: Contact) -> None:
+        self.__offsets.setdefault(contact_id, -1)
+        self.__loaded[contact_id] = contact
+
+    def __delitem__(self, contact_id: str) -> None:
+        del self.__offsets[contact_id]
+        self.__loaded.pop(contact_id, None)
+        self.__names.pop(contact_id, None)
+
+    def __contains__(self, contact_id: object) -> bool:
+        return contact_id in self.__offsets
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__offsets)
+
+    def __len__(self) -> int:
+        return len(self.__offsets)
+
+    def names(self) -> Iterator[Tuple[str, str]]:
+        '''
+        Метод возвращает пары "идентификатор - имя" для
+        построения индекса имен без декодирования записей.
+        '''
+
+        for contact_id in self.__offsets:
+            contact: Optional[Contact] = self.__loaded.get(contact_id)
+            yield contact_id, contact['name'] if contact is not None else self.__names[contact_id]
+
+    def __read_strings(self, position: int, count: int) -> Tuple[List[str], int]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Читает из индекса список строк, записанный как
+        длины строк и общий блок строк.
+        Возвращает строки и позицию после блока.
+        '''
+
+        lengths: array = array('I')
+        lengths.frombytes(self.__buffer[position:position + lengths.itemsize * count])
+        position += lengths.itemsize * count
+        (size,) = struct.unpack_from('<Q', self.__buffer, position)
+        position += 8
+        blob: str = self.__buffer[position:position + size].decode('utf-8')
+        bounds: List[int] = list(accumulate(lengths, initial=0))
+        return [blob[start:stop] for start, stop in zip(bounds, bounds[1:])], position + size
+
+    def __decode(self, offset: int) -> Contact:
+        '''
+        Скрытый метод для работы внутри класса.
+        Декодирует запись контакта по смещению в снимке.
+        '''
+
+        lengths: Tuple[int, ...] = RECORD.unpack_from(self.__buffer, offset)
+        position: int = offset + RECORD.size
+        values: Dict[str, str] = dict()
+        for field, length in zip(FIELDS, lengths):
+            values[field] = self.__buffer[position:position + length].decode('utf-8')
+            position += length
+        return Contact(**values)
@@ -0,0 +1,1506 @@
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Set, Tuple
+from contextlib import contextmanager, nullcontext
+from bisect import bisect_left
+import sqlite3
+import time
+import json
+import os
+
+from cl_contact import Contact, FIELDS
+from cl_journal import ChangeJournal
+from cl_file_lock import FileLock, file_stamp, write_file
+from cl_metrics import METRICS, SIZE_BUCKETS
+from cl_snapshot import SnapshotContacts, snapshot_path, write_snapshot, open_snapshot
+from cl_id_allocator import IdAllocator
+from sharding import (
+    SHARD_COUNT, shard_count, shard_of, shard_path, shard_stamps, read_shard, load_shards, write_shard, write_shards
+)
+from cl_index import (
+    ContactIndex, SortedIndex, EXACT, PREFIX, SUBSTRING, FUZZY, GRAM_SIZE,
+    PHONE_FIELDS, MIN_SUFFIX, FUZZY_FIELDS, canonical_number, number_tail, normalize, empty_number, grams,
+    fuzzy_grams, fuzzy_limit, fuzzy_threshold, edit_distance
+)
+
+
+class BaseStorage:
+    '''
+    Базовый класс хранилища контактов, описывает интерфейс,
+    через который PhoneBook работает с данными:
+    - получение контакта по идентификатору;
+    - добавление, изменение и удаление контакта;
+    - поиск по характеристикам и по номеру телефона;
+    - обход и постраничный доступ в порядке имен.
+
+    Идентификаторы в порядке имен доступны через срез
+    (storage[start:stop]), поэтому хранилище можно
+    передавать напрямую для постраничного вывода.
+
+    Новые идентификаторы выдает IdAllocator, наследники
+    сохраняют границу зарезервированных идентификаторов
+    вместе с данными (см. _reserve_ids).
+
+    Несколько изменений можно объединить в транзакцию
+    (см. transaction): наследники накапливают изменения
+    (отмечая их через _changed) и сохраняют их одной
+    записью в _flush или отменяют в _rollback.
+
+    Каждое изменение данных (в том числе полученное
+    от другого процесса) наследники отмечают через _touch,
+    по версиям характеристик (см. generation) кэш
+    результатов поиска узнает, что результат устарел,
+    а подписчики (см. subscribe) - какой контакт изменился.
+    '''
+
+    def __init__(self, block_size: int = 1000) -> None:
+        # Создание распределителя идентификаторов
+        self._allocator: IdAllocator = IdAllocator(self._reserve_ids, block_size)
+
+        # Состояние транзакции: глубина вложенности, пороги
+        # досрочного сохранения, кол-во несохраненных
+        # изменений и время первого из них
+        self.__depth: int = 0
+        self.__max_changes: Optional[int] = None
+        self.__max_delay: Optional[float] = None
+        self.__unsaved: int = 0
+        self.__first_unsaved: float = 0
+
+        # Версии данных: номер последнего изменения
+        # и номер изменения, последним затронувшего
+        # каждую характеристику
+        self.__version: int = 0
+        self.__generations: Dict[str, int] = dict.fromkeys(FIELDS, 0)
+
+        # Подписчики на изменения контактов
+        self.__listeners: List[Callable[[Optional[str]], None]] = list()
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __contains__(self, contact_id: str) -> bool:
+        return self.get(contact_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def __getitem__(self, index: slice) -> List[str]:
+        raise NotImplementedError
+
+    def get(self, contact_id: str) -> Optional[Contact]:
+        '''
+        Метод возвращает данные контакта или None,
+        если контакта с таким идентификатором нет.
+        '''
+
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Contact]]:
+        '''
+        Метод для потокового обхода пар "идентификатор - контакт"
+        в порядке имен (например для экспорта).
+        '''
+
+        for contact_id in self:
+            yield contact_id, self.get(contact_id)
+
+    def add(self, contact: Contact) -> str:
+        '''
+        Метод для добавления контакта, присваивает ему
+        уникальный идентификатор, сохраняет изменения
+        и возвращает идентификатор.
+        '''
+
+        raise NotImplementedError
+
+    def add_many(self, contacts: List[Contact]) -> List[str]:
+        '''
+        Метод для добавления пачки контактов (например при импорте).
+        Идентификаторы присваиваются сразу всей пачке,
+        а изменения сохраняются один раз на пачку.
+        Возвращает список идентификаторов.
+        '''
+
+        return [self.add(contact) for contact in contacts]
+
+    def update(self, contact_id: str, field: str, value: str) -> None:
+        '''
+        Метод для изменения одной характеристики контакта
+        с сохранением изменений.
+        '''
+
+        raise NotImplementedError
+
+    def remove(self, contact_id: str) -> None:
+        '''
+        Метод для удаления контакта с сохранением изменений.
+        '''
+
+        raise NotImplementedError
+
+    def find(self, field: str, value: str, mode: str = EXACT) -> Set[str]:
+        '''
+        Метод для поиска контактов по значению характеристики
+        в одном из режимов EXACT, PREFIX, SUBSTRING
+        или FUZZY (только для FUZZY_FIELDS).
+        Возвращает множество идентификаторов.
+        '''
+
+        raise NotImplementedError
+
+    def estimate(self, field: str, value: str, mode: str = EXACT) -> int:
+        '''
+        Метод для оценки кол-ва контактов, которые найдет
+        find с такими же параметрами. Используется для выбора
+        порядка проверки условий составного запроса (cl_query),
+        поэтому должен быть заметно дешевле самого поиска.
+        '''
+
+        raise NotImplementedError
+
+    def lookup_number(self, number: str) -> Set[str]:
+        '''
+        Метод для определения владельцев номера телефона,
+        в том числе по последним цифрам номера.
+        Возвращает множество идентификаторов.
+        '''
+
+        raise NotImplementedError
+
+    def order(self, ids: Set[str]) -> List[str]:
+        '''
+        Метод для упорядочивания идентификаторов по имени.
+        '''
+
+        raise NotImplementedError
+
+    def position(self, prefix: str, ids: List[str] = None) -> int:
+        '''
+        Метод возвращает позицию первого контакта, имя которого
+        начинается с переданной строки, или -1, если таких нет.
+        Если передан упорядоченный список идентификаторов,
+        позиция ищется в нем.
+        '''
+
+        raise NotImplementedError
+
+    def refresh(self) -> None:
+        '''
+        Метод для получения изменений, сделанных другими
+        процессами, работающими с тем же хранилищем.
+        '''
+
+        pass
+
+    def generation(self, fields: Iterable[str] = FIELDS) -> int:
+        '''
+        Метод возвращает версию данных переданных характеристик:
+        номер последнего изменения, затронувшего хотя бы одну
+        из них (добавление и удаление контакта затрагивают все).
+        Пока версия не изменилась, результат поиска
+        по этим характеристикам остается верным.
+        '''
+
+        return max(self.__generations[field] for field in fields)
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]) -> None:
+        '''
+        Метод для подписки на изменения контактов: listener
+        вызывается с идентификатором измененного контакта
+        или с None, если могли измениться любые контакты
+        (например данные загружены заново).
+        '''
+
+        self.__listeners.append(listener)
+
+    @contextmanager
+    def transaction(self, max_changes: int = None, max_delay: float = None) -> Iterator[None]:
+        '''
+        Метод возвращает контекстный менеджер транзакции:
+        изменения внутри блока накапливаются в памяти
+        и сохраняются одной записью при выходе из блока,
+        а если блок завершился исключением или изменения
+        не удалось сохранить - отменяются.
+        Вложенные транзакции присоединяются к внешней.
+
+        Для длинных транзакций (например пакетной обработки)
+        можно задать пороги: накопленные изменения сохраняются
+        досрочно, как только их кол-во достигает max_changes
+        или с первого из них прошло max_delay секунд
+        (проверяется при очередном изменении). Досрочно
+        сохраненные изменения уже не отменяются.
+        '''
+
+        outer: bool = self.__depth == 0
+        if outer:
+            self.__max_changes = max_changes
+            self.__max_delay = max_delay
+            self.__unsaved = 0
+        self.__depth += 1
+        try:
+            yield
+        except BaseException:
+            self.__depth -= 1
+            if outer:
+                self.__unsaved = 0
+                self._rollback()
+            raise
+        self.__depth -= 1
+        if outer:
+            self.__unsaved = 0
+
+            # Если изменения не удалось сохранить, они отменяются,
+            # чтобы данные в памяти не расходились с сохраненными
+            try:
+                self._flush()
+            except BaseException:
+                self._rollback()
+                raise
+
+    def warm_up(self) -> None:
+        '''
+        Метод для заблаговременной подготовки индексов,
+        которые иначе строятся при первом обращении
+        (например перед запуском сервера).
+        '''
+
+        pass
+
+    def close(self) -> None:
+        '''
+        Метод для завершения работы с хранилищем.
+        '''
+
+        pass
+
+    @staticmethod
+    def prepare(field: str, value: str) -> str:
+        '''
+        Метод приводит значение характеристики к виду, в котором
+        оно хранится: номера телефонов хранятся одними цифрами.
+        '''
+
+        return canonical_number(value) if field in PHONE_FIELDS else value
+
+    def _generate_id(self) -> str:
+        '''
+        Метод для получения нового уникального идентификатора.
+        '''
+
+        return self._allocator.allocate()[0]
+
+    def _generate_ids(self, count: int) -> List[str]:
+        '''
+        Метод для получения пачки новых уникальных идентификаторов.
+        '''
+
+        return self._allocator.allocate(count)
+
+    def _in_transaction(self) -> bool:
+        '''
+        Метод проверяет, идет ли транзакция.
+        '''
+
+        return self.__depth > 0
+
+    def _changed(self, count: int = 1) -> None:
+        '''
+        Метод для наследников: отмечает накопленные
+        в транзакции изменения и сохраняет их досрочно
+        (через _flush), если достигнут один из порогов.
+        '''
+
+        if not self.__unsaved:
+            self.__first_unsaved = time.monotonic()
+        self.__unsaved += count
+        if ((self.__max_changes is not None and self.__unsaved >= self.__max_changes)
+                or (self.__max_delay is not None
+                    and time.monotonic() - self.__first_unsaved >= self.__max_delay)):
+            self.__unsaved = 0
+            self._flush()
+
+    def _touch(self, fields: Iterable[str] = FIELDS, contact_id: str = None) -> None:
+        '''
+        Метод для наследников: отмечает изменение данных
+        переданных характеристик (по умолчанию - всех)
+        контакта contact_id (по умолчанию - любых контактов)
+        и сообщает о нем подписчикам.
+        '''
+
+        self.__version += 1
+        for field in fields:
+            self.__generations[field] = self.__version
+        for listener in self.__listeners:
+            listener(contact_id)
+
+    def _flush(self) -> None:
+        '''
+        Метод для сохранения изменений, накопленных в транзакции.
+        '''
+
+        pass
+
+    def _rollback(self) -> None:
+        '''
+        Метод для отмены несохраненных изменений транзакции.
+        '''
+
+        pass
+
+    def _reserve_ids(self, size: int) -> int:
+        '''
+        Метод для резервирования блока идентификаторов.
+        Должен сохранить вместе с данными новую границу выданных
+        идентификаторов и вернуть начало блока, которое больше
+        любого существующего идентификатора.
+        '''
+
+        raise NotImplementedError
+
+    @staticmethod
+    def _max_id(ids: Iterable[str]) -> int:
+        '''
+        Метод возвращает наибольший числовой идентификатор
+        (0, если таких нет).
+        '''
+
+        return max((int(elem) for elem in ids if elem.isdigit()), default=0)
+
+
+class JSONStorage(BaseStorage):
+    '''
+    Хранилище контактов в JSON-файле (используется по умолчанию).
+    Все данные загружаются в память, поиск и упорядочивание
+    выполняются по индексам в памяти, а изменения дописываются
+    в журнал, который периодически сворачивается в новый файл.
+
+    Если включен бинарный снимок (use_snapshot), то при запуске
+    вместо разбора JSON-файла отображается в память снимок
+    и читается только его индекс, контакты декодируются
+    при первом обращении, а индексы для поиска строятся
+    при первом поиске. JSON-файл остается основным форматом,
+    снимок перестраивается, если устарел, и при каждой
+    записи JSON-файла.
+
+    С файлом могут одновременно работать несколько процессов:
+    чтение идет под совместной, а изменения под исключительной
+    блокировкой (FileLock), перед каждым изменением хранилище
+    получает изменения других процессов (см. refresh), а файлы
+    записываются атомарно через временный файл.
+
+    В транзакции изменения сразу видны в памяти, а в журнал
+    (или файл) все измененные контакты записываются одной
+    записью при сохранении транзакции.
+
+    Данные можно разбить на части по хэшу идентификатора
+    (см. split_into_shards и sharding): тогда вместо JSON-файла
+    при запуске параллельно читаются файлы частей, а изменение
+    перезаписывает только часть измененного контакта
+    (журнал и снимок при этом не используются).
+    '''
+
+    def __init__(self, path: str = 'data/contacts.json', use_journal: bool = True,
+                 use_snapshot: bool = False, load_workers: int = None) -> None:
+        super().__init__()
+
+        # Инициализация путей к файлам, блокировки данных
+        # и журнала изменений (если не отключен)
+        self.__path: str = path
+        self.__seq_path: str = os.path.splitext(path)[0] + '.seq'
+        self.__snapshot_path: Optional[str] = snapshot_path(path) if use_snapshot else None
+        self.__lock: FileLock = FileLock(os.path.splitext(path)[0] + '.lock')
+        self.__journal: Optional[ChangeJournal] = ChangeJournal(
+            path, on_snapshot=self.__rebuild_snapshot if use_snapshot else None, lock=self.__lock
+        ) if use_journal else None
+
+        # Идентификаторы контактов, измененных в транзакции и еще
+        # не сохраненных, их состояние до изменения (для отмены)
+        # и флаг пропущенных из-за них изменений других процессов
+        self.__dirty: Dict[str, None] = dict()
+        self.__undo: Dict[str, Optional[Contact]] = dict()
+        self.__skipped_remote: bool = False
+
+        # Кол-во частей, если данные разбиты на части (см. sharding,
+        # определяется при загрузке), идентификаторы контактов
+        # каждой части и кол-во процессов для чтения частей
+        self.__shards: int = 0
+        self.__shard_ids: List[Set[str]] = list()
+        self.__load_workers: Optional[int] = load_workers
+
+        # Загрузка данных и построение индексов
+        with self.__lock.shared():
+            self.__load()
+
+    def __len__(self) -> int:
+        return len(self.__data_for_work)
+
+    def __contains__(self, contact_id: str) -> bool:
+        return contact_id in self.__data_for_work
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__order)
+
+    def __getitem__(self, index: slice) -> List[str]:
+        return self.__order[index]
+
+    def get(self, contact_id: str) -> Optional[Contact]:
+        return self.__data_for_work.get(contact_id)
+
+    def add(self, contact: Contact) -> str:
+        # Приведение номеров телефонов к каноническому виду
+        for field in PHONE_FIELDS:
+            contact[field] = self.prepare(field, contact[field])
+
+        # Запись контакта в данные и индексы
+        with self.__lock.exclusive():
+            self.__refresh()
+            contact_id: str = self._generate_id()
+            self.__remember(contact_id)
+            self.__put(contact_id, contact)
+            self.__save(contact_id)
+        return contact_id
+
+    def add_many(self, contacts: List[Contact]) -> List[str]:
+        with self.__lock.exclusive():
+            self.__refresh()
+
+            # Запись пачки контактов в данные и индексы
+            ids: List[str] = self._generate_ids(len(contacts))
+            for contact_id, contact in zip(ids, contacts):
+                for field in PHONE_FIELDS:
+                    contact[field] = self.prepare(field, contact[field])
+                self.__remember(contact_id)
+                self.__put(contact_id, contact)
+
+            # Сохранение всей пачки одной записью
+            self.__save(*ids)
+        return ids
+
+    def update(self, contact_id: str, field: str, value: str) -> None:
+        with self.__lock.exclusive():
+            self.__refresh()
+
+            # Изменение данных для выбранной характеристики
+            contact: Contact = self.__data_for_work[contact_id]
+            self.__remember(contact_id)
+            old_value: str = contact[field]
+            contact[field] = self.prepare(field, value)
+
+            # Обновление индексов измененной характеристики
+            if self.__index is not None:
+                self.__index.update(contact_id, field, old_value, contact[field])
+            if field == 'name':
+                self.__order.update(contact_id, contact[field])
+            self._touch((field,), contact_id)
+            self.__save(contact_id)
+
+    def remove(self, contact_id: str) -> None:
+        with self.__lock.exclusive():
+            self.__refresh()
+            if contact_id not in self.__data_for_work:
+                raise KeyError(contact_id)
+            self.__remember(contact_id)
+            self.__discard(contact_id)
+            self.__save(contact_id)
+
+    def find(self, field: str, value: str, mode: str = EXACT) -> Set[str]:
+        return self.__search_index().find(field, value, mode)
+
+    def estimate(self, field: str, value: str, mode: str = EXACT) -> int:
+        return self.__search_index().estimate(field, value, mode)
+
+    def lookup_number(self, number: str) -> Set[str]:
+        return self.__search_index().lookup_number(number)
+
+    def order(self, ids: Set[str]) -> List[str]:
+        return self.__order.order(ids)
+
+    def position(self, prefix: str, ids: List[str] = None) -> int:
+        return self.__order.position(prefix, ids)
+
+    def refresh(self) -> None:
+        with self.__lock.shared():
+            self.__refresh()
+
+    def warm_up(self) -> None:
+        self.__search_index()
+
+    def close(self) -> None:
+        if self.__journal:
+            self.__journal.close()
+        self.__lock.close()
+
+    def split_into_shards(self, count: int = SHARD_COUNT) -> None:
+        '''
+        Метод для разбиения данных на count частей по хэшу
+        идентификатора (см. sharding). Данные вместе с журналом
+        записываются в части, после чего JSON-файл, журнал
+        и бинарный снимок удаляются. Хранилище (а другие
+        процессы - при следующем получении изменений)
+        переходит на работу с частями.
+        '''
+
+        if count < 1:
+            raise ValueError('Кол-во частей должно быть больше нуля')
+        with self.__lock.exclusive():
+            self.__refresh()
+            if self.__shards:
+                raise ValueError(f'Данные уже разбиты на части ({self.__shards})')
+            write_shards(self.__path, count, self.__ordered_data())
+
+            # Удаление файлов, данные которых перенесены в части
+            if self.__journal:
+                self.__journal.remove()
+            for path in (self.__path, snapshot_path(self.__path)):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.__load()
+
+    def _flush(self) -> None:
+        # Запись всех измененных в транзакции контактов одной записью
+        if not self.__dirty:
+            self.__undo.clear()
+            return
+        # Состояние транзакции сбрасывается только после записи:
+        # если запись не удалась, изменения еще можно отменить
+        with self.__lock.exclusive():
+            self.__refresh()
+            self.__write_data(*self.__dirty)
+            self.__dirty.clear()
+            self.__undo.clear()
+            self.__skipped_remote = False
+
+    def _rollback(self) -> None:
+        # Возврат контактов в состояние до изменения
+        for contact_id, contact in self.__undo.items():
+            self.__discard(contact_id)
+            if contact is not None:
+                self.__put(contact_id, contact)
+        self.__dirty.clear()
+        self.__undo.clear()
+
+        # Если изменения других процессов пропускались, пока
+        # контакты были изменены, данные загружаются заново
+        if self.__skipped_remote:
+            self.__skipped_remote = False
+            with self.__lock.shared():
+                self.__load()
+
+    def _reserve_ids(self, size: int) -> int:
+        # Чтение сохраненной границы выданных идентификаторов
+        try:
+            with open(self.__seq_path, 'r', encoding='utf-8') as seq:
+                saved: int = int(seq.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            saved = 0
+
+        # Сохранение новой границы через временный файл (вызывается
+        # при изменении данных, т.е. под исключительной блокировкой,
+        # поэтому процессы резервируют разные блоки)
+        start: int = max(saved, self.__max_loaded_id + 1)
+        write_file(self.__seq_path, lambda seq: seq.write(str(start + size)))
+        return start
+
+    def __load(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Загружает данные из файла и строит индексы.
+        Вызывается под блокировкой при создании хранилища
+        и когда другой процесс перезаписал файл.
+        '''
+
+        # Инициализация переменной для данных контактов
+        # и подключение к существующему файлу с контактами
+        with METRICS.timer('storage.load'):
+            self.__data_for_work: MutableMapping[str, Contact] = dict()
+            self.__connect_to_file()
+
+        # Наибольший существующий идентификатор, с которого
+        # начинается выдача, если граница еще не сохранена
+        self.__max_loaded_id: int = self._max_id(self.__data_for_work)
+
+        # Индексы по характеристикам для поиска строятся
+        # при первом поиске (см. __search_index)
+        self.__index: Optional[ContactIndex] = None
+
+        # Построение индекса для упорядочивания контактов по имени,
+        # для снимка имена берутся из его индекса
+        with METRICS.timer('storage.build_order'):
+            self.__order: SortedIndex = SortedIndex()
+            self.__order.build(
+                self.__data_for_work.names() if isinstance(self.__data_for_work, SnapshotContacts)
+                else ((key, value.get('name', '')) for key, value in self.__data_for_work.items())
+            )
+        self._touch()
+
+    def __refresh(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Получает изменения других процессов (вызывается
+        под блокировкой). С журналом дочитываются только
+        новые записи журнала и применяются к данным и индексам,
+        данные загружаются заново, только если другой процесс
+        свернул журнал в новый файл. Без журнала данные
+        загружаются заново, если изменилась отметка файла
+        (время изменения, размер). Для данных, разбитых на части,
+        заново читаются только части с изменившейся отметкой,
+        а все данные - только если изменилось описание частей.
+        '''
+
+        # Несохраненные изменения транзакции не заменяются
+        # изменениями других процессов (при сохранении
+        # транзакции они запишутся поверх)
+        unsaved: Dict[str, Optional[Contact]] = {
+            contact_id: self.__data_for_work.get(contact_id) for contact_id in self.__dirty
+        }
+
+        if self.__journal:
+            changes: Optional[List[Tuple[str, Optional[Contact]]]] = self.__journal.tail(Contact.from_dict)
+            if changes is None:
+                METRICS.count('storage.reloads')
+                self.__load()
+                self.__restore(unsaved)
+                return
+            if changes:
+                METRICS.count('storage.remote_changes', len(changes))
+            for contact_id, contact in changes:
+                if contact_id in unsaved:
+                    self.__skipped_remote = True
+                    continue
+                self.__discard(contact_id)
+                if contact is not None:
+                    self.__put(contact_id, contact)
+            return
+
+        stamp: Tuple = self.__data_stamp()
+        if stamp == self.__stamp:
+            return
+
+        # Изменились только части данных - чтение этих частей
+        if self.__shards and len(stamp) == len(self.__stamp) and stamp[0] == self.__stamp[0]:
+            for shard in range(self.__shards):
+                if stamp[shard + 1] != self.__stamp[shard + 1]:
+                    METRICS.count('storage.shard_reloads')
+                    self.__reload_shard(shard, unsaved)
+            self.__stamp = stamp
+            return
+
+        METRICS.count('storage.reloads')
+        self.__load()
+        self.__restore(unsaved)
+
+    def __reload_shard(self, shard: int, unsaved: Dict[str, Optional[Contact]]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Читает заново часть данных, измененную другим процессом,
+        и применяет к данным и индексам только отличия: удаленные,
+        новые и измененные контакты этой части. Контакты
+        с несохраненными изменениями транзакции пропускаются.
+        '''
+
+        loaded: Dict[str, Contact] = {
+            contact_id: Contact.from_values(values)
+            for contact_id, *values in read_shard(shard_path(self.__path, shard))
+        }
+        removed: List[str] = [key for key in self.__shard_ids[shard] if key not in loaded]
+        changed: List[str] = [
+            key for key, contact in loaded.items() if self.__data_for_work.get(key) != contact
+        ]
+        METRICS.count('storage.remote_changes', len(removed) + len(changed))
+        for contact_id in removed + changed:
+            if contact_id in unsaved:
+                self.__skipped_remote = True
+                continue
+            self.__discard(contact_id)
+            if contact_id in loaded:
+                self.__put(contact_id, loaded[contact_id])
+
+    def __restore(self, states: Dict[str, Optional[Contact]]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает в данные и индексы переданные состояния
+        контактов (None - контакт удален) после повторной загрузки.
+        Состояния до изменения, сохраненные для отмены,
+        могли устареть, поэтому при отмене данные
+        будут загружены заново.
+        '''
+
+        if states:
+            self.__skipped_remote = True
+
+        for contact_id, contact in states.items():
+            self.__discard(contact_id)
+            if contact is not None:
+                self.__put(contact_id, contact)
+
+    def __remember(self, contact_id: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        В транзакции запоминает состояние контакта
+        до первого изменения, чтобы его можно было отменить.
+        '''
+
+        if self._in_transaction() and contact_id not in self.__undo:
+            contact: Optional[Contact] = self.__data_for_work.get(contact_id)
+            self.__undo[contact_id] = None if contact is None else Contact.from_dict(contact.to_dict())
+
+    def __save(self, *ids: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Сохраняет изменения контактов, в транзакции
+        только отмечает их для сохранения в _flush.
+        '''
+
+        if not self._in_transaction():
+            self.__write_data(*ids)
+            return
+        self.__dirty.update(dict.fromkeys(ids))
+        self._changed(len(ids))
+
+    def __put(self, contact_id: str, contact: Contact) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает контакт в данные и индексы.
+        '''
+
+        self.__data_for_work[contact_id] = contact
+        if self.__index is not None:
+            self.__index.add(contact_id, contact)
+        self.__order.add(contact_id, contact['name'])
+        if self.__shards:
+            self.__shard_ids[shard_of(contact_id, self.__shards)].add(contact_id)
+        self._touch(contact_id=contact_id)
+
+    def __discard(self, contact_id: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Удаляет контакт (если он есть) из индексов и данных.
+        '''
+
+        contact: Optional[Contact] = self.__data_for_work.get(contact_id)
+        if contact is None:
+            return
+        if self.__index is not None:
+            self.__index.remove(contact_id, contact)
+        self.__order.remove(contact_id)
+        del self.__data_for_work[contact_id]
+        if self.__shards:
+            self.__shard_ids[shard_of(contact_id, self.__shards)].discard(contact_id)
+        self._touch(contact_id=contact_id)
+
+    def __connect_to_file(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Создает директорию для хранения данных,
+        если необходимо. Так же пытается подключится
+        к существующему файлу с данными и проигрывает
+        поверх него журнал изменений.
+        '''
+
+        # Проверка существует ли директория для
+        # хранения данных, если нет, то создать
+        directory: str = os.path.dirname(self.__path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Отметка состояния файла (или частей данных), по которой
+        # видно, что его перезаписал другой процесс (если журнал отключен)
+        self.__shards = shard_count(self.__path)
+        self.__stamp: Tuple = self.__data_stamp()
+
+        # Данные, разбитые на части, читаются из частей,
+        # журнал и снимок для них не используются (изменение
+        # перезаписывает только свою часть)
+        if self.__shards:
+            self.__connect_to_shards()
+            return
+
+        # Попытка подключения к актуальному бинарному снимку
+        snapshot: Optional[SnapshotContacts] = open_snapshot(
+            self.__snapshot_path, self.__path
+        ) if self.__snapshot_path else None
+
+        if snapshot is not None:
+            self.__data_for_work = snapshot
+        else:
+            # Попытка подключения к существующему файлу с данными,
+            # данные контактов переводятся в компактное представление.
+            # Файл записывается атомарно, поэтому ошибка разбора
+            # означает поврежденный файл, а не пустой справочник
+            try:
+                with open(self.__path, 'r', encoding='utf-8') as contacts:
+                    self.__data_for_work = {
+                        key: Contact.from_dict(value) for key, value in json.load(contacts).items()
+                    }
+
+                # Перестроение устаревшего (или отсутствующего) снимка
+                if self.__snapshot_path:
+                    self.__rebuild_snapshot(self.__data_for_work)
+            except FileNotFoundError:
+                pass
+            except json.decoder.JSONDecodeError as error:
+                raise ValueError(f'Файл с контактами {self.__path} поврежден: {error}') from error
+
+        # Проигрывание журнала изменений
+        if self.__journal:
+            self.__journal.replay(self.__data_for_work, Contact.from_dict)
+
+    def __connect_to_shards(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Читает данные, разбитые на части (части большого
+        справочника разбираются параллельно в пуле процессов),
+        и запоминает идентификаторы контактов каждой части.
+        '''
+
+        # Журнал и снимок остаются от работы с JSON-файлом
+        # до разбиения его на части другим процессом
+        if self.__journal:
+            self.__journal.close()
+            self.__journal = None
+        self.__snapshot_path = None
+
+        self.__shard_ids = list()
+        for rows in load_shards(self.__path, self.__shards, self.__load_workers):
+            ids: Set[str] = set()
+            for contact_id, *values in rows:
+                self.__data_for_work[contact_id] = Contact.from_values(values)
+                ids.add(contact_id)
+            self.__shard_ids.append(ids)
+
+    def __data_stamp(self) -> Tuple:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает отметку состояния JSON-файла
+        или всех частей данных.
+        '''
+
+        if self.__shards:
+            return shard_stamps(self.__path, self.__shards)
+        return file_stamp(self.__path),
+
+    def __write_data(self, *ids: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает данные в файл в порядке индекса имен.
+        Если переданы идентификаторы измененных контактов
+        и включен журнал, то вместо перезаписи всего файла
+        в журнал одной записью дописываются только эти контакты.
+        Данные, разбитые на части, записываются по частям:
+        перезаписываются только части измененных контактов.
+        '''
+
+        if self.__shards:
+            self.__write_shards(ids)
+            return
+
+        # Если журнал отключен, либо неизвестно какие контакты
+        # изменились, то данные полностью записываются в файл
+        if not self.__journal or not ids:
+            with METRICS.timer('storage.write_full'):
+                data: Dict[str, Dict[str, str]] = self.__ordered_data()
+                write_file(
+                    self.__path, lambda contacts: json.dump(data, contacts, indent=4, ensure_ascii=False)
+                )
+            self.__stamp = self.__data_stamp()
+            METRICS.observe('storage.write_bytes', self.__stamp[0][2], SIZE_BUCKETS)
+            METRICS.count('storage.bytes_written', self.__stamp[0][2])
+            if self.__snapshot_path:
+                self.__rebuild_snapshot(data)
+            return
+
+        # Дозапись изменений в журнал, для удаленного контакта
+        # в журнал попадает None
+        with METRICS.timer('storage.write'):
+            written: int = self.__journal.append_many(
+                (contact_id, self.__data_for_work[contact_id].to_dict()
+                 if contact_id in self.__data_for_work else None)
+                for contact_id in ids
+            )
+        METRICS.observe('storage.write_bytes', written, SIZE_BUCKETS)
+        METRICS.count('storage.bytes_written', written)
+
+        # Сворачивание разросшегося журнала в новый файл с данными,
+        # в фоновый поток передается копия, чтобы дальнейшие
+        # изменения контактов не попали в записываемый снимок
+        if self.__journal.needs_compaction():
+            self.__journal.compact(self.__ordered_data())
+
+    def __write_shards(self, ids: Tuple[str, ...]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Перезаписывает части данных, в которых хранятся
+        переданные контакты (если контакты не переданы - все
+        части). Контакты части записываются в порядке имен.
+        '''
+
+        shards: Iterable[int] = sorted(
+            {shard_of(contact_id, self.__shards) for contact_id in ids}
+        ) if ids else range(self.__shards)
+        with METRICS.timer('storage.write_shards'):
+            for shard in shards:
+                written: int = write_shard(self.__path, shard, {
+                    key: self.__data_for_work[key].to_dict()
+                    for key in self.__order.order(self.__shard_ids[shard])
+                })
+                METRICS.observe('storage.write_bytes', written, SIZE_BUCKETS)
+                METRICS.count('storage.bytes_written', written)
+        self.__stamp = self.__data_stamp()
+
+    def __ordered_data(self) -> Dict[str, Dict[str, str]]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает копию данных контактов в порядке индекса имен
+        в виде словарей для записи в файл.
+        '''
+
+        return {key: self.__data_for_work[key].to_dict() for key in self.__order}
+
+    def __search_index(self) -> ContactIndex:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает индексы по характеристикам для поиска,
+        при первом обращении строит их.
+        '''
+
+        if self.__index is None:
+            with METRICS.timer('storage.build_index'):
+                self.__index = ContactIndex(list(FIELDS))
+                self.__index.build(self.__data_for_work.items())
+        return self.__index
+
+    def __rebuild_snapshot(self, data: Mapping[str, Mapping[str, str]]) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Перестраивает бинарный снимок по только что
+        записанному JSON-файлу. Ошибка записи снимка
+        не мешает работе: снимок будет перестроен
+        при следующем запуске.
+        '''
+
+        try:
+            write_snapshot(self.__snapshot_path, self.__path, data.items())
+        except OSError:
+            pass
+
+
+class SQLiteStorage(BaseStorage):
+    '''
+    Хранилище контактов в базе данных SQLite.
+    Данные не загружаются в память целиком, все операции
+    выполняются запросами по индексам базы:
+    - таблица contacts хранит контакты и ключ сортировки по имени,
+      по которому построен индекс для упорядоченного вывода;
+    - таблица terms хранит нормализованные значения характеристик
+      (для точного поиска и поиска по началу значения), а так же
+      номера телефонов и их перевернутые цифры (для поиска
+      владельца номера по последним цифрам);
+    - таблица grams хранит n-граммы значений для поиска по части значения,
+      а так же дополненные n-граммы (fuzzy_grams) для нечеткого поиска
+      по FUZZY_FIELDS под служебными "характеристиками" вида "~name".
+    Каждое изменение контакта выполняется одной транзакцией базы,
+    в транзакции хранилища (см. transaction) все изменения
+    выполняются одной транзакцией базы.
+    '''
+
+    # Схема базы данных
+    __schema: str = '''
+        CREATE TABLE IF NOT EXISTS contacts (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            surname TEXT NOT NULL,
+            desperation TEXT NOT NULL,
+            organization TEXT NOT NULL,
+            work_number TEXT NOT NULL,
+            personal_number TEXT NOT NULL,
+            sort_key TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS contacts_sort ON contacts (sort_key, id);
+        CREATE TABLE IF NOT EXISTS terms (
+            field TEXT NOT NULL,
+            term TEXT NOT NULL,
+            contact_id TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS terms_lookup ON terms (field, term);
+        CREATE INDEX IF NOT EXISTS terms_contact ON terms (contact_id, field);
+        CREATE TABLE IF NOT EXISTS grams (
+            field TEXT NOT NULL,
+            gram TEXT NOT NULL,
+            contact_id TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS grams_lookup ON grams (field, gram);
+        CREATE INDEX IF NOT EXISTS grams_contact ON grams (contact_id, field);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    '''
+
+    # Служебные "характеристики" в таблице terms для поиска по номеру
+    __number_field: str = '#number'
+    __reversed_field: str = '#reversed'
+
+    # Приставка служебных "характеристик" в таблице grams для нечеткого поиска
+    __fuzzy_prefix: str = '~'
+
+    # Символ, который больше любого другого, для поиска по началу значения
+    __max_char: str = '\U0010ffff'
+
+    # Кол-во параметров в одном запросе вида "IN (...)"
+    __chunk: int = 500
+
+    def __init__(self, path: str = 'data/contacts.db') -> None:
+        super().__init__()
+
+        # Создание директории для базы данных, если необходимо
+        directory: str = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Подключение к базе, создание схемы и подсчет контактов
+        with METRICS.timer('storage.load'):
+            self.__connection: sqlite3.Connection = sqlite3.connect(path)
+            self.__connection.executescript(self.__schema)
+            self.__count: int = self.__connection.execute(
+                'SELECT COUNT(*) FROM contacts'
+            ).fetchone()[0]
+
+        # Версия данных базы, меняется, когда изменения
+        # записывает другое подключение (другой процесс)
+        self.__data_version: int = self.__connection.execute('PRAGMA data_version').fetchone()[0]
+
+        # Заполнение n-грамм для нечеткого поиска в базе,
+        # созданной до его появления
+        self.__fill_fuzzy_grams()
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[str]:
+        for (contact_id,) in self.__connection.execute(
+            'SELECT id FROM contacts ORDER BY sort_key, id'
+        ):
+            yield contact_id
+
+    def __getitem__(self, index: slice) -> List[str]:
+        start, stop, _ = index.indices(self.__count)
+        return [
+            contact_id for (contact_id,) in self.__connection.execute(
+                'SELECT id FROM contacts ORDER BY sort_key, id LIMIT ? OFFSET ?',
+                (max(stop - start, 0), start)
+            )
+        ]
+
+    def get(self, contact_id: str) -> Optional[Contact]:
+        row: Optional[Tuple[str, ...]] = self.__connection.execute(
+            f'SELECT {", ".join(FIELDS)} FROM contacts WHERE id = ?', (contact_id,)
+        ).fetchone()
+        return Contact(**dict(zip(FIELDS, row))) if row else None
+
+    def items(self) -> Iterator[Tuple[str, Contact]]:
+        # Один запрос по индексу сортировки, строки читаются по мере обхода
+        for contact_id, *row in self.__connection.execute(
+            f'SELECT id, {", ".join(FIELDS)} FROM contacts ORDER BY sort_key, id'
+        ):
+            yield contact_id, Contact(**dict(zip(FIELDS, row)))
+
+    def add(self, contact: Contact) -> str:
+        # Запись контакта и его индексных записей одной транзакцией
+        contact_id: str = self._generate_id()
+        with METRICS.timer('storage.write'), self.__write():
+            self.__insert_contact(contact_id, contact)
+        self.__count += 1
+        self._touch(contact_id=contact_id)
+        self.__changed(1)
+        return contact_id
+
+    def add_many(self, contacts: List[Contact]) -> List[str]:
+        ids: List[str] = self._generate_ids(len(contacts))
+
+        # Запись всей пачки одной транзакцией
+        with METRICS.timer('storage.write'), self.__write():
+            for contact_id, contact in zip(ids, contacts):
+                self.__insert_contact(contact_id, contact)
+        self.__count += len(ids)
+        self._touch()
+        self.__changed(len(ids))
+        return ids
+
+    def update(self, contact_id: str, field: str, value: str) -> None:
+        contact: Optional[Contact] = self.get(contact_id)
+        if contact is None:
+            raise KeyError(contact_id)
+        contact[field] = self.prepare(field, value)
+
+        # Изменение контакта и индексных записей характеристики одной транзакцией
+        with METRICS.timer('storage.write'), self.__write():
+            self.__connection.execute(
+                f'UPDATE contacts SET {field} = ?, sort_key = ? WHERE id = ?',
+                (contact[field], normalize(contact['name']), contact_id)
+            )
+            self.__connection.execute(
+                'DELETE FROM terms WHERE contact_id = ? AND field = ?', (contact_id, field)
+            )
+            self.__connection.execute(
+                'DELETE FROM grams WHERE contact_id = ? AND field IN (?, ?)',
+                (contact_id, field, self.__fuzzy_prefix + field)
+            )
+            self.__insert_terms(contact_id, field, contact[field])
+
+            # Номера телефонов пересчитываются для обеих характеристик
+            if field in PHONE_FIELDS:
+                self.__connection.execute(
+                    'DELETE FROM terms WHERE contact_id = ? AND field IN (?, ?)',
+                    (contact_id, self.__number_field, self.__reversed_field)
+                )
+                self.__insert_number_terms(contact_id, contact)
+        self._touch((field,), contact_id)
+        self.__changed(1)
+
+    def remove(self, contact_id: str) -> None:
+        with METRICS.timer('storage.write'), self.__write():
+            removed: int = self.__connection.execute(
+                'DELETE FROM contacts WHERE id = ?', (contact_id,)
+            ).rowcount
+            if not removed:
+                raise KeyError(contact_id)
+            for table in ('terms', 'grams'):
+                self.__connection.execute(f'DELETE FROM {table} WHERE contact_id = ?', (contact_id,))
+        self.__count -= 1
+        self._touch(contact_id=contact_id)
+        self.__changed(1)
+
+    def find(self, field: str, value: str, mode: str = EXACT) -> Set[str]:
+        if field not in FIELDS:
+            raise KeyError(field)
+        key: str = normalize(value, field)
+        if empty_number(field, key):
+            return set()
+
+        # Нечеткий поиск - отдельный скрытый метод
+        if mode == FUZZY:
+            return self.__find_fuzzy(field, key)
+
+        # Точное совпадение и поиск по началу - запросы по индексу terms
+        if mode == EXACT:
+            return self.__select_ids(
+                'SELECT contact_id FROM terms WHERE field = ? AND term = ?', (field, key)
+            )
+        if mode == PREFIX:
+            return self.__select_ids(
+                'SELECT contact_id FROM terms WHERE field = ? AND term >= ? AND term < ?',
+                (field, key, key + self.__max_char)
+            )
+        if mode != SUBSTRING:
+            raise ValueError(f'Неизвестный режим поиска: {mode}')
+
+        # Для запросов короче n-граммы индекс не применим
+        if len(key) < GRAM_SIZE:
+            rows: Iterable[Tuple[str, str]] = self.__connection.execute(
+                'SELECT contact_id, term FROM terms WHERE field = ?', (field,)
+            )
+        else:
+            # Кандидаты - контакты, у которых есть все n-граммы запроса
+            query_grams: List[str] = sorted(grams(key))
+            rows = self.__connection.execute(
+                'SELECT contact_id, term FROM terms WHERE field = ? AND contact_id IN ('
+                '    SELECT contact_id FROM grams'
+                f'    WHERE field = ? AND gram IN ({", ".join("?" * len(query_grams))})'
+                '    GROUP BY contact_id HAVING COUNT(*) = ?'
+                ')',
+                (field, field, *query_grams, len(query_grams))
+            )
+
+        # Проверка кандидатов
+        return {contact_id for contact_id, term in rows if key in term}
+
+    def estimate(self, field: str, value: str, mode: str = EXACT) -> int:
+        if field not in FIELDS:
+            raise KeyError(field)
+        key: str = normalize(value, field)
+        if empty_number(field, key):
+            return 0
+
+        # Подсчет строк по индексам terms и grams без чтения контактов
+        if mode == EXACT:
+            query: str = 'SELECT COUNT(*) FROM terms WHERE field = ? AND term = ?'
+            params: Tuple = (field, key)
+        elif mode == PREFIX:
+            query = 'SELECT COUNT(*) FROM terms WHERE field = ? AND term >= ? AND term < ?'
+            params = (field, key, key + self.__max_char)
+        elif mode == SUBSTRING:
+            if len(key) < GRAM_SIZE:
+                return self.__count
+
+            # Верхняя граница - кол-во контактов с самой редкой n-граммой
+            return min(
+                self.__connection.execute(
+                    'SELECT COUNT(*) FROM grams WHERE field = ? AND gram = ?', (field, gram)
+                ).fetchone()[0]
+                for gram in grams(key)
+            )
+        elif mode == FUZZY:
+            # Похожих значений немного, поэтому оценка - точный размер
+            return len(self.__find_fuzzy(field, key))
+        else:
+            raise ValueError(f'Неизвестный режим поиска: {mode}')
+        return self.__connection.execute(query, params).fetchone()[0]
+
+    def lookup_number(self, number: str) -> Set[str]:
+        digits: str = number_tail(number)
+        if not digits:
+            return set()
+
+        # Полное совпадение номера
+        result: Set[str] = self.__select_ids(
+            'SELECT contact_id FROM terms WHERE field = ? AND term = ?',
+            (self.__number_field, digits)
+        )
+
+        # Совпадение окончания - поиск по началу перевернутого номера
+        if len(digits) >= MIN_SUFFIX:
+            reversed_digits: str = digits[::-1]
+            result |= self.__select_ids(
+                'SELECT contact_id FROM terms WHERE field = ? AND term >= ? AND term < ?',
+                (self.__reversed_field, reversed_digits, reversed_digits + self.__max_char)
+            )
+        return result
+
+    def order(self, ids: Set[str]) -> List[str]:
+        keys: Dict[str, str] = self.__sort_keys(ids)
+        return sorted(keys, key=lambda elem: (keys[elem], elem))
+
+    def position(self, prefix: str, ids: List[str] = None) -> int:
+        key: str = normalize(prefix)
+
+        # Поиск в переданном списке по ключам сортировки
+        if ids is not None:
+            keys: Dict[str, str] = self.__sort_keys(ids)
+            pos: int = bisect_left(ids, (key, ''), key=lambda elem: (keys[elem], elem))
+            if pos < len(ids) and keys[ids[pos]].startswith(key):
+                return pos
+            return -1
+
+        # Поиск первого подходящего контакта и подсчет
+        # контактов перед ним по индексу сортировки
+        row: Optional[Tuple[str]] = self.__connection.execute(
+            'SELECT sort_key FROM contacts WHERE sort_key >= ? ORDER BY sort_key, id LIMIT 1',
+            (key,)
+        ).fetchone()
+        if row is None or not row[0].startswith(key):
+            return -1
+        return self.__connection.execute(
+            'SELECT COUNT(*) FROM contacts WHERE sort_key < ?', (key,)
+        ).fetchone()[0]
+
+    def refresh(self) -> None:
+        # Данные читаются из базы при каждом обращении, заново
+        # считается только кол-во контактов, если базу изменил
+        # другой процесс (версия данных меняется только
+        # от изменений других подключений)
+        version: int = self.__connection.execute('PRAGMA data_version').fetchone()[0]
+        if version != self.__data_version:
+            self.__data_version = version
+            self.__count = self.__connection.execute('SELECT COUNT(*) FROM contacts').fetchone()[0]
+            self._touch()
+
+    def close(self) -> None:
+        self.__connection.close()
+
+    def _flush(self) -> None:
+        self.__connection.commit()
+
+    def _rollback(self) -> None:
+        # Отмена транзакции базы, в том числе резервирования
+        # идентификаторов, поэтому блок распределителя сбрасывается
+        self.__connection.rollback()
+        self._allocator.reset()
+        self.__count = self.__connection.execute('SELECT COUNT(*) FROM contacts').fetchone()[0]
+        self._touch()
+
+    def _reserve_ids(self, size: int) -> int:
+        # Граница выданных идентификаторов хранится в таблице meta.
+        # Сдвиг границы идет первым запросом, он начинает транзакцию
+        # записи, поэтому другой процесс не прочитает ту же границу
+        with self.__write():
+            moved: int = self.__connection.execute(
+                "UPDATE meta SET value = value + ? WHERE key = 'next_id'", (size,)
+            ).rowcount
+            if moved:
+                return self.__connection.execute(
+                    "SELECT value FROM meta WHERE key = 'next_id'"
+                ).fetchone()[0] - size
+
+            # Если границы еще нет - выдача начинается
+            # после наибольшего существующего идентификатора
+            start: int = self._max_id(
+                contact_id for (contact_id,) in self.__connection.execute('SELECT id FROM contacts')
+            ) + 1
+            self.__connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('next_id', ?)", (start + size,)
+            )
+        return start
+
+    def __write(self) -> ContextManager:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает контекстный менеджер для изменения базы:
+        вне транзакции хранилища изменения сохраняются сразу
+        при выходе из блока, в транзакции - при ее сохранении.
+        '''
+
+        return nullcontext() if self._in_transaction() else self.__connection
+
+    def __changed(self, count: int) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Отмечает изменения, выполненные в транзакции хранилища.
+        '''
+
+        if self._in_transaction():
+            self._changed(count)
+
+    def __insert_contact(self, contact_id: str, contact: Contact) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Записывает контакт и все его индексные записи,
+        номера телефонов приводятся к каноническому виду.
+        Вызывается внутри транзакции.
+        '''
+
+        for field in PHONE_FIELDS:
+            contact[field] = self.prepare(field, contact[field])
+        self.__connection.execute(
+            f'INSERT INTO contacts (id, {", ".join(FIELDS)}, sort_key) '
+            f'VALUES (?, {", ".join("?" * len(FIELDS))}, ?)',
+            (contact_id, *(contact[field] for field in FIELDS), normalize(contact['name']))
+        )
+        for field in FIELDS:
+            self.__insert_terms(contact_id, field, contact[field])
+        self.__insert_number_terms(contact_id, contact)
+
+    def __insert_terms(self, contact_id: str, field: str, value: str) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Добавляет индексные записи одной характеристики контакта.
+        '''
+
+        key: str = normalize(value, field)
+        self.__connection.execute(
+            'INSERT INTO terms (field, term, contact_id) VALUES (?, ?, ?)',
+            (field, key, contact_id)
+        )
+        self.__connection.executemany(
+            'INSERT INTO grams (field, gram, contact_id) VALUES (?, ?, ?)',
+            ((field, gram, contact_id) for gram in grams(key))
+        )
+        if field in FUZZY_FIELDS:
+            self.__connection.executemany(
+                'INSERT INTO grams (field, gram, contact_id) VALUES (?, ?, ?)',
+                ((self.__fuzzy_prefix + field, gram, contact_id) for gram in fuzzy_grams(key))
+            )
+
+    def __insert_number_terms(self, contact_id: str, contact: Contact) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Добавляет записи для поиска владельца по номерам контакта.
+        '''
+
+        for field in PHONE_FIELDS:
+            digits: str = canonical_number(contact[field])
+            if digits:
+                self.__connection.executemany(
+                    'INSERT INTO terms (field, term, contact_id) VALUES (?, ?, ?)',
+                    (
+                        (self.__number_field, digits, contact_id),
+                        (self.__reversed_field, digits[::-1], contact_id)
+                    )
+                )
+
+    def __find_fuzzy(self, field: str, key: str) -> Set[str]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Нечеткий поиск по нормализованному значению: кандидаты -
+        контакты, у которых не меньше fuzzy_threshold общих
+        с запросом n-грамм, для них считается расстояние Левенштейна.
+        '''
+
+        if field not in FUZZY_FIELDS:
+            raise ValueError(f'Нечеткий поиск по характеристике {field} недоступен')
+        limit: int = fuzzy_limit(key)
+        threshold: int = fuzzy_threshold(key)
+
+        # Если порог не задан (запрос из повторяющихся
+        # символов), проверяются все значения характеристики
+        if threshold > 0:
+            query_grams: List[str] = sorted(fuzzy_grams(key))
+            rows: Iterable[Tuple[str, str]] = self.__connection.execute(
+                'SELECT contact_id, term FROM terms WHERE field = ? AND contact_id IN ('
+                '    SELECT contact_id FROM grams'
+                f'    WHERE field = ? AND gram IN ({", ".join("?" * len(query_grams))})'
+                '    GROUP BY contact_id HAVING COUNT(*) >= ?'
+                ')',
+                (field, self.__fuzzy_prefix + field, *query_grams, threshold)
+            )
+        else:
+            rows = self.__connection.execute(
+                'SELECT contact_id, term FROM terms WHERE field = ?', (field,)
+            )
+
+        # Проверка кандидатов по расстоянию Левенштейна
+        return {
+            contact_id for contact_id, term in rows
+            if edit_distance(key, term, limit) <= limit
+        }
+
+    def __fill_fuzzy_grams(self) -> None:
+        '''
+        Скрытый метод для работы внутри класса.
+        Один раз добавляет n-граммы для нечеткого поиска
+        по уже записанным контактам, факт заполнения
+        отмечается в таблице meta.
+        '''
+
+        with self.__connection:
+            if self.__connection.execute(
+                "SELECT value FROM meta WHERE key = 'fuzzy_grams'"
+            ).fetchone():
+                return
+            rows: List[Tuple[str, str, str]] = self.__connection.execute(
+                f'SELECT field, term, contact_id FROM terms '
+                f'WHERE field IN ({", ".join("?" * len(FUZZY_FIELDS))})',
+                FUZZY_FIELDS
+            ).fetchall()
+            self.__connection.executemany(
+                'INSERT INTO grams (field, gram, contact_id) VALUES (?, ?, ?)',
+                (
+                    (self.__fuzzy_prefix + field, gram, contact_id)
+                    for field, term, contact_id in rows for gram in fuzzy_grams(term)
+                )
+            )
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fuzzy_grams', 1)"
+            )
+
+    def __select_ids(self, query: str, params: Tuple) -> Set[str]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Выполняет запрос и возвращает множество идентификаторов.
+        '''
+
+        return {contact_id for (contact_id,) in self.__connection.execute(query, params)}
+
+    def __sort_keys(self, ids: Iterable[str]) -> Dict[str, str]:
+        '''
+        Скрытый метод для работы внутри класса.
+        Возвращает ключи сортировки переданных контактов,
+        запросы выполняются порциями.
+        '''
+
+        ids = list(ids)
+        keys: Dict[str, str] = dict()
+        for pos in range(0, len(ids), self.__chunk):
+            chunk: List[str] = ids[pos:pos + self.__chunk]
+            keys.update(self.__connection.execute(
+                f'SELECT id, sort_key FROM contacts WHERE id IN ({", ".join("?" * len(chunk))})',
+                chunk
+            ))
+        return keys
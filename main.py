@@ -1,6 +1,15 @@
 from typing import Dict, Any
 from cl_ph_book import PhoneBook
-import os
+from cl_metrics import METRICS
+from cl_render import SCREEN
+from cl_storage import BaseStorage, JSONStorage, SQLiteStorage
+from sharding import SHARD_COUNT, shard_dir
+from functools import partial
+import argparse
+import json
+import batch
+import server
+import sys
 
 
 def event_loop() -> None:
@@ -13,32 +22,178 @@ def event_loop() -> None:
     while True:
 
         # Вывод "меню"
-        answer: str = input(
+        answer: str = SCREEN.input(
             'Выберите необходимое действие:\n'
             '1 - Показать записи в справочнике\n'
             '2 - Добавить запись\n'
             '3 - Удалить запись\n'
             '4 - Редактировать запись\n'
             '5 - Поиск контактов\n'
+            '6 - Определить владельца номера\n'
+            '7 - Импорт контактов из файла\n'
+            '8 - Экспорт контактов в файл\n'
+            '9 - Поиск и объединение дубликатов\n'
             '0 - Выход\n'
             '-> '
         )
-        os.system('cls' if os.name == 'nt' else 'clear')
+        SCREEN.clear()
 
         # Проверка ответа
         if answer == '0':
             break
+
+        # Получение изменений, сделанных другими
+        # процессами с тем же хранилищем
+        ph_bk.refresh()
+        action: Any = button_dict.get(answer)
         try:
             # Попытка запуска одного из методов класса
-            button_dict.get(answer)()
+            # с замером времени выполнения действия
+            with METRICS.timer(f'menu.{getattr(action, "__name__", "unknown")}'):
+                action()
         except TypeError:
-            print(
+            SCREEN.print(
                 '\tВведена неверная команда!\n'
                 '\tПопробуйте еще раз.\n'
                 f'{"-" * 41}'
             )
 
 
+def parse_args() -> argparse.Namespace:
+    '''
+    Ф-ция для разбора аргументов командной строки.
+    '''
+
+    parser = argparse.ArgumentParser(description='Телефонный справочник')
+    parser.add_argument(
+        '--storage', choices=('json', 'sqlite'), default='json',
+        help='хранилище контактов: JSON-файл (по умолчанию) или база SQLite'
+    )
+    parser.add_argument(
+        '--path', default=None,
+        help='путь к файлу хранилища (data/contacts.json или data/contacts.db)'
+    )
+    parser.add_argument(
+        '--snapshot', action='store_true',
+        help='ускорить запуск с JSON-хранилищем за счет бинарного снимка данных'
+    )
+    parser.add_argument(
+        '--migrate-shards', dest='shards', metavar='N', type=int, nargs='?', const=SHARD_COUNT, default=None,
+        help=f'разбить JSON-файл на N частей (по умолчанию {SHARD_COUNT}), изменение контакта '
+             'перезаписывает только его часть, а части читаются параллельно; после разбиения '
+             'JSON-файл и журнал удаляются'
+    )
+    parser.add_argument(
+        '--import', dest='import_path', metavar='FILE', default=None,
+        help='импортировать контакты из файла .csv или .jsonl и выйти'
+    )
+    parser.add_argument(
+        '--export', dest='export_path', metavar='FILE', default=None,
+        help='экспортировать контакты в файл .csv или .jsonl и выйти'
+    )
+    parser.add_argument(
+        '--batch', dest='batch_path', metavar='FILE', default=None,
+        help='выполнить команды JSON Lines из файла ("-" - из stdin) '
+             'и вывести результаты JSON Lines в stdout'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help='кол-во параллельных обработчиков читающих команд в режиме --batch'
+    )
+    parser.add_argument(
+        '--pool', choices=('process', 'thread'), default='process',
+        help='пул обработчиков: процессы (по умолчанию) или потоки'
+    )
+    parser.add_argument(
+        '--serve', action='store_true',
+        help='запустить сервер справочника (протокол JSON Lines, как в --batch)'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='адрес сервера для --serve')
+    parser.add_argument('--port', type=int, default=8765, help='порт сервера для --serve')
+    parser.add_argument(
+        '--stats', metavar='FILE', nargs='?', const='-', default=None,
+        help='собирать метрики (время этапов, записанные байты) и при завершении '
+             'вывести их в JSON в stderr или в файл; в --batch и --serve доступна команда "stats"'
+    )
+    return parser.parse_args()
+
+
+def dump_stats(path: str) -> None:
+    '''
+    Ф-ция выводит собранные метрики в формате JSON
+    в stderr ("-") или в файл.
+    '''
+
+    text: str = json.dumps(METRICS.snapshot(), ensure_ascii=False, indent=4)
+    if path == '-':
+        print(text, file=sys.stderr)
+        return
+    with open(path, 'w', encoding='utf-8') as stats:
+        stats.write(text)
+
+
+def run_transfer(ph_bk: PhoneBook, args: argparse.Namespace) -> None:
+    '''
+    Ф-ция для импорта и экспорта контактов из командной
+    строки без запуска интерактивного меню.
+    '''
+
+    if args.import_path:
+        added, errors = ph_bk.import_file(args.import_path)
+        for error in errors:
+            print(error, file=sys.stderr)
+        print(f'Добавлено контактов: {added}, пропущено строк: {len(errors)}')
+    if args.export_path:
+        print(f'Выгружено контактов: {ph_bk.export_file(args.export_path)}')
+
+
+def run_batch(ph_bk: PhoneBook, args: argparse.Namespace) -> None:
+    '''
+    Ф-ция для пакетной обработки команд из файла
+    или stdin без запуска интерактивного меню.
+    '''
+
+    source = sys.stdin if args.batch_path == '-' else open(args.batch_path, 'r', encoding='utf-8')
+    try:
+        total, errors = batch.run(
+            ph_bk, source, sys.stdout, workers=args.workers, pool=args.pool,
+            storage_factory=partial(create_storage, args)
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f'Выполнено команд: {total}, с ошибками: {errors}', file=sys.stderr)
+
+
+def migrate_shards(storage: BaseStorage, args: argparse.Namespace) -> None:
+    '''
+    Ф-ция для разбиения JSON-файла с контактами на части
+    из командной строки без запуска интерактивного меню.
+    '''
+
+    if not isinstance(storage, JSONStorage):
+        sys.exit('Разбиение на части доступно только для JSON-хранилища')
+    try:
+        storage.split_into_shards(args.shards)
+    except ValueError as error:
+        sys.exit(str(error))
+    print(
+        f'Контакты ({len(storage)}) разбиты на части ({args.shards}): '
+        f'{shard_dir(args.path or "data/contacts.json")}'
+    )
+
+
+def create_storage(args: argparse.Namespace) -> BaseStorage:
+    '''
+    Ф-ция создает хранилище контактов в соответствии
+    с аргументами командной строки.
+    '''
+
+    if args.storage == 'sqlite':
+        return SQLiteStorage(args.path or 'data/contacts.db')
+    return JSONStorage(args.path or 'data/contacts.json', use_snapshot=args.snapshot)
+
+
 def main() -> None:
     '''
     Главная ф-ция, отвечает за вызов основных циклов событий,
@@ -47,8 +202,8 @@ def main() -> None:
     '''
 
     # Очистка экрана и вывод названия программы
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print(
+    SCREEN.clear()
+    SCREEN.print(
         '\tТелефонный справочник (v0.9)\n'
         f'{"-" * 45}'
     )
@@ -59,15 +214,43 @@ def main() -> None:
 
 if __name__ == '__main__':
 
-    # Создание объекта класса "PhoneBook" и словаря с "кнопками"
-    ph_bk: PhoneBook = PhoneBook()
+    # Создание объекта класса "PhoneBook" с выбранным
+    # хранилищем и словаря с "кнопками"
+    args: argparse.Namespace = parse_args()
+    if args.stats:
+        METRICS.enable()
+    try:
+        storage: BaseStorage = create_storage(args)
+    except ValueError as error:
+        sys.exit(str(error))
+    ph_bk: PhoneBook = PhoneBook(storage)
     button_dict: Dict[str, Any] = {
         '1': ph_bk.show_contacts,
         '2': ph_bk.add_contact,
         '3': ph_bk.remove_contact,
         '4': ph_bk.edit_contact,
-        '5': ph_bk.find_contact
+        '5': ph_bk.find_contact,
+        '6': ph_bk.caller_id,
+        '7': ph_bk.import_contacts,
+        '8': ph_bk.export_contacts,
+        '9': ph_bk.merge_duplicates
     }
 
-    # Запуск главной ф-ции
-    main()
+    # Запуск сервера, пакетной обработки, импорта/экспорта из командной
+    # строки или главной ф-ции и завершение работы со справочником
+    try:
+        if args.shards is not None:
+            migrate_shards(storage, args)
+        elif args.serve:
+            server.serve(ph_bk, args.host, args.port)
+        elif args.batch_path:
+            run_batch(ph_bk, args)
+        elif args.import_path or args.export_path:
+            run_transfer(ph_bk, args)
+        else:
+            main()
+    finally:
+        SCREEN.flush()
+        ph_bk.close()
+        if args.stats:
+            dump_stats(args.stats)
@@ -0,0 +1,166 @@
+from typing import Any, Dict, List, Tuple
+import asyncio
+import json
+import signal
+import sys
+
+from batch import WRITE_OPS, execute
+from cl_ph_book import PhoneBook
+
+
+# Наибольшая длина одной строки запроса в байтах
+MAX_LINE: int = 1024 * 1024
+
+
+async def write_loop(ph_bk: PhoneBook, writes: asyncio.Queue) -> None:
+    '''
+    Задача единственного писателя: по очереди выполняет
+    изменяющие команды из очереди и передает результат
+    ожидающему клиенту. Читающие команды выполняются
+    без очереди. Запись изменений выполняется в цикле
+    событий, поэтому на время записи чтение приостанавливается:
+    с журналом (JSON-хранилище по умолчанию) это только
+    дозапись строки, а перезапись файла идет в фоновом
+    потоке; без журнала, с данными, разбитыми на части,
+    и в SQLite чтение ждет записи файла (части, базы).
+    Все команды, накопившиеся в очереди, выполняются
+    одной транзакцией, а клиенты получают ответ после
+    записи изменений (или ошибку, если записать
+    изменения не удалось).
+    '''
+
+    while True:
+        # Ожидание первой команды и выборка остальных накопившихся
+        batch: List[Tuple[Any, asyncio.Future]] = [await writes.get()]
+        while not writes.empty():
+            batch.append(writes.get_nowait())
+
+        # Если изменения не удалось сохранить (транзакция при этом
+        # отменяется), ошибку получают все клиенты пачки,
+        # а писатель продолжает работу
+        try:
+            with ph_bk.transaction():
+                responses: List[Dict[str, Any]] = [execute(ph_bk, command) for command, _ in batch]
+        except Exception as error:
+            print(f'Не удалось сохранить изменения: {error!r}', file=sys.stderr)
+            responses = [
+                {**({'ref': command['ref']} if isinstance(command, dict) and 'ref' in command else dict()),
+                 'ok': False, 'error': f'не удалось сохранить изменения: {error}'}
+                for command, _ in batch
+            ]
+
+        for (_, future), response in zip(batch, responses):
+            if not future.cancelled():
+                future.set_result(response)
+            writes.task_done()
+
+
+async def send(writer: asyncio.StreamWriter, response: Dict[str, Any]) -> None:
+    '''
+    Ф-ция отправляет клиенту ответ одной строкой JSON.
+    '''
+
+    writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+    await writer.drain()
+
+
+async def handle_client(ph_bk: PhoneBook, writes: asyncio.Queue,
+                        reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    '''
+    Обработчик подключения клиента. Протокол - JSON Lines:
+    одна команда (как в пакетном режиме, см. batch.execute)
+    на строку, ответ на каждую команду - одна строка JSON
+    в порядке поступления команд.
+    '''
+
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+
+            # Чтение строки запроса, пустая строка - клиент отключился
+            try:
+                line: bytes = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                await send(writer, {'ok': False, 'error': 'слишком длинный запрос'})
+                break
+            if not line:
+                break
+            if not line.strip():
+                continue
+
+            # Разбор команды
+            try:
+                command: Any = json.loads(line)
+            except (json.decoder.JSONDecodeError, UnicodeDecodeError):
+                command = None
+
+            # Изменяющие команды передаются писателю,
+            # остальные выполняются сразу
+            if isinstance(command, dict) and command.get('op') in WRITE_OPS:
+                future: asyncio.Future = loop.create_future()
+                await writes.put((command, future))
+                response: Dict[str, Any] = await future
+            else:
+                response = execute(ph_bk, command)
+
+            await send(writer, response)
+    except (ConnectionError, asyncio.CancelledError):
+        # Клиент отключился или сервер останавливается
+        pass
+    finally:
+        writer.close()
+
+
+async def start(ph_bk: PhoneBook, host: str, port: int) -> Tuple[asyncio.AbstractServer, asyncio.Task]:
+    '''
+    Ф-ция запускает сервер и задачу писателя.
+    Возвращает объект сервера и задачу писателя.
+    '''
+
+    writes: asyncio.Queue = asyncio.Queue()
+    writer_task: asyncio.Task = asyncio.create_task(write_loop(ph_bk, writes))
+    server: asyncio.AbstractServer = await asyncio.start_server(
+        lambda reader, writer: handle_client(ph_bk, writes, reader, writer),
+        host, port, limit=MAX_LINE
+    )
+    return server, writer_task
+
+
+async def serve_forever(ph_bk: PhoneBook, host: str, port: int) -> None:
+    '''
+    Ф-ция запускает сервер и обслуживает клиентов до остановки.
+    '''
+
+    server, writer_task = await start(ph_bk, host, port)
+    addresses: str = ', '.join(
+        '{}:{}'.format(*sock.getsockname()[:2]) for sock in server.sockets
+    )
+    print(f'Сервер справочника запущен: {addresses}', file=sys.stderr)
+
+    # Остановка по сигналу завершения (SIGTERM), там где
+    # поддерживаются обработчики сигналов цикла событий
+    stopped: asyncio.Event = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+    except (NotImplementedError, AttributeError):
+        pass
+
+    try:
+        async with server:
+            await stopped.wait()
+    finally:
+        writer_task.cancel()
+
+
+def serve(ph_bk: PhoneBook, host: str = '127.0.0.1', port: int = 8765) -> None:
+    '''
+    Ф-ция для запуска сервера справочника, справочник
+    загружается один раз и обслуживает всех клиентов.
+    Останавливается по Ctrl+C или сигналу SIGTERM.
+    '''
+
+    ph_bk.warm_up()
+    try:
+        asyncio.run(serve_forever(ph_bk, host, port))
+    except KeyboardInterrupt:
+        print('Сервер остановлен', file=sys.stderr)
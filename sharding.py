@@ -0,0 +1,154 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import zlib
+import json
+import os
+
+from cl_contact import FIELDS
+from cl_file_lock import file_stamp, write_file
+
+
+# Кол-во частей по умолчанию при разбиении данных
+SHARD_COUNT: int = 16
+
+# Общий размер частей в байтах, начиная с которого они
+# читаются параллельно в пуле процессов (для небольших
+# данных запуск процессов дольше самого чтения)
+PARALLEL_LOAD_SIZE: int = 8 * 1024 * 1024
+
+# Имя файла с описанием разбиения (кол-во частей)
+MANIFEST: str = 'manifest.json'
+
+
+def shard_dir(path: str) -> str:
+    '''
+    Ф-ция возвращает путь к директории с частями данных
+    для JSON-файла, например "data/contacts.shards".
+    '''
+
+    return os.path.splitext(path)[0] + '.shards'
+
+
+def shard_path(path: str, shard: int) -> str:
+    '''
+    Ф-ция возвращает путь к файлу части данных с номером shard.
+    '''
+
+    return os.path.join(shard_dir(path), f'{shard:03d}.json')
+
+
+def shard_count(path: str) -> int:
+    '''
+    Ф-ция возвращает кол-во частей, на которые разбиты
+    данные JSON-файла, или 0, если данные не разбиты.
+    '''
+
+    try:
+        with open(os.path.join(shard_dir(path), MANIFEST), 'r', encoding='utf-8') as manifest:
+            count: Any = json.load(manifest).get('shards')
+    except FileNotFoundError:
+        return 0
+    except (json.decoder.JSONDecodeError, AttributeError) as error:
+        raise ValueError(f'Описание частей данных {shard_dir(path)} повреждено: {error}') from error
+    if not isinstance(count, int) or count < 1:
+        raise ValueError(f'Описание частей данных {shard_dir(path)} повреждено: shards = {count}')
+    return count
+
+
+def shard_of(contact_id: str, count: int) -> int:
+    '''
+    Ф-ция возвращает номер части, в которой хранится контакт:
+    остаток от деления хэша идентификатора (crc32, одинаков
+    во всех процессах, в отличие от hash) на кол-во частей.
+    '''
+
+    return zlib.crc32(contact_id.encode('utf-8')) % count
+
+
+def shard_stamps(path: str, count: int) -> Tuple[Optional[Tuple[int, int, int]], ...]:
+    '''
+    Ф-ция возвращает отметки состояния описания и всех частей
+    данных, по изменению которых процесс узнает, что данные
+    изменил другой процесс.
+    '''
+
+    return (file_stamp(os.path.join(shard_dir(path), MANIFEST)),) + tuple(
+        file_stamp(shard_path(path, shard)) for shard in range(count)
+    )
+
+
+def read_shard(shard_file: str) -> List[Tuple[str, ...]]:
+    '''
+    Ф-ция читает файл части данных. Возвращает строки
+    "идентификатор, характеристики в порядке FIELDS" -
+    кортежи передаются из процесса пула быстрее словарей.
+    Отсутствующая часть (в ней еще нет контактов) - пустой список.
+    '''
+
+    try:
+        with open(shard_file, 'r', encoding='utf-8') as shard:
+            data: Dict[str, Dict[str, str]] = json.load(shard)
+    except FileNotFoundError:
+        return list()
+    except json.decoder.JSONDecodeError as error:
+        raise ValueError(f'Файл с контактами {shard_file} поврежден: {error}') from error
+    return [
+        (contact_id, *(record.get(field, '') for field in FIELDS)) for contact_id, record in data.items()
+    ]
+
+
+def load_shards(path: str, count: int, workers: int = None) -> Iterable[List[Tuple[str, ...]]]:
+    '''
+    Ф-ция читает все части данных по порядку номеров
+    (см. read_shard). Большие данные читаются параллельно
+    в пуле из workers процессов (по умолчанию - по кол-ву
+    ядер), разбор JSON каждой части идет в своем процессе.
+    '''
+
+    paths: List[str] = [shard_path(path, shard) for shard in range(count)]
+    size: int = sum(os.path.getsize(elem) for elem in paths if os.path.exists(elem))
+
+    # Последовательное чтение небольших данных, а так же внутри
+    # дочернего процесса (например процесса пула пакетной
+    # обработки), чтобы каждый из них не запускал свой пул
+    # (флаг daemon у процессов ProcessPoolExecutor не установлен)
+    workers = min(workers or os.cpu_count() or 1, count)
+    if workers < 2 or size < PARALLEL_LOAD_SIZE or multiprocessing.parent_process() is not None:
+        return [read_shard(elem) for elem in paths]
+
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(read_shard, paths))
+
+
+def write_shard(path: str, shard: int, data: Mapping[str, Mapping[str, str]]) -> int:
+    '''
+    Ф-ция атомарно записывает часть данных с номером shard.
+    Возвращает размер записанного файла в байтах.
+    '''
+
+    shard_file: str = shard_path(path, shard)
+    write_file(shard_file, lambda contacts: json.dump(data, contacts, indent=4, ensure_ascii=False))
+    return os.path.getsize(shard_file)
+
+
+def write_shards(path: str, count: int, data: Mapping[str, Mapping[str, str]]) -> None:
+    '''
+    Ф-ция для разбиения данных на count частей по хэшу
+    идентификатора. Сначала записываются все части, последним -
+    описание разбиения, поэтому, пока оно не записано,
+    данные остаются в прежнем JSON-файле.
+    '''
+
+    # Распределение контактов по частям с сохранением порядка
+    shards: List[Dict[str, Mapping[str, str]]] = [dict() for _ in range(count)]
+    for contact_id, record in data.items():
+        shards[shard_of(contact_id, count)][contact_id] = record
+
+    os.makedirs(shard_dir(path), exist_ok=True)
+    for shard, records in enumerate(shards):
+        write_shard(path, shard, records)
+    write_file(
+        os.path.join(shard_dir(path), MANIFEST),
+        lambda manifest: json.dump({'shards': count}, manifest)
+    )
@@ -0,0 +1,69 @@
+from typing import Dict, List
+import unittest
+import tempfile
+import shutil
+import os
+
+from cl_contact import Contact
+from cl_storage import BaseStorage, JSONStorage, SQLiteStorage
+
+
+# Контакты для проверок: номера в разных форматах,
+# в том числе один номер с кодом страны "8" и "+7"
+CONTACTS: List[Dict[str, str]] = [
+    {'name': 'Иван', 'surname': 'Петров', 'organization': 'Яндекс',
+     'work_number': '8 (495) 123-45-67', 'personal_number': ''},
+    {'name': 'Мария', 'surname': 'Иванова', 'organization': 'Газпром',
+     'work_number': '111-11-11', 'personal_number': '+7 916 000-11-22'},
+    {'name': 'Алексей', 'surname': 'Смирнов', 'organization': 'Яндекс',
+     'work_number': '222-22-22', 'personal_number': '89160001122'},
+    {'name': 'Анна', 'surname': 'Соколова', 'organization': '',
+     'work_number': '', 'personal_number': ''},
+]
+
+
+class StorageTestCase(unittest.TestCase):
+    '''
+    Базовый класс проверок с хранилищами: каждая проверка
+    работает во временной директории, файлы удаляются
+    после проверки.
+    '''
+
+    def setUp(self) -> None:
+        self.directory: str = tempfile.mkdtemp()
+        self.storages: List[BaseStorage] = list()
+
+    def tearDown(self) -> None:
+        for storage in self.storages:
+            storage.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, name: str) -> str:
+        '''
+        Метод возвращает путь к файлу во временной директории.
+        '''
+
+        return os.path.join(self.directory, name)
+
+    def open_storage(self, kind: str, **kwargs) -> BaseStorage:
+        '''
+        Метод открывает хранилище ("json" или "sqlite")
+        во временной директории.
+        '''
+
+        if kind == 'sqlite':
+            storage: BaseStorage = SQLiteStorage(self.path('contacts.db'))
+        else:
+            storage = JSONStorage(self.path('contacts.json'), **kwargs)
+        self.storages.append(storage)
+        return storage
+
+    def filled_storage(self, kind: str, **kwargs) -> BaseStorage:
+        '''
+        Метод открывает хранилище и добавляет в него CONTACTS.
+        Идентификаторы сохраняются в self.ids в том же порядке.
+        '''
+
+        storage: BaseStorage = self.open_storage(kind, **kwargs)
+        self.ids: List[str] = storage.add_many([Contact.from_dict(elem) for elem in CONTACTS])
+        return storage
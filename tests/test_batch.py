@@ -0,0 +1,112 @@
+from typing import Any, Dict, List
+import unittest
+import json
+import io
+
+import batch
+from cl_ph_book import PhoneBook
+from tests.base import StorageTestCase
+
+
+class BatchTest(StorageTestCase):
+    '''
+    Пакетный режим: выполнение команд и проверка их аргументов.
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.ph_bk: PhoneBook = PhoneBook(self.filled_storage('json'))
+
+    def run_batch(self, commands: List[Any], **kwargs) -> List[Dict[str, Any]]:
+        '''
+        Метод выполняет команды пакетом и возвращает ответы.
+        '''
+
+        source: io.StringIO = io.StringIO(''.join(json.dumps(elem) + '\n' for elem in commands))
+        target: io.StringIO = io.StringIO()
+        batch.run(self.ph_bk, source, target, **kwargs)
+        return [json.loads(line) for line in target.getvalue().splitlines()]
+
+    def test_list_pages(self) -> None:
+        response: Dict[str, Any] = batch.execute(self.ph_bk, {'op': 'list', 'offset': 1, 'limit': '2'})
+        self.assertTrue(response['ok'])
+        self.assertEqual(response['result']['total'], 4)
+        self.assertEqual([elem['name'] for elem in response['result']['contacts']], ['Анна', 'Иван'])
+
+    def test_invalid_numbers_rejected(self) -> None:
+        for command in (
+            {'op': 'list', 'offset': 0, 'limit': -1},
+            {'op': 'list', 'offset': -1},
+            {'op': 'list', 'limit': 1e400},
+            {'op': 'list', 'limit': 2.5},
+            {'op': 'list', 'offset': True},
+            {'op': 'list', 'limit': 'x'},
+            {'op': 'find', 'criteria': [{'field': 'name', 'value': 'а', 'mode': 'substring'}], 'limit': -1},
+            {'op': 'lookup', 'number': '1111111', 'limit': '-2'},
+            {'op': 'duplicates', 'limit': -1},
+        ):
+            with self.subTest(command=command):
+                response: Dict[str, Any] = batch.execute(self.ph_bk, command)
+                self.assertFalse(response['ok'])
+                self.assertIn('некорректное значение', response['error'])
+
+    def test_find_criteria(self) -> None:
+        response: Dict[str, Any] = batch.execute(self.ph_bk, {
+            'op': 'find', 'join': 'and', 'criteria': [
+                {'field': 'organization', 'value': 'яндекс'},
+                {'field': 'name', 'value': 'Иван', 'not': True}
+            ]
+        })
+        self.assertEqual([elem['id'] for elem in response['result']['contacts']], [self.ids[2]])
+
+        # Запрос по номеру без цифр не находит контактов
+        response = batch.execute(self.ph_bk, {
+            'op': 'find', 'criteria': [{'field': 'work_number', 'value': 'x', 'mode': 'prefix'}]
+        })
+        self.assertEqual(response['result']['total'], 0)
+
+    def test_errors_and_ref(self) -> None:
+        responses: List[Dict[str, Any]] = self.run_batch([
+            {'op': 'get', 'id': 'нет', 'ref': 1},
+            {'op': 'нет'},
+            [1, 2],
+            {'op': 'find', 'criteria': [{'field': 'age', 'value': '1'}]},
+        ])
+        self.assertEqual([elem['ok'] for elem in responses], [False] * 4)
+        self.assertEqual(responses[0]['ref'], 1)
+        self.assertEqual([elem['line'] for elem in responses], [1, 2, 3, 4])
+
+    def test_writes_run_in_one_transaction(self) -> None:
+        responses: List[Dict[str, Any]] = self.run_batch([
+            {'op': 'add', 'contact': {'name': 'Олег', 'work_number': '333-33-33'}},
+            {'op': 'add', 'contact': {'name': '\ud800'}},
+            {'op': 'update', 'id': self.ids[0], 'fields': {'organization': 'Тесла'}},
+            {'op': 'remove', 'id': self.ids[3]},
+            {'op': 'count'},
+        ])
+        self.assertEqual([elem['ok'] for elem in responses], [True, False, True, True, True])
+        self.assertIn('недопустимые символы', responses[1]['error'])
+        self.assertEqual(responses[-1]['result'], 4)
+
+        # Изменения сохранены: новое хранилище видит их
+        reopened = self.open_storage('json')
+        self.assertEqual(len(reopened), 4)
+        self.assertEqual(reopened.get(self.ids[0])['organization'], 'Тесла')
+
+    def test_workers_see_earlier_writes(self) -> None:
+        commands: List[Any] = [{'op': 'lookup', 'number': '45-67'}] * 10 + [
+            {'op': 'add', 'contact': {'name': 'Олег', 'work_number': '8 495 000-45-67'}},
+        ] + [{'op': 'lookup', 'number': '45-67'}] * 10 + [{'op': 'count'}]
+        responses: List[Dict[str, Any]] = self.run_batch(
+            commands, workers=2, pool='thread',
+            storage_factory=lambda: self.open_storage('json')
+        )
+        self.assertEqual([elem['line'] for elem in responses], list(range(1, 23)))
+        self.assertTrue(all(elem['ok'] for elem in responses))
+        self.assertEqual({elem['result']['total'] for elem in responses[:10]}, {1})
+        self.assertEqual({elem['result']['total'] for elem in responses[11:21]}, {2})
+        self.assertEqual(responses[-1]['result'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+import contextlib
+import unittest
+import io
+
+from benchmarks import bench
+from benchmarks.generator import generate_contacts
+import transfer
+
+
+class BenchmarkTest(unittest.TestCase):
+    '''
+    Генератор синтетических контактов и замеры на маленьком справочнике.
+    '''
+
+    def test_generator_is_deterministic(self) -> None:
+        first: list = list(generate_contacts(200, seed=5))
+        self.assertEqual(first, list(generate_contacts(200, seed=5)))
+        self.assertNotEqual(first, list(generate_contacts(200, seed=6)))
+        self.assertEqual([elem for elem, _ in first[:3]], ['1000', '1001', '1002'])
+
+        # Сгенерированные контакты проходят проверку импорта
+        for _, record in first:
+            self.assertEqual(transfer.validate(record)[1], None)
+
+    def test_run_size(self) -> None:
+        for storage in ('json', 'sqlite'):
+            with self.subTest(storage=storage), contextlib.redirect_stderr(io.StringIO()):
+                results: List[Dict[str, Any]] = bench.run_size(storage, 300, 20, 0)
+            operations: List[str] = [elem['operation'] for elem in results]
+            for operation in ('load', 'build_index', 'page', 'search_exact', 'search_fuzzy'):
+                self.assertIn(operation, operations)
+            self.assertTrue(all(elem['size'] == 300 and elem['per_op_us'] >= 0 for elem in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+from cl_cache import QueryCache
+from cl_contact import Contact
+from cl_index import PREFIX
+from cl_ph_book import PhoneBook
+from cl_query import And, Term
+from tests.base import StorageTestCase
+
+
+class QueryCacheTest(unittest.TestCase):
+    '''
+    Кэш результатов поиска с проверкой версии данных.
+    '''
+
+    def test_lru_and_generation(self) -> None:
+        cache: QueryCache = QueryCache(max_entries=2)
+        cache.put('a', 1, ['1'])
+        cache.put('b', 1, ['2'])
+        self.assertEqual(cache.get('a', 1), ('1',))
+        cache.put('c', 1, ['3'])
+        self.assertIsNone(cache.get('b', 1))
+        self.assertEqual(cache.get('a', 1), ('1',))
+
+        # Результат для другой версии данных удаляется
+        self.assertIsNone(cache.get('a', 2))
+        self.assertIsNone(cache.get('a', 1))
+        self.assertEqual(len(cache), 1)
+
+    def test_size_limit(self) -> None:
+        cache: QueryCache = QueryCache(max_ids=3)
+        cache.put('a', 1, ['1', '2'])
+        cache.put('big', 1, ['1', '2', '3', '4'])
+        self.assertIsNone(cache.get('big', 1))
+        cache.put('b', 1, ['3', '4'])
+        self.assertIsNone(cache.get('a', 1))
+        self.assertEqual(cache.get('b', 1), ('3', '4'))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class SearchCacheTest(StorageTestCase):
+    '''
+    Кэш поиска в справочнике не возвращает устаревших результатов.
+    '''
+
+    def test_results_follow_changes(self) -> None:
+        for kind in ('json', 'sqlite'):
+            with self.subTest(kind=kind):
+                storage = self.filled_storage(kind)
+                ph_bk: PhoneBook = PhoneBook(storage)
+                query: And = And(Term('organization', 'яндекс'), Term('name', 'а', PREFIX))
+                self.assertEqual(ph_bk.search(query), [self.ids[2]])
+
+                # Изменение характеристики условия и имени (порядка)
+                storage.update(self.ids[0], 'name', 'Аркадий')
+                self.assertEqual(ph_bk.search(query), [self.ids[2], self.ids[0]])
+                storage.update(self.ids[2], 'name', 'Яков')
+                self.assertEqual(ph_bk.search(query), [self.ids[0]])
+                added: str = storage.add(Contact(name='Ада', organization='Яндекс'))
+                self.assertEqual(ph_bk.search(query), [added, self.ids[0]])
+
+                # Изменение другой копией справочника
+                other = self.open_storage(kind)
+                other.remove(self.ids[0])
+                storage.refresh()
+                self.assertEqual(ph_bk.search(query), [added])
+
+    def test_equal_queries_share_entry(self) -> None:
+        ph_bk: PhoneBook = PhoneBook(self.filled_storage('json'))
+        first: list = ph_bk.search(And(Term('organization', 'Яндекс'), Term('name', 'а', PREFIX)))
+        first.clear()
+        self.assertEqual(
+            ph_bk.search(And(Term('name', 'А', PREFIX), Term('organization', 'ЯНДЕКС'))), [self.ids[2]]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
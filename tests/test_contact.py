@@ -0,0 +1,49 @@
+import unittest
+import sys
+
+from cl_contact import Contact, FIELDS
+
+
+class ContactTest(unittest.TestCase):
+    '''
+    Компактное представление контакта.
+    '''
+
+    def test_dict_round_trip(self) -> None:
+        record: dict = {'name': 'Иван', 'organization': 'Яндекс', 'extra': 'лишнее'}
+        contact: Contact = Contact.from_dict(record)
+        self.assertEqual(contact.to_dict(), {
+            'name': 'Иван', 'surname': '', 'desperation': '',
+            'organization': 'Яндекс', 'work_number': '', 'personal_number': '',
+        })
+        self.assertEqual(Contact.from_values(contact.to_dict().values()), contact)
+        self.assertEqual(dict(contact.items()), contact.to_dict())
+        self.assertEqual(list(contact), list(FIELDS))
+
+    def test_mapping_access(self) -> None:
+        contact: Contact = Contact(name='Иван')
+        contact['surname'] = 'Петров'
+        self.assertEqual(contact['surname'], 'Петров')
+        self.assertEqual(contact.get('extra', '-'), '-')
+        self.assertIn('name', contact)
+        self.assertNotIn('extra', contact)
+        with self.assertRaises(KeyError):
+            contact['extra']
+        with self.assertRaises(KeyError):
+            contact['extra'] = 'лишнее'
+
+    def test_no_instance_dict_and_interned_values(self) -> None:
+        first: Contact = Contact.from_dict({'organization': ''.join(['Ян', 'декс'])})
+        second: Contact = Contact.from_values(['', '', '', ''.join(['Янд', 'екс']), '', ''])
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first['organization'], second['organization'])
+        self.assertIs(first['organization'], sys.intern('Яндекс'))
+
+    def test_equality(self) -> None:
+        self.assertEqual(Contact(name='Иван'), Contact.from_dict({'name': 'Иван'}))
+        self.assertNotEqual(Contact(name='Иван'), Contact(name='Иван', surname='Петров'))
+        self.assertNotEqual(Contact(name='Иван'), {'name': 'Иван'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+from typing import List
+import unittest
+
+from cl_contact import Contact
+from cl_dedupe import DisjointSets, find_duplicates, merge_contacts, name_key
+from cl_ph_book import PhoneBook
+from tests.base import StorageTestCase
+
+
+class DedupeTest(unittest.TestCase):
+    '''
+    Поиск групп возможных дубликатов и объединение контактов.
+    '''
+
+    def test_disjoint_sets(self) -> None:
+        sets: DisjointSets = DisjointSets()
+        sets.union('1', '2')
+        sets.union('3', '4')
+        sets.union('2', '4')
+        sets.union('5', '6')
+        self.assertEqual(sets.find('1'), sets.find('3'))
+        self.assertNotEqual(sets.find('1'), sets.find('5'))
+        self.assertEqual(sorted(sorted(group) for group in sets.groups()), [['1', '2', '3', '4'], ['5', '6']])
+
+    def test_name_key(self) -> None:
+        self.assertEqual(name_key(Contact(name='Пётр', surname='Иванов')), name_key(Contact(name='иванов', surname='петр')))
+        self.assertEqual(name_key(Contact(name='Аноним')), '')
+
+    def test_groups_by_number_and_name(self) -> None:
+        items: List[tuple] = [
+            ('1', Contact(name='Иван', surname='Петров', work_number='8 495 123-45-67')),
+            ('2', Contact(name='И.', personal_number='+7 (495) 1234567', organization='Яндекс')),
+            ('3', Contact(name='петров', surname='иван')),
+            ('4', Contact(name='Мария', work_number='111-11')),
+            ('5', Contact(name='Мария', personal_number='11111')),
+            ('6', Contact(name='Олег', work_number='1234')),
+            ('7', Contact(name='Анна', work_number='12-34')),
+        ]
+        self.assertEqual(find_duplicates(items), [['1', '2', '3'], ['4', '5']])
+
+    def test_large_blocks_skipped(self) -> None:
+        items: List[tuple] = [
+            (str(pos), Contact(name=f'Сотрудник {pos}', work_number='8 495 000-00-00')) for pos in range(5)
+        ]
+        self.assertEqual(find_duplicates(items, max_block=4), [])
+        self.assertEqual(len(find_duplicates(items, max_block=5)), 1)
+
+    def test_merge_contacts(self) -> None:
+        merged = merge_contacts([
+            Contact(name='Иван', surname='Петров', work_number='8 495 123-45-67'),
+            Contact(name='Ваня', organization='Яндекс', work_number='+7 495 1234567'),
+            Contact(name='Иван', work_number='222-22-22', personal_number='333-33-33'),
+        ])
+        self.assertEqual(merged, {
+            'name': 'Иван', 'surname': 'Петров', 'desperation': '', 'organization': 'Яндекс',
+            'work_number': '8 495 123-45-67', 'personal_number': '222-22-22',
+        })
+
+
+class MergeGroupTest(StorageTestCase):
+    '''
+    Объединение группы дубликатов в справочнике.
+    '''
+
+    def test_merge_group(self) -> None:
+        ph_bk: PhoneBook = PhoneBook(self.filled_storage('json'))
+        self.assertEqual(ph_bk.find_duplicates(), [[self.ids[1], self.ids[2]]])
+        kept: Contact = Contact.from_dict(ph_bk.get_contact(self.ids[1]).to_dict())
+
+        self.assertEqual(ph_bk.merge_group([self.ids[1], self.ids[2]]), self.ids[1])
+        self.assertEqual(ph_bk.find_duplicates(), [])
+        reopened = self.open_storage('json')
+        self.assertEqual(len(reopened), 3)
+        self.assertIsNone(reopened.get(self.ids[2]))
+        self.assertEqual(reopened.get(self.ids[1]), kept)
+        self.assertEqual(reopened.find('personal_number', '89160001122'), set())
+        self.assertEqual(reopened.lookup_number('9160001122'), {self.ids[1]})
+
+    def test_merge_group_checks_ids(self) -> None:
+        ph_bk: PhoneBook = PhoneBook(self.filled_storage('json'))
+        with self.assertRaises(ValueError):
+            ph_bk.merge_group([self.ids[0]])
+        with self.assertRaises(ValueError):
+            ph_bk.merge_group([self.ids[0], self.ids[0]])
+        with self.assertRaises(KeyError):
+            ph_bk.merge_group([self.ids[0], 'нет'])
+        self.assertEqual(ph_bk.count(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+from typing import List
+import multiprocessing
+import unittest
+import threading
+import os
+
+from cl_contact import Contact
+from cl_file_lock import FileLock, file_stamp, write_file
+from cl_storage import JSONStorage
+from tests.base import StorageTestCase
+
+
+def add_contacts(path: str, name: str, count: int, use_journal: bool) -> None:
+    '''
+    Ф-ция для отдельного процесса: добавляет контакты
+    в JSON-хранилище по одному.
+    '''
+
+    storage: JSONStorage = JSONStorage(path, use_journal=use_journal)
+    for pos in range(count):
+        storage.add(Contact(name=f'{name} {pos}'))
+    storage.close()
+
+
+class FileLockTest(StorageTestCase):
+    '''
+    Блокировка файла и атомарная запись.
+    '''
+
+    def test_exclusive_lock_waits(self) -> None:
+        first: FileLock = FileLock(self.path('contacts.lock'))
+        second: FileLock = FileLock(self.path('contacts.lock'))
+        acquired: threading.Event = threading.Event()
+
+        def take() -> None:
+            with second.exclusive():
+                acquired.set()
+
+        with first.exclusive():
+            thread: threading.Thread = threading.Thread(target=take)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+        first.close()
+        second.close()
+
+    def test_nesting(self) -> None:
+        lock: FileLock = FileLock(self.path('contacts.lock'))
+        with lock.exclusive(), lock.shared():
+            pass
+        with lock.shared():
+            with self.assertRaises(RuntimeError):
+                with lock.exclusive():
+                    pass
+        lock.close()
+
+    def test_failed_write_keeps_old_file(self) -> None:
+        path: str = self.path('contacts.json')
+        write_file(path, lambda target: target.write('старые данные'))
+        stamp = file_stamp(path)
+
+        def broken(target) -> None:
+            target.write('новые')
+            raise OSError('диск заполнен')
+
+        with self.assertRaises(OSError):
+            write_file(path, broken)
+        with open(path, 'r', encoding='utf-8') as source:
+            self.assertEqual(source.read(), 'старые данные')
+        self.assertEqual(os.listdir(self.directory), ['contacts.json'])
+        self.assertEqual(file_stamp(path), stamp)
+        self.assertIsNone(file_stamp(self.path('нет.json')))
+
+
+class SharedStorageTest(StorageTestCase):
+    '''
+    Несколько копий справочника, работающих с одним JSON-файлом.
+    '''
+
+    def test_changes_of_other_copy_are_visible(self) -> None:
+        for use_journal in (True, False):
+            with self.subTest(use_journal=use_journal):
+                first = self.filled_storage('json', use_journal=use_journal)
+                second = self.open_storage('json', use_journal=use_journal)
+                first.update(self.ids[0], 'organization', 'Тесла')
+                added: str = second.add(Contact(name='Олег'))
+                first.refresh()
+                second.refresh()
+                for storage in (first, second):
+                    self.assertEqual(storage.get(self.ids[0])['organization'], 'Тесла')
+                    self.assertEqual(storage.get(added)['name'], 'Олег')
+                    self.assertEqual(storage.find('organization', 'тесла'), {self.ids[0]})
+                for name in os.listdir(self.directory):
+                    os.remove(self.path(name))
+
+    def test_concurrent_processes_keep_all_changes(self) -> None:
+        for use_journal in (True, False):
+            with self.subTest(use_journal=use_journal):
+                path: str = self.path(f'contacts_{use_journal}.json')
+                processes: List[multiprocessing.Process] = [
+                    multiprocessing.Process(target=add_contacts, args=(path, name, 20, use_journal))
+                    for name in ('Иван', 'Мария', 'Олег')
+                ]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                    self.assertEqual(process.exitcode, 0)
+
+                storage: JSONStorage = JSONStorage(path, use_journal=use_journal)
+                self.storages.append(storage)
+                self.assertEqual(len(storage), 60)
+                self.assertEqual(len(storage.find('name', 'олег', 'prefix')), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from cl_contact import Contact
+from cl_index import FUZZY, edit_distance, fuzzy_limit
+from cl_ph_book import PhoneBook
+from cl_query import And, Term
+from tests.base import StorageTestCase
+
+
+class FuzzySearchTest(StorageTestCase):
+    '''
+    Нечеткий поиск по имени, фамилии и организации.
+    '''
+
+    def test_edit_distance(self) -> None:
+        self.assertEqual(edit_distance('петров', 'петров', 2), 0)
+        self.assertEqual(edit_distance('петров', 'питров', 2), 1)
+        self.assertEqual(edit_distance('петров', 'петрова', 2), 1)
+        self.assertEqual(edit_distance('петров', 'птеров', 2), 2)
+        self.assertEqual(edit_distance('петров', 'смирнов', 2), 3)
+        self.assertEqual(edit_distance('ан', 'анатолий', 1), 2)
+        self.assertEqual([fuzzy_limit(elem) for elem in ('ан', 'анна', 'алексей')], [0, 1, 2])
+
+    def test_find_with_typos(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.find('surname', 'Питров', FUZZY), {self.ids[0]})
+                self.assertEqual(storage.find('surname', 'иванва', FUZZY), {self.ids[1]})
+                self.assertEqual(storage.find('name', 'Алексий', FUZZY), {self.ids[2]})
+                self.assertEqual(storage.find('organization', 'ядекс', FUZZY), {self.ids[0], self.ids[2]})
+                self.assertEqual(storage.find('name', 'ан', FUZZY), set())
+                self.assertEqual(storage.estimate('surname', 'Питров', FUZZY), 1)
+
+                # Индекс нечеткого поиска обновляется при изменении
+                storage.update(self.ids[3], 'surname', 'Петрова')
+                self.assertEqual(storage.find('surname', 'Питров', FUZZY), {self.ids[0], self.ids[3]})
+                with self.assertRaises(ValueError):
+                    storage.find('work_number', '1234', FUZZY)
+
+    def test_results_ranked_by_typos(self) -> None:
+        storage = self.filled_storage('json')
+        closer: str = storage.add(Contact(name='Яна', surname='Петрон'))
+        ph_bk: PhoneBook = PhoneBook(storage)
+        self.assertEqual(ph_bk.search(Term('surname', 'петрон', FUZZY)), [closer, self.ids[0]])
+        self.assertEqual(ph_bk.search(Term('surname', 'петрова', FUZZY)), [self.ids[0], closer])
+        self.assertEqual(
+            ph_bk.search(And(Term('surname', 'петрон', FUZZY), Term('name', 'иван'))), [self.ids[0]]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+from typing import List
+import unittest
+
+from cl_contact import Contact
+from cl_id_allocator import IdAllocator
+from tests.base import StorageTestCase
+
+
+class IdAllocatorTest(unittest.TestCase):
+    '''
+    Выдача идентификаторов блоками.
+    '''
+
+    def setUp(self) -> None:
+        self.reserved: List[int] = list()
+        self.border: int = 100
+
+    def reserve(self, size: int) -> int:
+        start: int = self.border
+        self.border += size
+        self.reserved.append(size)
+        return start
+
+    def test_ids_come_from_reserved_blocks(self) -> None:
+        allocator: IdAllocator = IdAllocator(self.reserve, block_size=3)
+        self.assertEqual(allocator.allocate(2), ['100', '101'])
+        self.assertEqual(allocator.allocate(2), ['102', '103'])
+        self.assertEqual(self.reserved, [3, 3])
+
+    def test_large_batch_reserves_one_block(self) -> None:
+        allocator: IdAllocator = IdAllocator(self.reserve, block_size=3)
+        ids: List[str] = allocator.allocate(10)
+        self.assertEqual(ids, [str(elem) for elem in range(100, 110)])
+        self.assertEqual(self.reserved, [10])
+
+    def test_reset_skips_rest_of_block(self) -> None:
+        allocator: IdAllocator = IdAllocator(self.reserve, block_size=5)
+        allocator.allocate()
+        allocator.reset()
+        self.assertEqual(allocator.allocate(), ['105'])
+
+
+class StorageIdTest(StorageTestCase):
+    '''
+    Идентификаторы хранилищ уникальны между запусками
+    и между одновременно работающими процессами.
+    '''
+
+    def test_ids_unique_between_storages(self) -> None:
+        for kind in ('json', 'sqlite'):
+            with self.subTest(kind=kind):
+                first = self.filled_storage(kind)
+                second = self.open_storage(kind)
+                ids: List[str] = [
+                    storage.add(Contact.from_dict({'name': f'Имя {pos}'}))
+                    for pos in range(5) for storage in (first, second)
+                ]
+                self.assertEqual(len(set(ids) | set(self.ids)), len(ids) + len(self.ids))
+                self.assertTrue(all(elem.isdigit() for elem in ids))
+
+    def test_ids_not_reused_after_reopen(self) -> None:
+        storage = self.filled_storage('json')
+        removed: str = storage.add(Contact.from_dict({'name': 'Олег'}))
+        storage.remove(removed)
+        storage.close()
+        self.storages.remove(storage)
+        reopened = self.open_storage('json')
+        self.assertGreater(int(reopened.add(Contact.from_dict({'name': 'Анна'}))), int(removed))
+
+
+if __name__ == '__main__':
+    unittest.main()
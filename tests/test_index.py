@@ -0,0 +1,126 @@
+from typing import List
+import unittest
+import random
+
+from cl_contact import Contact, FIELDS
+from cl_index import EXACT, PREFIX, SUBSTRING, ContactIndex, SortedList
+from tests.base import CONTACTS, StorageTestCase
+
+
+class ContactIndexTest(unittest.TestCase):
+    '''
+    Индексы по характеристикам контактов.
+    '''
+
+    def setUp(self) -> None:
+        self.index: ContactIndex = ContactIndex(list(FIELDS))
+        self.index.build((str(pos), record) for pos, record in enumerate(CONTACTS))
+
+    def test_exact_ignores_case(self) -> None:
+        self.assertEqual(self.index.find('organization', 'ЯНДЕКС', EXACT), {'0', '2'})
+        self.assertEqual(self.index.find('name', 'анна', EXACT), {'3'})
+        self.assertEqual(self.index.find('name', 'Ан', EXACT), set())
+
+    def test_index_follows_changes(self) -> None:
+        self.index.add('9', {'name': 'Олег', 'organization': 'Яндекс'})
+        self.index.update('0', 'organization', 'Яндекс', 'Тесла')
+        self.index.remove('2', CONTACTS[2])
+
+        self.assertEqual(self.index.find('organization', 'яндекс'), {'9'})
+        self.assertEqual(self.index.find('organization', 'тесла'), {'0'})
+        self.assertEqual(self.index.find('surname', 'смирнов'), set())
+        self.assertEqual(self.index.estimate('organization', 'яндекс'), 1)
+
+    def test_prefix(self) -> None:
+        self.assertEqual(self.index.find('name', 'а', PREFIX), {'2', '3'})
+        self.assertEqual(self.index.find('name', 'АлЕ', PREFIX), {'2'})
+        self.assertEqual(self.index.find('surname', 'я', PREFIX), set())
+        self.assertEqual(self.index.estimate('surname', 'я', PREFIX), 0)
+
+    def test_substring_short_and_long(self) -> None:
+        self.assertEqual(self.index.find('surname', 'ов', SUBSTRING), {'0', '1', '2', '3'})
+        self.assertEqual(self.index.find('surname', 'ИВАН', SUBSTRING), {'1'})
+        self.assertEqual(self.index.find('organization', 'декс', SUBSTRING), {'0', '2'})
+        self.assertEqual(self.index.find('organization', 'дексы', SUBSTRING), set())
+
+    def test_prefix_and_substring_follow_changes(self) -> None:
+        self.index.add('9', {'surname': 'Петровский'})
+        self.index.update('1', 'surname', 'Иванова', 'Петрова')
+        self.assertEqual(self.index.find('surname', 'петров', PREFIX), {'0', '1', '9'})
+        self.assertEqual(self.index.find('surname', 'ровск', SUBSTRING), {'9'})
+        self.assertEqual(self.index.find('surname', 'иван', SUBSTRING), set())
+
+        self.index.remove('9', {'surname': 'Петровский'})
+        self.assertEqual(self.index.find('surname', 'петров', PREFIX), {'0', '1'})
+
+
+class SortedListTest(unittest.TestCase):
+    '''
+    Отсортированный список, разбитый на блоки.
+    '''
+
+    def test_matches_sorted_list(self) -> None:
+        rnd: random.Random = random.Random(1)
+        values: List[int] = [rnd.randrange(5000) for _ in range(5000)]
+        elems: SortedList = SortedList(values[:1000])
+
+        # Вставки с делением блоков и удаления с удалением блоков
+        for value in values[1000:]:
+            elems.add(value)
+        expected: List[int] = sorted(values)
+        for value in values[::2]:
+            elems.remove(value)
+            expected.remove(value)
+
+        self.assertEqual(list(elems), expected)
+        self.assertEqual(len(elems), len(expected))
+        self.assertEqual(elems[len(expected) // 2], expected[len(expected) // 2])
+        self.assertEqual(elems[-1], expected[-1])
+        self.assertEqual(elems[100:150], expected[100:150])
+        for value in (-1, 0, 2500, 4999, 6000):
+            pos: int = elems.bisect_left(value)
+            self.assertEqual(list(elems.irange(pos))[:3], [elem for elem in expected if elem >= value][:3])
+
+    def test_remove_missing_value(self) -> None:
+        elems: SortedList = SortedList(['а', 'в'])
+        with self.assertRaises(ValueError):
+            elems.remove('б')
+        with self.assertRaises(ValueError):
+            elems.remove('г')
+        with self.assertRaises(IndexError):
+            elems[2]
+
+
+class StorageFindTest(StorageTestCase):
+    '''
+    Поиск по точному совпадению в хранилищах
+    после добавления, изменения и удаления контактов.
+    '''
+
+    def test_find_after_changes(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.find('organization', 'яндекс'), {self.ids[0], self.ids[2]})
+                storage.update(self.ids[0], 'organization', 'Тесла')
+                storage.remove(self.ids[2])
+                added: str = storage.add(Contact.from_dict({'name': 'Олег', 'organization': 'Тесла'}))
+                self.assertEqual(storage.find('organization', 'Яндекс'), set())
+                self.assertEqual(storage.find('organization', 'тесла'), {self.ids[0], added})
+
+                # Индексы после повторной загрузки совпадают с обновленными
+                self.assertEqual(self.open_storage(kind).find('organization', 'тесла'), {self.ids[0], added})
+
+    def test_prefix_and_substring(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.find('surname', 'с', PREFIX), {self.ids[2], self.ids[3]})
+                self.assertEqual(storage.find('surname', 'ов', SUBSTRING), set(self.ids))
+                self.assertEqual(storage.find('organization', 'азпр', SUBSTRING), {self.ids[1]})
+                storage.update(self.ids[1], 'organization', 'Газпромбанк')
+                self.assertEqual(storage.find('organization', 'мбан', SUBSTRING), {self.ids[1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
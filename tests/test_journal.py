@@ -0,0 +1,115 @@
+import unittest
+import json
+import os
+
+from cl_contact import Contact
+from cl_journal import ChangeJournal
+from tests.base import StorageTestCase
+
+
+class ChangeJournalTest(StorageTestCase):
+    '''
+    Журнал изменений: дозапись, проигрывание, чтение
+    изменений других процессов и сворачивание в снимок.
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.snapshot: str = self.path('contacts.json')
+        with open(self.snapshot, 'w', encoding='utf-8') as snapshot:
+            json.dump({'1': {'name': 'Иван'}, '2': {'name': 'Мария'}}, snapshot)
+
+    def load(self, journal: ChangeJournal) -> dict:
+        '''
+        Метод загружает снимок и проигрывает поверх него журнал.
+        '''
+
+        with open(self.snapshot, 'r', encoding='utf-8') as snapshot:
+            data: dict = json.load(snapshot)
+        journal.replay(data)
+        return data
+
+    def test_replay_applies_changes_in_order(self) -> None:
+        journal: ChangeJournal = ChangeJournal(self.snapshot)
+        self.load(journal)
+        journal.append('3', {'name': 'Олег'})
+        journal.append_many([('1', None), ('3', {'name': 'Олег Петров'})])
+        journal.close()
+
+        data: dict = self.load(ChangeJournal(self.snapshot))
+        self.assertEqual(data, {'2': {'name': 'Мария'}, '3': {'name': 'Олег Петров'}})
+
+    def test_incomplete_last_line_is_ignored(self) -> None:
+        journal: ChangeJournal = ChangeJournal(self.snapshot)
+        self.load(journal)
+        journal.append('3', {'name': 'Олег'})
+        journal.close()
+        with open(self.path('contacts.journal'), 'ab') as raw:
+            raw.write(b'{"id": "4", "data": {"na')
+
+        data: dict = self.load(ChangeJournal(self.snapshot))
+        self.assertEqual(sorted(data), ['1', '2', '3'])
+
+    def test_tail_reads_changes_of_other_process(self) -> None:
+        writer: ChangeJournal = ChangeJournal(self.snapshot)
+        reader: ChangeJournal = ChangeJournal(self.snapshot)
+        self.load(writer)
+        self.load(reader)
+        self.assertEqual(reader.tail(), [])
+
+        writer.append_many([('2', None), ('5', {'name': 'Анна'})])
+        self.assertEqual(reader.tail(), [('2', None), ('5', {'name': 'Анна'})])
+        self.assertEqual(reader.tail(), [])
+        writer.close()
+
+    def test_compaction_writes_snapshot_and_resets_journal(self) -> None:
+        writer: ChangeJournal = ChangeJournal(self.snapshot, max_size=10)
+        reader: ChangeJournal = ChangeJournal(self.snapshot)
+        data: dict = self.load(writer)
+        self.load(reader)
+        writer.append('3', {'name': 'Олег'})
+        data['3'] = {'name': 'Олег'}
+        self.assertTrue(writer.needs_compaction())
+
+        writer.compact(dict(data), wait=True)
+        self.assertFalse(writer.needs_compaction())
+        self.assertFalse(os.path.exists(self.path('contacts.journal.1')))
+        with open(self.snapshot, 'r', encoding='utf-8') as snapshot:
+            self.assertEqual(json.load(snapshot), data)
+
+        # Другой процесс узнает, что данные нужно загрузить заново
+        self.assertIsNone(reader.tail())
+        self.assertEqual(self.load(ChangeJournal(self.snapshot)), data)
+        writer.close()
+
+
+class JournalStorageTest(StorageTestCase):
+    '''
+    JSON-хранилище с журналом: изменения дописываются
+    в журнал без перезаписи файла с контактами.
+    '''
+
+    def test_changes_go_to_journal(self) -> None:
+        storage = self.filled_storage('json')
+        storage.update(self.ids[0], 'organization', 'Тесла')
+        storage.remove(self.ids[1])
+        added: str = storage.add(Contact.from_dict({'name': 'Олег'}))
+
+        # Файл с контактами появляется только при сворачивании журнала
+        self.assertFalse(os.path.exists(self.path('contacts.json')))
+        self.assertTrue(os.path.exists(self.path('contacts.journal')))
+        reopened = self.open_storage('json')
+        self.assertEqual(reopened.get(self.ids[0])['organization'], 'Тесла')
+        self.assertIsNone(reopened.get(self.ids[1]))
+        self.assertEqual(reopened.get(added)['name'], 'Олег')
+
+    def test_without_journal_file_is_rewritten(self) -> None:
+        storage = self.filled_storage('json', use_journal=False)
+        storage.update(self.ids[0], 'organization', 'Тесла')
+        self.assertFalse(os.path.exists(self.path('contacts.journal')))
+        with open(self.path('contacts.json'), 'r', encoding='utf-8') as contacts:
+            self.assertEqual(json.load(contacts)[self.ids[0]]['organization'], 'Тесла')
+
+
+if __name__ == '__main__':
+    unittest.main()
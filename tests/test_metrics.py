@@ -0,0 +1,93 @@
+from typing import Any, Dict
+import unittest
+
+from cl_contact import Contact
+from cl_index import PREFIX
+from cl_metrics import METRICS, Histogram, Metrics, SIZE_BUCKETS
+from cl_ph_book import PhoneBook
+from cl_query import Term
+from tests.base import StorageTestCase
+import batch
+
+
+class HistogramTest(unittest.TestCase):
+    '''
+    Гистограмма с фиксированными границами корзин.
+    '''
+
+    def test_percentiles(self) -> None:
+        histogram: Histogram = Histogram((1, 10, 100, float('inf')))
+        for value in [0.5] * 50 + [5] * 45 + [50] * 4 + [500]:
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(0.5), 1)
+        self.assertEqual(histogram.percentile(0.95), 10)
+        self.assertEqual(histogram.percentile(0.99), 100)
+        self.assertEqual(histogram.percentile(1), 500)
+
+        result: Dict[str, Any] = histogram.to_dict()
+        self.assertEqual((result['count'], result['min'], result['max']), (100, 0.5, 500))
+        self.assertEqual(result['buckets'], {'1': 50, '10': 45, '100': 4, 'inf': 1})
+        self.assertEqual(Histogram((1,)).to_dict()['mean'], 0)
+
+
+class MetricsTest(StorageTestCase):
+    '''
+    Сбор метрик: выключенный ничего не записывает,
+    включенный видит поиск и запись изменений.
+    '''
+
+    def tearDown(self) -> None:
+        METRICS.enable(False)
+        METRICS.reset()
+        super().tearDown()
+
+    def test_disabled_collects_nothing(self) -> None:
+        metrics: Metrics = Metrics()
+        metrics.count('a')
+        metrics.observe('b', 1)
+        with metrics.timer('c'), metrics.scan('d'):
+            metrics.scanned(10)
+        self.assertEqual(metrics.snapshot()['counters'], {})
+        self.assertEqual(metrics.snapshot()['histograms'], {})
+
+    def test_enabled_collects(self) -> None:
+        metrics: Metrics = Metrics()
+        metrics.enable()
+        metrics.count('a')
+        metrics.count('a', 2)
+        with metrics.timer('c'), metrics.scan('d'):
+            metrics.scanned(10)
+            metrics.scanned(5)
+        snapshot: Dict[str, Any] = metrics.snapshot()
+        self.assertEqual(snapshot['counters'], {'a': 3})
+        self.assertEqual(snapshot['histograms']['c']['count'], 1)
+        self.assertEqual(snapshot['histograms']['d']['sum'], 15)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['counters'], {})
+
+    def test_phone_book_operations(self) -> None:
+        METRICS.enable()
+        ph_bk: PhoneBook = PhoneBook(self.filled_storage('json'))
+        query: Term = Term('name', 'а', PREFIX)
+        ph_bk.search(query)
+        ph_bk.search(query)
+        ph_bk.add_record(Contact(name='Олег').to_dict())
+
+        snapshot: Dict[str, Any] = METRICS.snapshot()
+        self.assertEqual(snapshot['counters']['search.cache_hits'], 1)
+        self.assertEqual(snapshot['counters']['search.cache_misses'], 1)
+        self.assertGreater(snapshot['counters']['storage.bytes_written'], 0)
+        self.assertEqual(snapshot['histograms']['search.scanned']['sum'], 2)
+        self.assertIn('journal.write', snapshot['histograms'])
+
+        # Метрики доступны командой пакетного режима
+        response: Dict[str, Any] = batch.execute(ph_bk, {'op': 'stats'})
+        self.assertTrue(response['result']['enabled'])
+        self.assertIn('search.evaluate', response['result']['histograms'])
+        self.assertEqual(response['result']['histograms']['search.found']['buckets'], {
+            str(SIZE_BUCKETS[2]): 1
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
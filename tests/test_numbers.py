@@ -0,0 +1,57 @@
+import unittest
+
+from cl_index import EXACT, PREFIX, SUBSTRING, number_tail
+from cl_query import Term
+from tests.base import StorageTestCase
+
+
+class PhoneQueryTest(StorageTestCase):
+    '''
+    Поиск по номерам телефонов и определение владельца номера
+    в обоих хранилищах.
+    '''
+
+    def test_query_without_digits_matches_nothing(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            for field in ('work_number', 'personal_number'):
+                for mode in (EXACT, PREFIX, SUBSTRING):
+                    with self.subTest(kind=kind, field=field, mode=mode):
+                        self.assertEqual(storage.find(field, 'abc', mode), set())
+                        self.assertEqual(storage.estimate(field, 'x', mode), 0)
+                        self.assertEqual(Term(field, 'abc', mode).evaluate(storage), set())
+                        self.assertFalse(Term(field, 'abc', mode).matches(storage.get(self.ids[3])))
+
+    def test_prefix_and_substring_by_digits(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.find('work_number', '8 495', PREFIX), {self.ids[0]})
+                self.assertEqual(storage.find('work_number', '22-22', SUBSTRING), {self.ids[2]})
+                self.assertEqual(storage.find('work_number', '2222222', EXACT), {self.ids[2]})
+
+    def test_lookup_ignores_country_code(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.lookup_number('+7 495 1234567'), {self.ids[0]})
+                self.assertEqual(storage.lookup_number('84951234567'), {self.ids[0]})
+                self.assertEqual(storage.lookup_number('89160001122'), {self.ids[1], self.ids[2]})
+
+    def test_lookup_by_suffix(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(storage.lookup_number('45-67'), {self.ids[0]})
+                self.assertEqual(storage.lookup_number('1111111'), {self.ids[1]})
+                self.assertEqual(storage.lookup_number('567'), set())
+                self.assertEqual(storage.lookup_number('нет'), set())
+
+    def test_number_tail(self) -> None:
+        self.assertEqual(number_tail('+7 (495) 123-45-67'), '4951234567')
+        self.assertEqual(number_tail('8 495 123 45 67'), '4951234567')
+        self.assertEqual(number_tail('111-11-11'), '1111111')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from typing import List
+import unittest
+
+from cl_contact import Contact
+from cl_index import SortedIndex
+from tests.base import StorageTestCase
+
+
+class SortedIndexTest(unittest.TestCase):
+    '''
+    Индекс для упорядочивания контактов по имени.
+    '''
+
+    def setUp(self) -> None:
+        self.index: SortedIndex = SortedIndex()
+        self.index.build([('1', 'мария'), ('2', 'Иван'), ('3', 'анна'), ('4', 'Иван')])
+
+    def test_order_ignores_case(self) -> None:
+        self.assertEqual(list(self.index), ['3', '2', '4', '1'])
+        self.assertEqual(self.index[1:3], ['2', '4'])
+        self.assertEqual(self.index.order({'1', '4', '3'}), ['3', '4', '1'])
+
+    def test_changes_keep_order(self) -> None:
+        self.index.add('5', 'Борис')
+        self.index.update('1', 'Алла')
+        self.index.remove('2')
+        self.assertEqual(list(self.index), ['1', '3', '5', '4'])
+        self.assertEqual(len(self.index), 4)
+
+    def test_position(self) -> None:
+        self.assertEqual(self.index.position('И'), 1)
+        self.assertEqual(self.index.position('м'), 3)
+        self.assertEqual(self.index.position('б'), -1)
+        self.assertEqual(self.index.position('я'), -1)
+        self.assertEqual(self.index.position('м', ['2', '1']), 1)
+        self.assertEqual(self.index.position('а', ['2', '1']), -1)
+
+
+class StorageOrderTest(StorageTestCase):
+    '''
+    Порядок контактов в хранилищах после изменений.
+    '''
+
+    def names(self, storage) -> List[str]:
+        '''
+        Метод возвращает имена контактов в порядке хранилища.
+        '''
+
+        return [storage.get(contact_id)['name'] for contact_id in storage]
+
+    def test_order_after_changes(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                self.assertEqual(self.names(storage), ['Алексей', 'Анна', 'Иван', 'Мария'])
+                storage.add(Contact.from_dict({'name': 'Борис'}))
+                storage.update(self.ids[1], 'name', 'аня')
+                storage.remove(self.ids[0])
+                self.assertEqual(self.names(storage), ['Алексей', 'Анна', 'аня', 'Борис'])
+                self.assertEqual(self.names(self.open_storage(kind)), ['Алексей', 'Анна', 'аня', 'Борис'])
+                self.assertEqual(storage.order({self.ids[1], self.ids[2]}), [self.ids[2], self.ids[1]])
+                self.assertEqual(storage.position('б'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+from typing import List
+from unittest import mock
+import contextlib
+import unittest
+import io
+import re
+
+from cl_ph_book import PhoneBook
+from cl_render import SCREEN
+from tests.base import StorageTestCase
+
+
+class InteractiveTest(StorageTestCase):
+    '''
+    Интерактивное меню справочника: ответы пользователя
+    подставляются вместо ввода, вывод экрана перехватывается.
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.storage = self.filled_storage('json')
+        self.ph_bk: PhoneBook = PhoneBook(self.storage)
+
+    def run_menu(self, action, answers: List[str]) -> str:
+        '''
+        Метод выполняет действие меню с переданными ответами
+        и возвращает весь выведенный текст.
+        '''
+
+        output: io.StringIO = io.StringIO()
+        with contextlib.redirect_stdout(output), mock.patch('builtins.input', side_effect=answers):
+            try:
+                action()
+            finally:
+                SCREEN.flush()
+        return output.getvalue()
+
+    def test_show_contacts_pages(self) -> None:
+        self.ph_bk = PhoneBook(self.storage, page_size=3)
+        output: str = self.run_menu(self.ph_bk.show_contacts, ['1', '1', '2', '3', '9', '5', '1', '3', '3', '0'])
+        pages: List[str] = re.findall(r'Контакты, страница \d+ из \d+', output)
+        self.assertEqual(pages, [
+            'Контакты, страница 1 из 2', 'Контакты, страница 2 из 2', 'Контакты, страница 2 из 2',
+            'Контакты, страница 1 из 2', 'Контакты, страница 1 из 2', 'Контакты, страница 1 из 4',
+            'Контакты, страница 3 из 4',
+        ])
+        self.assertEqual(output.count('Запрашиваемой страницы не существует.'), 2)
+
+        # На последней странице при размере 1 выведен третий по имени контакт
+        last_page: str = output[output.rindex('страница 3 из 4'):]
+        self.assertIn(f'ID: {self.ids[0]}', last_page)
+        self.assertNotIn(f'ID: {self.ids[1]}', last_page)
+
+    def test_show_contacts_jump_to_letter(self) -> None:
+        self.ph_bk = PhoneBook(self.storage, page_size=1)
+        output: str = self.run_menu(self.ph_bk.show_contacts, ['4', 'м', '0'])
+        self.assertIn('страница 4 из 4', output)
+
+        # Список, упорядоченный не по имени (после нечеткого поиска)
+        ranked: List[str] = list(reversed(self.ph_bk.list_contacts()))
+        output = self.run_menu(lambda: self.ph_bk.show_contacts(ranked, ranked=True), ['4', 'Ал', '0'])
+        self.assertIn('страница 4 из 4', output)
+        output = self.run_menu(lambda: self.ph_bk.show_contacts(ranked, ranked=True), ['4', 'Я', '0'])
+        self.assertIn('Контакты на эту букву не найдены.', output)
+
+    def test_screen_written_once_per_prompt(self) -> None:
+        writes: List[str] = list()
+        with mock.patch('sys.stdout') as stdout, mock.patch('builtins.input', side_effect=['0']):
+            stdout.write.side_effect = writes.append
+            stdout.isatty.return_value = True
+            self.ph_bk.show_contacts()
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('\tКонтакты, страница 1'))
+
+    def test_list_contacts_slices_name_order(self) -> None:
+        self.assertEqual(self.ph_bk.list_contacts(), [self.ids[2], self.ids[3], self.ids[0], self.ids[1]])
+        self.assertEqual(self.ph_bk.list_contacts(1, 3), [self.ids[3], self.ids[0]])
+        self.assertEqual(self.ph_bk.list_contacts(3, 10), [self.ids[1]])
+        self.assertEqual(self.ph_bk.list_contacts(10), [])
+
+    def test_edit_is_saved_on_exit(self) -> None:
+        output: str = self.run_menu(self.ph_bk.edit_contact, [self.ids[0], '4', 'Тесла', '0'])
+        self.assertIn('будет сохранено при возврате в меню', output)
+        self.assertLess(output.index('будет сохранено'), output.index('Данные успешно сохранены!'))
+        self.assertEqual(self.open_storage('json').get(self.ids[0])['organization'], 'Тесла')
+
+    def test_failed_save_is_not_reported_as_success(self) -> None:
+        with mock.patch.object(self.storage, '_flush', side_effect=OSError('диск заполнен')):
+            with self.assertRaises(OSError):
+                self.run_menu(self.ph_bk.edit_contact, [self.ids[0], '4', 'Тесла', '0'])
+        self.assertEqual(self.storage.get(self.ids[0])['organization'], 'Яндекс')
+        self.assertEqual(self.open_storage('json').get(self.ids[0])['organization'], 'Яндекс')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+from typing import List
+import unittest
+import random
+
+from cl_contact import Contact
+from cl_index import EXACT, PREFIX, SUBSTRING
+from cl_query import And, Not, Or, Query, Term
+from tests.base import StorageTestCase
+
+
+# Составные условия: проверяются и пересечение индексов,
+# и проверка кандидатов по одному (очень частые значения)
+QUERIES: List[Query] = [
+    And(Term('organization', 'яндекс'), Term('name', 'а', PREFIX)),
+    And(Term('surname', 'ов', SUBSTRING), Term('name', 'Мария'), Term('organization', 'газпром')),
+    Or(Term('name', 'иван'), Term('surname', 'смирнов')),
+    And(Term('surname', 'петров', PREFIX), Not(Term('organization', 'яндекс'))),
+    And(Not(Term('name', 'иван')), Not(Term('organization', ''))),
+    And(Or(Term('name', 'анна'), Term('name', 'мария')), Term('work_number', '495', SUBSTRING)),
+    Not(Or(Term('organization', 'яндекс'), Term('organization', 'газпром'))),
+    And(Term('name', 'иван'), Term('name', 'анна')),
+]
+
+
+class QueryTest(StorageTestCase):
+    '''
+    Составные условия поиска: результат по индексам
+    совпадает с проверкой каждого контакта.
+    '''
+
+    def fill(self, storage) -> None:
+        rnd: random.Random = random.Random(3)
+        storage.add_many([
+            Contact(
+                name=rnd.choice(['Иван', 'Анна', 'Алексей', 'Мария']),
+                surname=rnd.choice(['Петров', 'Иванова', 'Петровский', 'Смирнов']),
+                organization=rnd.choice(['Яндекс'] * 8 + ['Газпром', '']),
+                work_number=rnd.choice(['8 495 123-45-67', '8 812 765-43-21', '']),
+            )
+            for _ in range(400)
+        ])
+
+    def test_matches_brute_force(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.open_storage(kind)
+            self.fill(storage)
+            for query in QUERIES:
+                with self.subTest(kind=kind, query=query):
+                    expected = {elem for elem in storage if query.matches(storage.get(elem))}
+                    self.assertEqual(query.evaluate(storage), expected)
+                    self.assertGreaterEqual(query.estimate(storage), 0)
+
+    def test_keys_ignore_order_and_case(self) -> None:
+        first: Query = And(Term('name', 'Иван'), Or(Term('surname', 'Петров', PREFIX), Term('name', 'анна')))
+        second: Query = And(Or(Term('name', 'АННА'), Term('surname', 'петров', PREFIX)), Term('name', 'иван'))
+        self.assertEqual(first.key(), second.key())
+        self.assertNotEqual(first.key(), Or(*first.queries).key())
+        self.assertNotEqual(Term('name', 'иван', EXACT).key(), Term('name', 'иван', PREFIX).key())
+        self.assertEqual(first.fields(), {'name', 'surname'})
+        self.assertEqual(Not(Term('organization', 'яндекс')).fields(), {'organization'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+from typing import List
+from unittest import mock
+import unittest
+import io
+
+from cl_contact import Contact
+from cl_render import CLEAR, ContactRenderer, Screen
+from tests.base import StorageTestCase
+
+
+class TtyStream(io.StringIO):
+    '''
+    Поток вывода, который считается терминалом
+    и запоминает каждую запись.
+    '''
+
+    def __init__(self, tty: bool = True) -> None:
+        super().__init__()
+        self.tty: bool = tty
+        self.writes: List[str] = list()
+
+    def isatty(self) -> bool:
+        return self.tty
+
+    def write(self, text: str) -> int:
+        self.writes.append(text)
+        return super().write(text)
+
+
+class ScreenTest(unittest.TestCase):
+    '''
+    Буфер экрана: одна запись на экран, очистка
+    управляющей последовательностью только в терминале.
+    '''
+
+    def test_one_write_per_prompt(self) -> None:
+        stream: TtyStream = TtyStream()
+        screen: Screen = Screen(stream)
+        screen.print('Контакты', 1, sep=': ')
+        screen.print('-' * 5)
+        with mock.patch('builtins.input', return_value='0'):
+            self.assertEqual(screen.input('-> '), '0')
+        self.assertEqual(stream.writes, ['Контакты: 1\n-----\n-> '])
+
+    def test_clear_only_on_tty(self) -> None:
+        for tty in (True, False):
+            with self.subTest(tty=tty):
+                stream: TtyStream = TtyStream(tty)
+                screen: Screen = Screen(stream)
+                screen.print('старый экран')
+                screen.clear()
+                screen.print('новый экран')
+                screen.flush()
+                self.assertEqual(stream.writes, [(CLEAR if tty else '') + 'новый экран\n'])
+
+                # Повторный вывод без очистки
+                screen.flush()
+                screen.print('еще')
+                screen.flush()
+                self.assertEqual(stream.writes[1:], ['еще\n'])
+
+    def test_clear_does_not_run_command(self) -> None:
+        with mock.patch('os.system') as system, mock.patch('subprocess.run') as run:
+            screen: Screen = Screen(TtyStream())
+            screen.clear()
+            screen.flush()
+        run.assert_not_called()
+        self.assertIn(system.call_count, (0, 1))
+        for call in system.call_args_list:
+            self.assertEqual(call.args, ('',))
+
+
+class ContactRendererTest(StorageTestCase):
+    '''
+    Кэш отформатированных карточек контактов.
+    '''
+
+    def test_blocks_cached_until_change(self) -> None:
+        storage = self.filled_storage('json')
+        renderer: ContactRenderer = ContactRenderer(storage, max_entries=2)
+        block: str = renderer.render(self.ids[0])
+        self.assertEqual(block.splitlines()[:3], [
+            f'ID: {self.ids[0]}', 'ФИО: Иван Петров ', 'Организация: Яндекс'
+        ])
+        with mock.patch.object(ContactRenderer, 'format', wraps=ContactRenderer.format) as format_block:
+            self.assertIs(renderer.render(self.ids[0]), block)
+            format_block.assert_not_called()
+
+            # Несохраненные изменения выводятся, но не кэшируются
+            self.assertIn('Организация: Тесла', renderer.render(self.ids[0], {'organization': 'Тесла'}))
+            self.assertIs(renderer.render(self.ids[0]), block)
+
+            # Изменение контакта и данные, загруженные другим процессом
+            storage.update(self.ids[0], 'organization', 'Газпром')
+            self.assertIn('Организация: Газпром', renderer.render(self.ids[0]))
+            renderer.render(self.ids[1])
+            other = self.open_storage('json')
+            other.update(self.ids[1], 'name', 'Маша')
+            storage.refresh()
+            self.assertIn('ФИО: Маша Иванова', renderer.render(self.ids[1]))
+
+        self.assertIn('некорректно', renderer.render('нет'))
+
+    def test_least_recent_block_evicted(self) -> None:
+        storage = self.filled_storage('json')
+        renderer: ContactRenderer = ContactRenderer(storage, max_entries=2)
+        first: str = renderer.render(self.ids[0])
+        renderer.render(self.ids[1])
+        renderer.render(self.ids[0])
+        renderer.render(self.ids[2])
+        self.assertIs(renderer.render(self.ids[0]), first)
+        with mock.patch.object(ContactRenderer, 'format', return_value='новый') as format_block:
+            renderer.render(self.ids[1])
+        format_block.assert_called_once()
+        self.assertEqual(
+            ContactRenderer.format('7', Contact(name='Анна', work_number='84951234567')).splitlines()[3],
+            'Рабочий телефон: 8495 123-45-67'
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+from typing import Any, Dict, List
+from unittest import mock
+import contextlib
+import unittest
+import asyncio
+import json
+import io
+
+from cl_ph_book import PhoneBook
+from tests.base import StorageTestCase
+import server
+
+
+class ServerTest(StorageTestCase):
+    '''
+    Сетевой сервис: команды клиентов по TCP, изменения
+    выполняет единственная задача-писатель.
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.storage = self.filled_storage('json')
+        self.ph_bk: PhoneBook = PhoneBook(self.storage)
+
+    def exchange(self, *clients: List[Any]) -> List[List[Dict[str, Any]]]:
+        '''
+        Метод запускает сервер на свободном порту, отправляет
+        команды от нескольких клиентов одновременно и возвращает
+        ответы каждому клиенту.
+        '''
+
+        async def client(port: int, commands: List[Any]) -> List[Dict[str, Any]]:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses: List[Dict[str, Any]] = list()
+            for command in commands:
+                line: bytes = command if isinstance(command, bytes) else json.dumps(command).encode('utf-8')
+                writer.write(line + b'\n')
+                await writer.drain()
+                responses.append(json.loads(await reader.readline()))
+            writer.close()
+            return responses
+
+        async def main() -> List[List[Dict[str, Any]]]:
+            srv, writer_task = await server.start(self.ph_bk, '127.0.0.1', 0)
+            port: int = srv.sockets[0].getsockname()[1]
+            try:
+                return list(await asyncio.gather(*(client(port, commands) for commands in clients)))
+            finally:
+                writer_task.cancel()
+                srv.close()
+                await srv.wait_closed()
+
+        return asyncio.run(main())
+
+    def test_reads_and_writes(self) -> None:
+        first, second = self.exchange(
+            [{'op': 'count'}, b'{"op": ', {'op': 'lookup', 'number': '45-67'}],
+            [{'op': 'add', 'contact': {'name': 'Олег'}, 'ref': 'a'}, {'op': 'count'}],
+        )
+        self.assertTrue(first[0]['ok'])
+        self.assertFalse(first[1]['ok'])
+        self.assertEqual(first[2]['result']['total'], 1)
+        self.assertEqual(second[0]['ref'], 'a')
+        self.assertEqual(second[1]['result'], 5)
+        self.assertEqual(len(self.open_storage('json')), 5)
+
+    def test_concurrent_writes(self) -> None:
+        clients: List[List[Any]] = [
+            [{'op': 'add', 'contact': {'name': f'Имя {client}-{pos}'}} for pos in range(5)]
+            for client in range(4)
+        ]
+        responses: List[List[Dict[str, Any]]] = self.exchange(*clients)
+        ids: List[str] = [elem['result']['id'] for client in responses for elem in client]
+        self.assertTrue(all(elem['ok'] for client in responses for elem in client))
+        self.assertEqual(len(set(ids)), 20)
+        self.assertEqual(len(self.open_storage('json')), 24)
+
+    def test_writer_survives_failed_save(self) -> None:
+        # Первая запись изменений завершается ошибкой, следующие - успешно
+        flush = self.storage._flush
+        calls: List[int] = list()
+
+        def failing_flush() -> None:
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError('диск заполнен')
+            flush()
+
+        with contextlib.redirect_stderr(io.StringIO()), mock.patch.object(
+            self.storage, '_flush', side_effect=failing_flush
+        ):
+            (responses,) = self.exchange([
+                {'op': 'add', 'contact': {'name': 'Олег'}, 'ref': 1},
+                {'op': 'add', 'contact': {'name': 'Игорь'}, 'ref': 2},
+                {'op': 'count'},
+            ])
+        self.assertEqual(responses[0], {'ref': 1, 'ok': False, 'error': 'не удалось сохранить изменения: диск заполнен'})
+        self.assertTrue(responses[1]['ok'])
+        self.assertEqual(responses[2]['result'], 5)
+        names: List[str] = [elem['name'] for _, elem in self.open_storage('json').items()]
+        self.assertIn('Игорь', names)
+        self.assertNotIn('Олег', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
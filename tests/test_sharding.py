@@ -0,0 +1,94 @@
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+import unittest
+import os
+
+from cl_contact import Contact
+from cl_storage import JSONStorage
+from sharding import shard_count, shard_dir, shard_of, shard_stamps, write_shards, load_shards
+from tests.base import StorageTestCase
+
+
+class ShardingTest(StorageTestCase):
+    '''
+    Данные JSON-хранилища, разбитые на части.
+    '''
+
+    def test_write_and_load_shards(self) -> None:
+        path: str = self.path('contacts.json')
+        data = {str(key): {'name': f'Имя {key}'} for key in range(100)}
+        write_shards(path, 4, data)
+        self.assertEqual(shard_count(path), 4)
+        rows = load_shards(path, 4, workers=1)
+        self.assertEqual(sorted(row[0] for shard in rows for row in shard), sorted(data))
+        for shard, shard_rows in enumerate(load_shards(path, 4, workers=1)):
+            for row in shard_rows:
+                self.assertEqual(shard_of(row[0], 4), shard)
+
+    def test_parallel_load(self) -> None:
+        path: str = self.path('contacts.json')
+        data = {str(key): {'name': f'Имя {key}'} for key in range(100)}
+        write_shards(path, 4, data)
+        with mock.patch('sharding.PARALLEL_LOAD_SIZE', 0), \
+                mock.patch('sharding.ProcessPoolExecutor', wraps=ProcessPoolExecutor) as pool:
+            rows = load_shards(path, 4, workers=2)
+        pool.assert_called_once_with(2)
+        self.assertEqual(rows, load_shards(path, 4, workers=1))
+
+    def test_write_touches_one_shard(self) -> None:
+        storage: JSONStorage = self.filled_storage('json')
+        storage.split_into_shards(8)
+        before = shard_stamps(self.path('contacts.json'), 8)
+        storage.update(self.ids[0], 'organization', 'Тесла')
+        after = shard_stamps(self.path('contacts.json'), 8)
+
+        # Первая отметка - описание разбиения, далее части
+        self.assertEqual(before[0], after[0])
+        changed = [shard for shard in range(8) if before[shard + 1] != after[shard + 1]]
+        self.assertEqual(changed, [shard_of(self.ids[0], 8)])
+
+    def test_corrupt_manifest(self) -> None:
+        path: str = self.path('contacts.json')
+        os.makedirs(shard_dir(path))
+        with open(os.path.join(shard_dir(path), 'manifest.json'), 'w') as manifest:
+            manifest.write('{"shards": 0}')
+        with self.assertRaises(ValueError):
+            shard_count(path)
+
+    def test_split_keeps_contacts(self) -> None:
+        storage: JSONStorage = self.filled_storage('json')
+        storage.split_into_shards(3)
+        self.assertFalse(os.path.exists(self.path('contacts.json')))
+        reopened: JSONStorage = self.open_storage('json')
+        self.assertEqual(list(reopened), list(storage))
+        self.assertEqual(reopened.get(self.ids[0]), storage.get(self.ids[0]))
+        with self.assertRaises(ValueError):
+            reopened.split_into_shards(2)
+
+    def test_refresh_reads_only_changed_shard(self) -> None:
+        first: JSONStorage = self.filled_storage('json')
+        first.split_into_shards(8)
+        second: JSONStorage = self.open_storage('json')
+
+        # Изменения другого процесса применяются без полной загрузки
+        second._JSONStorage__load = lambda: self.fail('данные загружены заново целиком')
+        first.update(self.ids[0], 'organization', 'Тесла')
+        first.remove(self.ids[1])
+        added: str = first.add(Contact.from_dict({'name': 'Олег'}))
+        second.refresh()
+
+        self.assertEqual(second.get(self.ids[0])['organization'], 'Тесла')
+        self.assertIsNone(second.get(self.ids[1]))
+        self.assertEqual(second.get(added)['name'], 'Олег')
+        self.assertEqual(list(second), list(first))
+        self.assertEqual(second.find('organization', 'тесла'), {self.ids[0]})
+
+        # Изменения второго процесса видны первому
+        del second._JSONStorage__load
+        second.update(added, 'surname', 'Олегов')
+        first.refresh()
+        self.assertEqual(first.get(added)['surname'], 'Олегов')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import json
+import os
+
+from cl_contact import Contact
+from cl_snapshot import SnapshotContacts, open_snapshot, snapshot_path, write_snapshot
+from tests.base import CONTACTS, StorageTestCase
+
+
+class SnapshotTest(StorageTestCase):
+    '''
+    Бинарный снимок контактов и ленивая загрузка из него.
+    '''
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.source: str = self.path('contacts.json')
+        self.records: dict = {str(pos): record for pos, record in enumerate(CONTACTS)}
+        with open(self.source, 'w', encoding='utf-8') as source:
+            json.dump(self.records, source, ensure_ascii=False)
+        self.snapshot: str = snapshot_path(self.source)
+
+    def test_path(self) -> None:
+        self.assertEqual(snapshot_path('data/contacts.json'), os.path.join('data', 'contacts.snapshot'))
+
+    def test_read_back(self) -> None:
+        write_snapshot(self.snapshot, self.source, self.records.items())
+        contacts: SnapshotContacts = open_snapshot(self.snapshot, self.source)
+        self.assertEqual(list(contacts), list(self.records))
+        self.assertEqual(dict(contacts.names()), {key: elem['name'] for key, elem in self.records.items()})
+        self.assertEqual(contacts['1'], Contact.from_dict(CONTACTS[1]))
+
+        # Изменения хранятся в памяти поверх снимка
+        contacts['9'] = Contact(name='Олег')
+        contacts['0'] = Contact(name='Игорь')
+        del contacts['2']
+        self.assertEqual(len(contacts), 4)
+        self.assertNotIn('2', contacts)
+        self.assertEqual(dict(contacts.names())['0'], 'Игорь')
+        self.assertEqual(open_snapshot(self.snapshot, self.source)['2'], Contact.from_dict(CONTACTS[2]))
+
+    def test_stale_or_broken_snapshot_is_ignored(self) -> None:
+        self.assertIsNone(open_snapshot(self.snapshot, self.source))
+        write_snapshot(self.snapshot, self.source, self.records.items())
+        with open(self.source, 'a', encoding='utf-8') as source:
+            source.write(' ')
+        self.assertIsNone(open_snapshot(self.snapshot, self.source))
+
+        write_snapshot(self.snapshot, self.source, self.records.items())
+        with open(self.snapshot, 'r+b') as snapshot:
+            snapshot.write(b'BROKEN')
+        self.assertIsNone(open_snapshot(self.snapshot, self.source))
+
+    def test_storage_uses_and_rebuilds_snapshot(self) -> None:
+        storage = self.open_storage('json', use_snapshot=True, use_journal=False)
+        self.assertIsNotNone(open_snapshot(self.snapshot, self.source))
+        self.assertEqual(storage.find('organization', 'яндекс'), {'0', '2'})
+
+        # После записи JSON-файла снимок перестраивается
+        storage.update('0', 'organization', 'Тесла')
+        reopened = self.open_storage('json', use_snapshot=True, use_journal=False)
+        self.assertEqual(reopened.get('0')['organization'], 'Тесла')
+        self.assertEqual(open_snapshot(self.snapshot, self.source)['0']['organization'], 'Тесла')
+        self.assertEqual([reopened.get(elem)['name'] for elem in reopened], ['Алексей', 'Анна', 'Иван', 'Мария'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+from typing import List, Tuple
+import unittest
+import random
+
+from cl_contact import Contact
+from cl_index import EXACT, FUZZY, PREFIX, SUBSTRING
+from tests.base import StorageTestCase
+
+
+# Запросы для сравнения хранилищ: характеристика, значение, режим
+QUERIES: List[Tuple[str, str, str]] = [
+    ('name', 'иван', EXACT), ('name', 'а', PREFIX), ('surname', 'ов', SUBSTRING),
+    ('surname', 'петро', SUBSTRING), ('organization', 'ЯНД', PREFIX),
+    ('organization', 'яндкс', FUZZY), ('surname', 'иваново', FUZZY),
+    ('work_number', '495', SUBSTRING), ('personal_number', '+7 916', PREFIX),
+]
+
+
+class SQLiteStorageTest(StorageTestCase):
+    '''
+    Хранилище SQLite дает те же результаты, что и JSON-хранилище.
+    '''
+
+    def contacts(self, count: int) -> List[Contact]:
+        '''
+        Метод создает случайные контакты из небольшого
+        набора значений, чтобы запросы находили несколько контактов.
+        '''
+
+        rnd: random.Random = random.Random(7)
+        return [
+            Contact(
+                name=rnd.choice(['Иван', 'Анна', 'Алексей', 'Мария', 'иван']),
+                surname=rnd.choice(['Петров', 'Иванова', 'Петровский', 'Смирнов']),
+                organization=rnd.choice(['Яндекс', 'Газпром', '']),
+                work_number=f'8 495 {rnd.randrange(10 ** 7):07}',
+                personal_number=rnd.choice(['', f'+7 916 {rnd.randrange(10 ** 7):07}']),
+            )
+            for _ in range(count)
+        ]
+
+    @staticmethod
+    def found(storage, field: str, value: str, mode: str) -> List[Tuple[str, ...]]:
+        '''
+        Метод возвращает значения найденных контактов в едином
+        порядке, т.к. идентификаторы в хранилищах различаются.
+        '''
+
+        return sorted(tuple(storage.get(elem).to_dict().values()) for elem in storage.find(field, value, mode))
+
+    def assert_same(self, first, second) -> None:
+        '''
+        Метод сравнивает порядок контактов и результаты запросов.
+        '''
+
+        self.assertEqual(len(first), len(second))
+        self.assertEqual(
+            [first.get(elem) for elem in first], [second.get(elem) for elem in second]
+        )
+        for field, value, mode in QUERIES:
+            with self.subTest(field=field, value=value, mode=mode):
+                self.assertEqual(self.found(first, field, value, mode), self.found(second, field, value, mode))
+
+    def test_same_results_as_json(self) -> None:
+        json_storage = self.open_storage('json')
+        sqlite_storage = self.open_storage('sqlite')
+        contacts: List[Contact] = self.contacts(300)
+        json_ids: List[str] = json_storage.add_many(contacts)
+        sqlite_ids: List[str] = sqlite_storage.add_many(contacts)
+
+        # Одинаковые изменения в обоих хранилищах
+        for pos in range(0, 300, 7):
+            json_storage.update(json_ids[pos], 'surname', 'Соколова')
+            sqlite_storage.update(sqlite_ids[pos], 'surname', 'Соколова')
+        for pos in range(0, 300, 11):
+            json_storage.remove(json_ids[pos])
+            sqlite_storage.remove(sqlite_ids[pos])
+        self.assert_same(json_storage, sqlite_storage)
+
+        # Данные сохраняются в базе между подключениями
+        self.assert_same(json_storage, self.open_storage('sqlite'))
+
+    def test_remove_updates_indexes(self) -> None:
+        storage = self.filled_storage('sqlite')
+        storage.remove(self.ids[0])
+        self.assertIsNone(storage.get(self.ids[0]))
+        self.assertEqual(storage.find('name', 'иван'), set())
+        self.assertEqual(len(storage), 3)
+        self.assertEqual(storage[0:10], [self.ids[2], self.ids[3], self.ids[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from unittest import mock
+import unittest
+
+from cl_contact import Contact
+from tests.base import StorageTestCase
+
+
+class TransactionTest(StorageTestCase):
+    '''
+    Транзакции хранилищ: одна запись на блок изменений,
+    отмена изменений при ошибке.
+    '''
+
+    def test_changes_written_once(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind), mock.patch.object(storage, '_flush', wraps=storage._flush) as flush:
+                with storage.transaction():
+                    storage.update(self.ids[0], 'organization', 'Тесла')
+                    with storage.transaction():
+                        added: str = storage.add(Contact(name='Олег'))
+                    storage.remove(self.ids[3])
+                    self.assertEqual(flush.call_count, 0)
+                self.assertEqual(flush.call_count, 1)
+
+                reopened = self.open_storage(kind)
+                self.assertEqual(reopened.get(self.ids[0])['organization'], 'Тесла')
+                self.assertEqual(reopened.get(added)['name'], 'Олег')
+                self.assertIsNone(reopened.get(self.ids[3]))
+
+    def test_error_rolls_back(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                with self.assertRaises(KeyError):
+                    with storage.transaction():
+                        storage.update(self.ids[0], 'organization', 'Тесла')
+                        storage.add(Contact(name='Олег'))
+                        storage.remove(self.ids[3])
+                        raise KeyError('отмена')
+
+                # Данные в памяти, индексы и файл не изменились
+                for elem in (storage, self.open_storage(kind)):
+                    self.assertEqual(len(elem), 4)
+                    self.assertEqual(elem.get(self.ids[0])['organization'], 'Яндекс')
+                    self.assertEqual(elem.find('organization', 'тесла'), set())
+                    self.assertEqual(elem.find('name', 'олег'), set())
+                    self.assertEqual(elem.find('name', 'анна'), {self.ids[3]})
+
+    def test_failed_flush_rolls_back(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind):
+                with mock.patch.object(storage, '_flush', side_effect=OSError('диск заполнен')):
+                    with self.assertRaises(OSError):
+                        with storage.transaction():
+                            storage.update(self.ids[0], 'organization', 'Тесла')
+                self.assertEqual(storage.get(self.ids[0])['organization'], 'Яндекс')
+
+                # После ошибки хранилище продолжает работать
+                storage.update(self.ids[0], 'organization', 'Газпром')
+                self.assertEqual(self.open_storage(kind).get(self.ids[0])['organization'], 'Газпром')
+
+    def test_early_flush_by_count(self) -> None:
+        for kind in ('json', 'sqlite'):
+            storage = self.filled_storage(kind)
+            with self.subTest(kind=kind), mock.patch.object(storage, '_flush', wraps=storage._flush) as flush:
+                with storage.transaction(max_changes=3):
+                    for pos in range(7):
+                        storage.add(Contact(name=f'Имя {pos}'))
+                    self.assertEqual(flush.call_count, 2)
+                self.assertEqual(flush.call_count, 3)
+                self.assertEqual(len(self.open_storage(kind)), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+from typing import List
+from unittest import mock
+import unittest
+import json
+
+from cl_contact import Contact
+from cl_ph_book import PhoneBook
+from cl_storage import JSONStorage
+from tests.base import CONTACTS, StorageTestCase
+import transfer
+
+
+class TransferTest(StorageTestCase):
+    '''
+    Импорт и экспорт контактов в файлы CSV и JSON Lines.
+    '''
+
+    def test_round_trip(self) -> None:
+        source: PhoneBook = PhoneBook(self.filled_storage('json'))
+        for name in ('contacts.csv', 'contacts.jsonl'):
+            with self.subTest(name=name):
+                self.assertEqual(source.export_file(self.path(name)), len(CONTACTS))
+                storage: JSONStorage = JSONStorage(self.path(f'{name}.json'))
+                self.storages.append(storage)
+                target: PhoneBook = PhoneBook(storage)
+                added, errors = target.import_file(self.path(name))
+                self.assertEqual((added, errors), (len(CONTACTS), []))
+                self.assertEqual(
+                    [target.get_contact(elem) for elem in target.list_contacts()],
+                    [source.get_contact(elem) for elem in source.list_contacts()],
+                )
+
+    def test_errors_are_reported_by_line(self) -> None:
+        rows: List[str] = [
+            json.dumps({'name': 'Иван', 'work_number': 84951234567}),
+            '{"name": "обрыв',
+            '',
+            json.dumps(['Иван']),
+            json.dumps({'name': 'Иван', 'work_number': 'звонить вечером'}),
+            json.dumps({'desperation': 'Петрович'}),
+            json.dumps({'name': {'first': 'Иван'}}),
+            '{"name": "\\ud800"}',
+            json.dumps({'id': '1', 'surname': ' Петров '}),
+        ]
+        with open(self.path('contacts.jsonl'), 'w', encoding='utf-8') as target:
+            target.write('\n'.join(rows) + '\n')
+
+        ph_bk: PhoneBook = PhoneBook(self.open_storage('json'))
+        added, errors = ph_bk.import_file(self.path('contacts.jsonl'), batch_size=1)
+        self.assertEqual(added, 2)
+        self.assertEqual(errors, [
+            'строка 2: строка не является объектом с характеристиками',
+            'строка 4: строка не является объектом с характеристиками',
+            'строка 5: некорректный номер телефона в work_number: звонить вечером',
+            'строка 6: не указаны ни имя, ни фамилия, ни организация',
+            'строка 7: некорректное значение характеристики name',
+            'строка 8: недопустимые символы в характеристике name',
+        ])
+        self.assertEqual(
+            sorted(ph_bk.get_contact(elem)['work_number'] for elem in ph_bk.list_contacts()),
+            ['', '84951234567'],
+        )
+
+    def test_import_commits_once_per_batch(self) -> None:
+        with open(self.path('contacts.csv'), 'w', encoding='utf-8') as target:
+            target.write('name,surname\n' + ''.join(f'Имя{pos},Фамилия\n' for pos in range(5)))
+        storage = self.open_storage('json')
+        with mock.patch.object(storage, 'add_many', wraps=storage.add_many) as add_many:
+            added, _ = PhoneBook(storage).import_file(self.path('contacts.csv'), batch_size=2)
+        self.assertEqual(added, 5)
+        self.assertEqual([len(call.args[0]) for call in add_many.call_args_list], [2, 2, 1])
+
+    def test_file_format(self) -> None:
+        self.assertEqual(transfer.file_format('a/b.CSV'), 'csv')
+        self.assertEqual(transfer.file_format('b.ndjson'), 'jsonl')
+        with self.assertRaises(ValueError):
+            transfer.file_format('contacts.json')
+        self.assertEqual(transfer.validate({'organization': 'Яндекс'}), (Contact(organization='Яндекс'), None))
+
+
+if __name__ == '__main__':
+    unittest.main()
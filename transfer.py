@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from cl_contact import Contact, FIELDS
+from cl_index import PHONE_FIELDS, canonical_number
+import csv
+import json
+import os
+import re
+
+
+# Поддерживаемые форматы файлов по расширению
+CSV_EXTENSIONS: Tuple[str, ...] = ('.csv',)
+JSONL_EXTENSIONS: Tuple[str, ...] = ('.jsonl', '.ndjson')
+
+# Символы, допустимые в номере телефона помимо цифр
+NUMBER_PATTERN = re.compile(r'^[\d\s()+\-.]*$')
+
+
+def file_format(path: str) -> str:
+    '''
+    Ф-ция определяет формат файла по расширению,
+    возвращает "csv" или "jsonl".
+    '''
+
+    extension: str = os.path.splitext(path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return 'csv'
+    if extension in JSONL_EXTENSIONS:
+        return 'jsonl'
+    raise ValueError(f'Неподдерживаемый формат файла: {extension or path}')
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, Any]]:
+    '''
+    Ф-ция построчно читает файл CSV или JSON Lines,
+    не загружая его в память целиком.
+    Возвращает пары "номер строки - данные строки",
+    строки JSON Lines, которые не удалось разобрать,
+    возвращаются как None.
+    '''
+
+    fmt: str = file_format(path)
+    with open(path, 'r', encoding='utf-8-sig', newline='') as source:
+
+        # CSV - первая строка файла является заголовком
+        if fmt == 'csv':
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        # JSON Lines - по одному объекту на строку, пустые строки пропускаются
+        for line_num, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except json.decoder.JSONDecodeError:
+                yield line_num, None
+
+
+def validate(row: Any) -> Tuple[Optional[Contact], Optional[str]]:
+    '''
+    Ф-ция проверяет строку импортируемого файла.
+    Возвращает пару "контакт - None", если строка корректна,
+    или "None - описание ошибки", если нет.
+    Столбцы, не относящиеся к характеристикам (например id),
+    игнорируются.
+    '''
+
+    if not isinstance(row, dict):
+        return None, 'строка не является объектом с характеристиками'
+
+    record: Dict[str, str] = dict()
+    for field in FIELDS:
+        value: Any = row.get(field)
+
+        # Отсутствующие характеристики - пустая строка, числа
+        # (например номера в JSON) приводятся к строке
+        if value is None:
+            value = ''
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        elif not isinstance(value, str):
+            return None, f'некорректное значение характеристики {field}'
+        value = value.strip()
+
+        # Строка должна записываться в файл в кодировке UTF-8
+        # (например JSON допускает одиночные суррогаты "\ud800")
+        try:
+            value.encode('utf-8')
+        except UnicodeEncodeError:
+            return None, f'недопустимые символы в характеристике {field}'
+
+        # Номер телефона должен состоять из цифр и символов форматирования
+        if field in PHONE_FIELDS and value and (
+            not NUMBER_PATTERN.match(value) or not canonical_number(value)
+        ):
+            return None, f'некорректный номер телефона в {field}: {value}'
+        record[field] = value
+
+    if not (record['name'] or record['surname'] or record['organization']):
+        return None, 'не указаны ни имя, ни фамилия, ни организация'
+    return Contact.from_dict(record), None
+
+
+def write_rows(path: str, rows: Iterable[Tuple[str, Contact]]) -> int:
+    '''
+    Ф-ция построчно записывает контакты в файл CSV или JSON Lines.
+    На вход принимает итератор пар "идентификатор - контакт",
+    поэтому данные не собираются в памяти целиком.
+    Возвращает кол-во записанных контактов.
+    '''
+
+    fmt: str = file_format(path)
+    count: int = 0
+    with open(path, 'w', encoding='utf-8', newline='') as target:
+        if fmt == 'csv':
+            writer = csv.writer(target)
+            writer.writerow(('id',) + FIELDS)
+            for contact_id, contact in rows:
+                writer.writerow([contact_id] + [contact[field] for field in FIELDS])
+                count += 1
+        else:
+            for contact_id, contact in rows:
+                target.write(json.dumps(
+                    {'id': contact_id, **contact.to_dict()}, ensure_ascii=False
+                ) + '\n')
+                count += 1
+    return count